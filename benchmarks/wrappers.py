@@ -0,0 +1,85 @@
+"""
+benchmarks.wrappers
+
+Measures the cost of reaching a collection through the database and
+collection wrappers, as a route does with ``mongo.db.users``. The
+uncached numbers build the wrappers on every access like the wrappers
+did before they were memoized. No MongoDB server is needed.
+
+Run with ``python -m benchmarks.wrappers``.
+"""
+import asyncio
+import timeit
+from typing import Callable
+
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+
+from quart_mongo.motor.wrappers import (
+    AsyncIOMotorClient,
+    AsyncIOMotorCollection,
+    AsyncIOMotorDatabase
+)
+from quart_mongo.pymongo.wrappers import Collection, Database, MongoClient
+
+COLLECTIONS = ("users", "posts", "comments", "tags", "sessions")
+NUMBER = 20000
+
+
+def report(label: str, func: Callable[[], None]) -> float:
+    """
+    Prints and returns the time of one call of ``func`` in microseconds.
+    """
+    best = min(timeit.repeat(func, number=NUMBER, repeat=5))
+    micros = best / NUMBER * 1e6
+    print(f"{label:<40} {micros:8.2f} us")
+    return micros
+
+
+def bench_pymongo() -> None:
+    """
+    Compares the PyMongo wrappers with and without the cache.
+    """
+    client: MongoClient = MongoClient("mongodb://localhost", connect=False)
+
+    def uncached() -> None:
+        for name in COLLECTIONS:
+            AsyncDatabase(client, "app")
+            Database(client, "app")
+            database = Database(client, "app")
+            AsyncCollection(database, name)
+            Collection(database, name)
+            Collection(database, name)
+
+    def cached() -> None:
+        for name in COLLECTIONS:
+            getattr(client.app, name)
+
+    before = report("pymongo, 5 collections, uncached", uncached)
+    after = report("pymongo, 5 collections, cached", cached)
+    print(f"{'speedup':<40} {before / after:8.1f} x")
+
+
+async def bench_motor() -> None:
+    """
+    Compares the Motor wrappers with and without the cache.
+    """
+    client = AsyncIOMotorClient("mongodb://localhost")
+
+    def uncached() -> None:
+        for name in COLLECTIONS:
+            database = AsyncIOMotorDatabase(client, "app")
+            AsyncIOMotorCollection(database, name)
+
+    def cached() -> None:
+        for name in COLLECTIONS:
+            getattr(client.app, name)
+
+    before = report("motor, 5 collections, uncached", uncached)
+    after = report("motor, 5 collections, cached", cached)
+    print(f"{'speedup':<40} {before / after:8.1f} x")
+
+
+if __name__ == "__main__":
+    bench_pymongo()
+    asyncio.run(bench_motor())
@@ -5,7 +5,7 @@ A MongoDB extension for `quart.Quart` using PyMongo and Beanie
 """
 from .pymongo import ASCENDING, DESCENDING, PyMongo
 from .bson import BSONObjectIdConverter, BSONProvider
-from .helpers import generate_etag, send_gridfs
+from .helpers import GridFSBody, generate_etag, send_gridfs
 from .motor import Motor
 
 
@@ -16,6 +16,7 @@ __all__ = (
     "Motor",
     "BSONObjectIdConverter",
     "BSONProvider",
+    "GridFSBody",
     "generate_etag",
     "send_gridfs"
 )
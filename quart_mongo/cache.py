@@ -0,0 +1,455 @@
+"""
+quart_mongo.cache
+"""
+from collections import OrderedDict
+from datetime import datetime
+import mmap
+import time
+from typing import (
+    Any,
+    AsyncIterable,
+    Generic,
+    Iterable,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar
+)
+
+
+T = TypeVar("T")
+
+CacheKey = Tuple[str, str, str, int]
+"""The cache key of a GridFS file: ``(db, base, filename, version)``."""
+
+
+class CachedFile(NamedTuple):
+    """
+    A GridFS file held in the :class:`GridFSCache`.
+
+    Arguments:
+        data: The contents of the file, or a read-only memory map of a
+            temporary file for a spooled file.
+        file_id: The ``_id`` of the file document.
+        filename: The filename of the file.
+        content_type: The content type of the file.
+        etag: The etag of the file.
+        upload_date: The upload date of the file.
+        expires: The monotonic time after which the file must be
+            revalidated, or ``None`` if it never expires.
+    """
+    data: bytes | mmap.mmap
+    file_id: Any
+    filename: str
+    content_type: Optional[str]
+    etag: Optional[str]
+    upload_date: datetime
+    expires: Optional[float]
+
+
+class GridFSCache:
+    """
+    Size-bounded LRU cache of small GridFS files.
+
+    Files are kept until the total size of the cached files exceeds
+    ``max_bytes``, and then the least recently used files are evicted.
+    A cached file is served without querying MongoDB until its ``ttl``
+    runs out. After that it must be revalidated against the file
+    document with :meth:`is_current` before it is served again.
+
+    The contents of a file are either ``bytes`` or, for a spooled file,
+    a memory map of a temporary file that is released once it is
+    evicted and no response still reads from it. Spooled files are
+    outside the heap, so they are bounded by ``max_mapped_bytes`` and
+    ``max_mapped_file_bytes`` instead of ``max_bytes`` and
+    ``max_file_bytes``, and only evict other spooled files.
+
+    Arguments:
+        max_bytes: The maximum total size of the cached files kept in
+            memory.
+        max_file_bytes: The maximum size of a single cached file kept
+            in memory.
+        ttl: Seconds a cached file is served without revalidation or
+            ``None`` to serve it until it is evicted or invalidated.
+        max_mapped_bytes: The maximum total size of the spooled files,
+            ``0`` caches none.
+        max_mapped_file_bytes: The maximum size of a single spooled
+            file.
+    """
+    def __init__(
+            self,
+            max_bytes: int,
+            max_file_bytes: int,
+            ttl: Optional[float] = None,
+            max_mapped_bytes: int = 0,
+            max_mapped_file_bytes: int = 0
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self.ttl = ttl
+        self.max_mapped_bytes = max_mapped_bytes
+        self.max_mapped_file_bytes = min(
+            max_mapped_file_bytes, max_mapped_bytes
+        )
+        self.size = 0
+        self.mapped_size = 0
+        self._files: OrderedDict[CacheKey, CachedFile] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def _expires(self) -> Optional[float]:
+        if self.ttl is None:
+            return None
+        return time.monotonic() + self.ttl
+
+    def get(self, key: CacheKey) -> Optional[CachedFile]:
+        """
+        Returns the cached file for the key and marks it as recently
+        used, or ``None`` if it is not cached.
+
+        Arguments:
+            key: The cache key of the file.
+        """
+        cached = self._files.get(key)
+        if cached is not None:
+            self._files.move_to_end(key)
+        return cached
+
+    @staticmethod
+    def is_fresh(cached: CachedFile) -> bool:
+        """
+        Checks if the cached file can be served without revalidation.
+
+        Arguments:
+            cached: The cached file.
+        """
+        return cached.expires is None or time.monotonic() < cached.expires
+
+    @staticmethod
+    def is_current(
+            cached: CachedFile,
+            file_id: Any,
+            etag: Optional[str],
+            upload_date: datetime
+    ) -> bool:
+        """
+        Checks if the cached file matches the current file document.
+
+        Arguments:
+            cached: The cached file.
+            file_id: The ``_id`` of the current file document.
+            etag: The etag stored in the current file document, if any.
+            upload_date: The upload date of the current file document.
+        """
+        if etag is not None and cached.etag != etag:
+            return False
+        return cached.file_id == file_id and cached.upload_date == upload_date
+
+    def accepts(self, length: int, mapped: bool = False) -> bool:
+        """
+        Checks if a file of the given length may be cached.
+
+        Arguments:
+            length: The length of the file in bytes.
+            mapped: If the file is spooled to a memory map.
+        """
+        if mapped:
+            return length <= self.max_mapped_file_bytes
+        return length <= self.max_file_bytes
+
+    def _resize(self, data: bytes | mmap.mmap, delta: int) -> None:
+        if isinstance(data, mmap.mmap):
+            self.mapped_size += delta
+        else:
+            self.size += delta
+
+    def put(
+            self,
+            key: CacheKey,
+            data: bytes | mmap.mmap,
+            file_id: Any,
+            filename: str,
+            content_type: Optional[str],
+            etag: Optional[str],
+            upload_date: datetime
+    ) -> None:
+        """
+        Adds a file to the cache, evicting the least recently used
+        files of the same kind to stay within ``max_bytes`` or, for a
+        spooled file, ``max_mapped_bytes``.
+
+        Arguments:
+            key: The cache key of the file.
+            data: The contents of the file.
+            file_id: The ``_id`` of the file document.
+            filename: The filename of the file.
+            content_type: The content type of the file.
+            etag: The etag of the file.
+            upload_date: The upload date of the file.
+        """
+        mapped = isinstance(data, mmap.mmap)
+        if not self.accepts(len(data), mapped):
+            return
+
+        self.pop(key)
+        self._files[key] = CachedFile(
+            data, file_id, filename, content_type, etag, upload_date,
+            self._expires()
+        )
+        self._resize(data, len(data))
+
+        for evicted in [
+            k for k, f in self._files.items()
+            if isinstance(f.data, mmap.mmap) == mapped
+        ]:
+            if self.size <= self.max_bytes and \
+                    self.mapped_size <= self.max_mapped_bytes:
+                break
+            self.pop(evicted)
+
+    def refresh(self, key: CacheKey) -> None:
+        """
+        Restarts the ttl of a cached file after it was revalidated.
+
+        Arguments:
+            key: The cache key of the file.
+        """
+        cached = self._files.get(key)
+        if cached is not None:
+            self._files[key] = cached._replace(expires=self._expires())
+
+    def pop(self, key: CacheKey) -> Optional[CachedFile]:
+        """
+        Removes a file from the cache and returns it.
+
+        Arguments:
+            key: The cache key of the file.
+        """
+        cached = self._files.pop(key, None)
+        if cached is not None:
+            self._resize(cached.data, -len(cached.data))
+        return cached
+
+    def invalidate(self, db: str, base: str, filename: str) -> None:
+        """
+        Removes every cached version of a file.
+
+        Arguments:
+            db: The name of the database.
+            base: The base name of the GridFS collections.
+            filename: The filename of the file.
+        """
+        for key in [k for k in self._files if k[:3] == (db, base, filename)]:
+            self.pop(key)
+
+    def invalidate_bucket(self, db: str, base: str) -> None:
+        """
+        Removes every cached file of a GridFS bucket.
+
+        Arguments:
+            db: The name of the database.
+            base: The base name of the GridFS collections.
+        """
+        for key in [k for k in self._files if k[:2] == (db, base)]:
+            self.pop(key)
+
+    def clear(self) -> None:
+        """
+        Removes all files from the cache.
+        """
+        self._files.clear()
+        self.size = 0
+        self.mapped_size = 0
+
+
+class FileDocumentCache:
+    """
+    TTL-bounded cache of GridFS file documents.
+
+    This caches the resolution of a filename and version to its file
+    document, so a lookup does not need a sorted query on the ``files``
+    collection. Entries expire after ``ttl`` seconds and at most
+    ``max_entries`` are kept, evicting the least recently used ones.
+
+    Arguments:
+        ttl: Seconds a file document is cached.
+        max_entries: The maximum number of cached file documents.
+    """
+    def __init__(self, ttl: float, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._documents: OrderedDict[
+            CacheKey, Tuple[Mapping[str, Any], float]
+        ] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def get(self, key: CacheKey) -> Optional[Mapping[str, Any]]:
+        """
+        Returns the cached file document for the key, or ``None`` if it
+        is not cached or has expired.
+
+        Arguments:
+            key: The cache key of the file.
+        """
+        entry = self._documents.get(key)
+        if entry is None:
+            return None
+
+        document, expires = entry
+        if time.monotonic() >= expires:
+            del self._documents[key]
+            return None
+
+        self._documents.move_to_end(key)
+        return document
+
+    def put(self, key: CacheKey, document: Mapping[str, Any]) -> None:
+        """
+        Adds a file document to the cache.
+
+        Arguments:
+            key: The cache key of the file.
+            document: The file document.
+        """
+        self._documents[key] = (document, time.monotonic() + self.ttl)
+        self._documents.move_to_end(key)
+
+        while len(self._documents) > self.max_entries:
+            self._documents.popitem(last=False)
+
+    def invalidate(self, db: str, base: str, filename: str) -> None:
+        """
+        Removes every cached version of a file.
+
+        Arguments:
+            db: The name of the database.
+            base: The base name of the GridFS collections.
+            filename: The filename of the file.
+        """
+        for key in [
+            k for k in self._documents if k[:3] == (db, base, filename)
+        ]:
+            del self._documents[key]
+
+    def invalidate_bucket(self, db: str, base: str) -> None:
+        """
+        Removes every cached file document of a GridFS bucket.
+
+        Arguments:
+            db: The name of the database.
+            base: The base name of the GridFS collections.
+        """
+        for key in [k for k in self._documents if k[:2] == (db, base)]:
+            del self._documents[key]
+
+    def clear(self) -> None:
+        """
+        Removes all file documents from the cache.
+        """
+        self._documents.clear()
+
+    async def watch(
+            self, db: str, stream: AsyncIterable[Mapping[str, Any]]
+    ) -> None:
+        """
+        Invalidates the cache from a change stream on a database, see
+        :func:`watch_files`.
+
+        Arguments:
+            db: The name of the watched database.
+            stream: The change stream of the database.
+        """
+        await watch_files(db, stream, [self])
+
+
+async def watch_files(
+        db: str,
+        stream: AsyncIterable[Mapping[str, Any]],
+        caches: Iterable[GridFSCache | FileDocumentCache]
+) -> None:
+    """
+    Invalidates GridFS caches from a change stream on a database.
+
+    Changes to a ``files`` collection of a bucket invalidate the cached
+    versions of the changed filename. Changes that do not include the
+    file document invalidate the whole bucket. This runs until the
+    stream ends or the task is cancelled.
+
+    Arguments:
+        db: The name of the watched database.
+        stream: The change stream of the database.
+        caches: The caches to invalidate.
+    """
+    caches = list(caches)
+    async for change in stream:
+        coll = change.get("ns", {}).get("coll") or ""
+        if not coll.endswith(".files"):
+            continue
+
+        base = coll[:-len(".files")]
+        document = change.get("fullDocument")
+        for cache in caches:
+            if document is not None and "filename" in document:
+                cache.invalidate(db, base, document["filename"])
+            else:
+                cache.invalidate_bucket(db, base)
+
+
+class WrapperCache(Generic[T]):
+    """
+    Size-bounded LRU cache of the database or collection wrappers of a
+    client, database or collection.
+
+    The wrappers take their options from their parent, so the name
+    alone identifies them. At most ``max_entries`` wrappers are kept,
+    evicting the least recently used ones, so names built from user
+    input cannot grow the cache without bound.
+
+    Arguments:
+        max_entries: The maximum number of cached wrappers.
+    """
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._wrappers: OrderedDict[str, T] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._wrappers)
+
+    def get(self, name: str) -> Optional[T]:
+        """
+        Returns the cached wrapper for a name and marks it as recently
+        used, or ``None`` if it is not cached.
+
+        Arguments:
+            name: The name of the database or collection.
+        """
+        wrapper = self._wrappers.get(name)
+        if wrapper is not None:
+            self._wrappers.move_to_end(name)
+        return wrapper
+
+    def put(self, name: str, wrapper: T) -> T:
+        """
+        Adds a wrapper to the cache and returns it.
+
+        Arguments:
+            name: The name of the database or collection.
+            wrapper: The wrapper.
+        """
+        self._wrappers[name] = wrapper
+        if len(self._wrappers) > self.max_entries:
+            self._wrappers.popitem(last=False)
+        return wrapper
+
+
+__all__ = (
+    "CacheKey",
+    "CachedFile",
+    "FileDocumentCache",
+    "GridFSCache",
+    "WrapperCache"
+)
@@ -0,0 +1,106 @@
+"""
+quart_mongo.cli
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+import click
+from quart import Quart
+from quart.cli import AppGroup
+
+if TYPE_CHECKING:
+    from .motor import Motor
+    from .pymongo import PyMongo
+
+
+def _run(app: Quart, func: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Runs a coroutine function between the app startup and shutdown,
+    so the MongoDB client of the extension is available.
+    """
+    async def _inner() -> Any:
+        await app.startup()
+        try:
+            return await func()
+        finally:
+            await app.shutdown()
+
+    return asyncio.run(_inner())
+
+
+def register_commands(app: Quart, mongo: PyMongo | Motor) -> None:
+    """
+    Registers the ``gridfs`` command group with the app.
+
+    Only the first extension initialized with the app registers the
+    commands, so they use the ``MONGO_URI`` of that extension.
+
+    Arguments:
+        app: An instance of :class:`~quart.Quart`.
+        mongo: The extension to run the commands with.
+    """
+    if "gridfs" in app.cli.commands:
+        return
+
+    group = AppGroup("gridfs", help="GridFS maintenance commands.")
+
+    @group.command("backfill-etags")
+    @click.option("--base", default="fs", help="The GridFS bucket name.")
+    @click.option("--db", default=None, help="The target database.")
+    def backfill_etags_command(base: str, db: Optional[str]) -> None:
+        """
+        Store a sha1 in every GridFS file without a checksum.
+        """
+        count = _run(app, lambda: mongo.backfill_etags(base=base, db=db))
+        click.echo(f"Stored a sha1 for {count} file(s).")
+
+    @group.command("expire-uploads")
+    @click.option("--base", default="fs", help="The GridFS bucket name.")
+    @click.option("--db", default=None, help="The target database.")
+    def expire_uploads_command(base: str, db: Optional[str]) -> None:
+        """
+        Delete the expired resumable uploads and their chunks.
+        """
+        count = _run(app, lambda: mongo.expire_uploads(base=base, db=db))
+        click.echo(f"Deleted {count} expired upload(s).")
+
+    @group.command("sweep-chunks")
+    @click.option("--base", default="fs", help="The GridFS bucket name.")
+    @click.option("--db", default=None, help="The target database.")
+    def sweep_chunks_command(base: str, db: Optional[str]) -> None:
+        """
+        Delete the chunks that belong to no GridFS file.
+        """
+        count = _run(
+            app, lambda: mongo.sweep_orphan_chunks(base=base, db=db)
+        )
+        click.echo(f"Deleted {count} orphaned chunk(s).")
+
+    @group.command("prune-revisions")
+    @click.option(
+        "--keep",
+        type=int,
+        default=None,
+        help="The number of revisions to keep per filename."
+    )
+    @click.option("--base", default="fs", help="The GridFS bucket name.")
+    @click.option("--db", default=None, help="The target database.")
+    def prune_revisions_command(
+            keep: Optional[int], base: str, db: Optional[str]
+    ) -> None:
+        """
+        Delete all but the newest revisions of every GridFS file.
+        """
+        count = _run(
+            app, lambda: mongo.prune_revisions(keep, base=base, db=db)
+        )
+        click.echo(f"Deleted {count} old revision(s).")
+
+    app.cli.add_command(group)
+
+
+__all__ = (
+    "register_commands",
+)
@@ -0,0 +1,334 @@
+"""
+quart_mongo.coalesce
+"""
+import asyncio
+import copy
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar
+)
+
+import bson
+from bson.errors import InvalidDocument
+
+try:
+    from pymongo.asynchronous.client_session import _SESSION
+except ImportError:  # PyMongo < 4.17 cannot bind sessions
+    _SESSION = None
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key.
+
+    While a call for a key is running, every other call for that key
+    waits for it and gets the same result or exception instead of
+    running again. Cancelling one caller does not cancel the shared
+    call for the others.
+    """
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _done(self, key: Hashable, future: asyncio.Future[Any]) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            # Retrieve the exception so it is not logged as unhandled
+            # when every caller was cancelled.
+            future.exception()
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the result of ``func``, sharing a call that is already
+        running for the key.
+
+        Arguments:
+            key: The key of the call.
+            func: The function to call if no call is running for the key.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(
+                lambda done: self._done(key, done)
+            )
+        return await asyncio.shield(future)
+
+
+class Broadcast:
+    """
+    Fans out one async iterator of bytes to several readers.
+
+    The pieces are read from the source once, in a task of their own,
+    and kept until every reader has consumed them. The source is never
+    read more than ``window`` pieces ahead of the slowest reader, so a
+    slow reader bounds the buffering instead of growing it.
+
+    A reader that joins late starts at the oldest buffered piece and
+    has to read the bytes before :meth:`start` on its own. Readers can
+    only join while at most ``window`` pieces were dropped, so their
+    catching up is bounded like the buffering.
+
+    Arguments:
+        source: The iterator to read the pieces from.
+        window: The maximum number of buffered pieces.
+        close: Called once when the last reader leaves.
+    """
+    def __init__(
+            self,
+            source: AsyncIterator[bytes],
+            window: int,
+            close: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> None:
+        self.source = source
+        self.window = max(window, 1)
+        self._close = close
+        self._cond = asyncio.Condition()
+        self._pieces: Dict[int, bytes] = {}
+        self._offsets: Dict[int, int] = {}
+        self._readers: Dict[int, int] = {}
+        self._starts: Dict[int, int] = {}
+        self._read_bytes = 0
+        self._next_reader = 0
+        self._next = 0
+        self._fetch: Optional[asyncio.Future[None]] = None
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    @property
+    def _first(self) -> int:
+        return min(self._pieces, default=self._next)
+
+    @property
+    def joinable(self) -> bool:
+        """
+        Checks if a new reader can still join, with at most ``window``
+        pieces to read on its own.
+        """
+        return not self._closed and self._error is None and \
+            self._first <= self.window
+
+    def join(self) -> int:
+        """
+        Adds a reader at the oldest buffered piece and returns its id.
+        """
+        if not self.joinable:
+            raise RuntimeError("The broadcast cannot be joined anymore")
+        reader = self._next_reader
+        self._next_reader += 1
+        first = self._first
+        self._readers[reader] = first
+        self._starts[reader] = self._offsets.get(first, self._read_bytes)
+        return reader
+
+    def start(self, reader: int) -> int:
+        """
+        Returns the offset in bytes of the first piece of a reader. The
+        bytes before it were sent before the reader joined.
+
+        Arguments:
+            reader: The id of the reader.
+        """
+        return self._starts[reader]
+
+    def _trim(self) -> None:
+        lowest = min(self._readers.values(), default=self._next)
+        for index in [i for i in self._pieces if i < lowest]:
+            del self._pieces[index]
+            del self._offsets[index]
+
+    async def _read(self) -> None:
+        try:
+            piece: Optional[bytes] = await anext(self.source)
+        except StopAsyncIteration:
+            piece = None
+        except Exception as error:  # pylint: disable=W0718
+            async with self._cond:
+                self._error = error
+                self._fetch = None
+                self._cond.notify_all()
+            return
+
+        async with self._cond:
+            if piece is None:
+                self._done = True
+            else:
+                self._pieces[self._next] = piece
+                self._offsets[self._next] = self._read_bytes
+                self._read_bytes += len(piece)
+                self._next += 1
+            self._fetch = None
+            self._cond.notify_all()
+
+    async def get(self, reader: int) -> Optional[bytes]:
+        """
+        Returns the next piece for a reader or ``None`` at the end.
+
+        Arguments:
+            reader: The id of the reader.
+        """
+        async with self._cond:
+            index = self._readers[reader]
+            while True:
+                if index in self._pieces:
+                    piece = self._pieces[index]
+                    self._readers[reader] = index + 1
+                    self._trim()
+                    self._cond.notify_all()
+                    return piece
+                if self._error is not None:
+                    raise self._error
+                if self._done:
+                    return None
+
+                lowest = min(self._readers.values())
+                if self._fetch is None and index - lowest < self.window:
+                    self._fetch = asyncio.ensure_future(self._read())
+                await self._cond.wait()
+
+    async def leave(self, reader: int) -> None:
+        """
+        Removes a reader. The source is closed when the last reader
+        leaves.
+
+        Arguments:
+            reader: The id of the reader.
+        """
+        async with self._cond:
+            self._readers.pop(reader, None)
+            self._starts.pop(reader, None)
+            self._trim()
+            self._cond.notify_all()
+            if self._readers or self._closed:
+                return
+            self._closed = True
+            fetch, self._fetch = self._fetch, None
+
+        if fetch is not None:
+            fetch.cancel()
+            await asyncio.gather(fetch, return_exceptions=True)
+        self._pieces.clear()
+        self._offsets.clear()
+        if self._close is not None:
+            await self._close()
+
+
+def _normalize_projection(projection: Any) -> Any:
+    if projection is None:
+        return None
+    if isinstance(projection, Mapping):
+        return dict(sorted(projection.items()))
+    return {key: 1 for key in sorted(projection)}
+
+
+def _normalize_sort(sort: Any) -> Any:
+    if sort is None:
+        return None
+    if isinstance(sort, str):
+        return [[sort, 1]]
+    if isinstance(sort, Mapping):
+        sort = sort.items()
+    return [list(pair) for pair in sort]
+
+
+def read_key(
+        collection: Any, filter: Any,  # pylint: disable=W0622
+        args: Tuple[Any, ...], kwargs: Mapping[str, Any]
+) -> Optional[Hashable]:
+    """
+    Returns the key of a ``find_one`` call, or ``None`` if the call must
+    not be coalesced.
+
+    Calls are coalesced when they only pass a filter, a projection and a
+    sort. The top level of the filter and the projection are sorted, so
+    the order of their fields does not matter. Calls in a session,
+    passed or bound, are never coalesced, so a transaction always reads
+    its own writes.
+
+    Arguments:
+        collection: The collection of the call.
+        filter: The filter of the call.
+        args: The other positional arguments of the call.
+        kwargs: The keyword arguments of the call.
+    """
+    if len(args) > 1 or (args and "projection" in kwargs) or \
+            set(kwargs) - {"projection", "sort", "session"}:
+        return None
+    if kwargs.get("session") is not None or \
+            (_SESSION is not None and _SESSION.get() is not None):
+        return None
+
+    if filter is None:
+        filter = {}
+    elif not isinstance(filter, Mapping):
+        filter = {"_id": filter}
+    try:
+        query = bson.encode({
+            "filter": dict(sorted(filter.items())),
+            "projection": _normalize_projection(
+                args[0] if args else kwargs.get("projection")
+            ),
+            "sort": _normalize_sort(kwargs.get("sort"))
+        }, codec_options=collection.codec_options)
+    except (InvalidDocument, TypeError):
+        return None
+    return (id(collection), query)
+
+
+class CoalescingMixin:
+    """
+    Coalesces identical ``find_one`` calls that run at the same time.
+
+    If the client has a :class:`SingleFlight` for reads, concurrent calls
+    with the same filter, projection and sort on the collection share a
+    single query, see :func:`read_key`. Only calls in flight are shared,
+    so no result is older than the query it came from. Every caller gets
+    its own copy of the document.
+    """
+    async def find_one(
+            self, filter: Any = None,  # pylint: disable=W0622
+            *args: Any, **kwargs: Any
+    ) -> Any:
+        """
+        Like ``find_one`` of the driver, and shared with the identical
+        calls in flight when reads are coalesced.
+        """
+        find_one = super().find_one  # type: ignore[misc]
+        flight: Optional[SingleFlight] = getattr(
+            self.database.client,  # type: ignore[attr-defined]
+            "_read_flight",
+            None
+        )
+        key = read_key(self, filter, args, kwargs) \
+            if flight is not None else None
+        if flight is None or key is None:
+            return await find_one(filter, *args, **kwargs)
+
+        document = await flight.do(
+            key, lambda: find_one(filter, *args, **kwargs)
+        )
+        return copy.deepcopy(document)
+
+
+__all__ = (
+    "Broadcast",
+    "CoalescingMixin",
+    "SingleFlight",
+    "read_key"
+)
@@ -0,0 +1,123 @@
+"""
+quart_mongo.compression
+"""
+from typing import AsyncIterable, AsyncIterator, Protocol, Tuple
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class Compressor(Protocol):
+    """
+    A streaming compressor such as :func:`zlib.compressobj`.
+    """
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compresses a piece of data.
+        """
+
+    def flush(self) -> bytes:
+        """
+        Returns the rest of the compressed data.
+        """
+
+
+class Decompressor(Protocol):
+    """
+    A streaming decompressor such as :func:`zlib.decompressobj`.
+    """
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Decompresses a piece of data.
+        """
+
+    def flush(self) -> bytes:
+        """
+        Returns the rest of the decompressed data.
+        """
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """
+    Returns the content encodings GridFS files can be compressed with.
+
+    ``gzip`` is always available and ``zstd`` requires the
+    ``zstandard`` package.
+    """
+    if zstandard is None:
+        return ("gzip",)
+    return ("gzip", "zstd")
+
+
+def check_encoding(encoding: str) -> None:
+    """
+    Raises a ``ValueError`` if a content encoding is not available.
+
+    Arguments:
+        encoding: The content encoding.
+    """
+    if encoding not in available_encodings():
+        raise ValueError(
+            f"Unsupported content encoding {encoding!r}, expected one of "
+            f"{', '.join(available_encodings())}"
+        )
+
+
+def compressor(encoding: str) -> Compressor:
+    """
+    Returns a streaming compressor for a content encoding.
+
+    Arguments:
+        encoding: The content encoding, ``gzip`` or ``zstd``.
+    """
+    check_encoding(encoding)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor().compressobj()
+    return zlib.compressobj(wbits=31)
+
+
+def decompressor(encoding: str) -> Decompressor:
+    """
+    Returns a streaming decompressor for a content encoding.
+
+    Arguments:
+        encoding: The content encoding, ``gzip`` or ``zstd``.
+    """
+    check_encoding(encoding)
+    if encoding == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(wbits=31)
+
+
+async def compress_stream(
+        pieces: AsyncIterable[bytes], encoding: str
+) -> AsyncIterator[bytes]:
+    """
+    Compresses an async iterable of bytes.
+
+    Arguments:
+        pieces: The data to compress.
+        encoding: The content encoding, ``gzip`` or ``zstd``.
+    """
+    stream = compressor(encoding)
+    async for data in pieces:
+        data = stream.compress(data)
+        if data:
+            yield data
+    data = stream.flush()
+    if data:
+        yield data
+
+
+__all__ = (
+    "Compressor",
+    "Decompressor",
+    "available_encodings",
+    "check_encoding",
+    "compress_stream",
+    "compressor",
+    "decompressor"
+)
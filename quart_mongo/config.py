@@ -25,12 +25,109 @@ class MongoConfig:
     MongoConfig accepts a MongoDB URI via the ``MONGO_URI``
     Quart configuration variable, or as an argument to the constructor.
 
+    It also reads the GridFS settings from the Quart configuration.
+
     Arguments:
         app: an isntance of `quart.Quart`
         uri: MongoDB URI. This defaults to ``None`` and
             then will use the app configuration.
         args: positional arguments for the MongoDB client
         kwargs: keyword arguments for the MOngoDB client
+
+    Attributes:
+        identity_map: Keep the documents found by ``_id`` on the
+            collection wrappers until the end of the request. Set with
+            ``MONGO_IDENTITY_MAP``, defaults to ``False``.
+        coalesce_reads: Share identical ``find_one`` calls in flight on
+            the collection wrappers between requests. Set with
+            ``MONGO_COALESCE_READS``, defaults to ``False``.
+        gridfs_backfill_etags: Store the sha1 computed for a GridFS file
+            without a checksum in its file document. Set with
+            ``MONGO_GRIDFS_BACKFILL_ETAGS``, defaults to ``False``.
+        gridfs_cache_bytes: The size of the in-process cache of GridFS
+            files. Set with ``MONGO_GRIDFS_CACHE_BYTES``, defaults to
+            ``0`` which disables the cache.
+        gridfs_cache_max_file_bytes: The largest GridFS file that is
+            cached. Set with ``MONGO_GRIDFS_CACHE_MAX_FILE_BYTES``,
+            defaults to 1 MiB.
+        gridfs_cache_ttl: Seconds a cached GridFS file is served before
+            it is revalidated. Set with ``MONGO_GRIDFS_CACHE_TTL``,
+            defaults to ``60``. ``None`` never revalidates.
+        gridfs_metadata_cache_ttl: Seconds the file document of a GridFS
+            filename and version is cached. Set with
+            ``MONGO_GRIDFS_METADATA_CACHE_TTL``, defaults to ``0`` which
+            disables the cache.
+        gridfs_metadata_cache_size: The maximum number of cached file
+            documents. Set with ``MONGO_GRIDFS_METADATA_CACHE_SIZE``,
+            defaults to ``1024``.
+        gridfs_metadata_cache_watch: Invalidate the cached file documents
+            and cached files from a change stream on the database, so
+            changes made by other processes are seen. This requires a
+            replica set. Set with ``MONGO_GRIDFS_METADATA_CACHE_WATCH``,
+            defaults to ``False``.
+        gridfs_buckets: The base names of the GridFS buckets in the
+            default database whose indexes are created before serving.
+            Set with ``MONGO_GRIDFS_BUCKETS``, defaults to no buckets.
+        gridfs_upload_batch_size: The number of chunks ``save_file``
+            inserts per round trip. Set with
+            ``MONGO_GRIDFS_UPLOAD_BATCH_SIZE``, defaults to ``0`` which
+            writes the chunks one at a time through the driver.
+        gridfs_upload_max_batches: The maximum number of chunk batches
+            in flight for each upload. Set with
+            ``MONGO_GRIDFS_UPLOAD_MAX_BATCHES``, defaults to ``4``.
+        gridfs_dedup: Store the chunks of identical files saved with
+            ``save_file`` once and share them by reference. Set with
+            ``MONGO_GRIDFS_DEDUP``, defaults to ``False``.
+        gridfs_coalesce: Share one file document lookup and one chunk
+            read between concurrent ``send_file`` calls for the same
+            file. Set with ``MONGO_GRIDFS_COALESCE``, defaults to
+            ``False``.
+        gridfs_coalesce_window: The maximum number of chunks a shared
+            download buffers ahead of its slowest reader. Set with
+            ``MONGO_GRIDFS_COALESCE_WINDOW``, defaults to ``16``.
+        gridfs_download_prefetch: The number of chunk batches
+            ``send_file`` reads ahead of the one being sent. Set with
+            ``MONGO_GRIDFS_DOWNLOAD_PREFETCH``, defaults to ``0`` which
+            reads the chunks through a single cursor.
+        gridfs_upload_ttl: The number of seconds a resumable upload is
+            kept after its last piece. Set with
+            ``MONGO_GRIDFS_UPLOAD_TTL``, defaults to ``86400``.
+        gridfs_upload_gc_interval: The number of seconds between the
+            deletions of expired resumable uploads while serving. Set
+            with ``MONGO_GRIDFS_UPLOAD_GC_INTERVAL``, defaults to ``0``
+            which never deletes them in the background.
+        gridfs_maintenance_interval: The number of seconds between the
+            orphan chunk sweeps and revision prunings while serving.
+            Set with ``MONGO_GRIDFS_MAINTENANCE_INTERVAL``, defaults to
+            ``0`` which never runs them in the background.
+        gridfs_keep_revisions: The number of revisions per filename
+            kept by the revision pruning. Set with
+            ``MONGO_GRIDFS_KEEP_REVISIONS``, defaults to ``0`` which
+            keeps every revision.
+        gridfs_orphan_grace: The minimum age in seconds of the chunks
+            deleted by the orphan chunk sweep. Set with
+            ``MONGO_GRIDFS_ORPHAN_GRACE``, defaults to ``3600``.
+        gridfs_maintenance_batch_size: The number of files the
+            maintenance tasks handle between pauses. Set with
+            ``MONGO_GRIDFS_MAINTENANCE_BATCH_SIZE``, defaults to
+            ``500``.
+        gridfs_maintenance_duty: The share of the time the maintenance
+            tasks spend working. Set with
+            ``MONGO_GRIDFS_MAINTENANCE_DUTY``, defaults to ``0.1``.
+        gridfs_spool_threshold: The size in bytes from which files put
+            in the GridFS file cache are spooled to a temporary file and
+            memory-mapped instead of being kept in memory. Set with
+            ``MONGO_GRIDFS_SPOOL_THRESHOLD``, defaults to ``0`` which
+            never spools.
+        gridfs_spool_bytes: The total size of the spooled files in the
+            GridFS file cache. Set with ``MONGO_GRIDFS_SPOOL_BYTES``,
+            defaults to 256 MiB.
+        gridfs_spool_max_file_bytes: The largest GridFS file that is
+            spooled. Set with ``MONGO_GRIDFS_SPOOL_MAX_FILE_BYTES``,
+            defaults to 64 MiB.
+        gridfs_spool_dir: The directory of the spooled files. Set with
+            ``MONGO_GRIDFS_SPOOL_DIR``, defaults to ``None`` which uses
+            the default temporary directory.
     """
     def __init__(
             self, app: Quart, uri: Optional[str] = None,
@@ -50,6 +147,88 @@ class MongoConfig:
 
         self._db_name: Optional[str] = None
 
+        self.identity_map: bool = app.config.get(
+            "MONGO_IDENTITY_MAP", False
+        )
+        self.coalesce_reads: bool = app.config.get(
+            "MONGO_COALESCE_READS", False
+        )
+        self.gridfs_backfill_etags: bool = app.config.get(
+            "MONGO_GRIDFS_BACKFILL_ETAGS", False
+        )
+        self.gridfs_cache_bytes: int = app.config.get(
+            "MONGO_GRIDFS_CACHE_BYTES", 0
+        )
+        self.gridfs_cache_max_file_bytes: int = app.config.get(
+            "MONGO_GRIDFS_CACHE_MAX_FILE_BYTES", 1024 * 1024
+        )
+        self.gridfs_cache_ttl: Optional[float] = app.config.get(
+            "MONGO_GRIDFS_CACHE_TTL", 60
+        )
+        self.gridfs_metadata_cache_ttl: float = app.config.get(
+            "MONGO_GRIDFS_METADATA_CACHE_TTL", 0
+        )
+        self.gridfs_metadata_cache_size: int = app.config.get(
+            "MONGO_GRIDFS_METADATA_CACHE_SIZE", 1024
+        )
+        self.gridfs_metadata_cache_watch: bool = app.config.get(
+            "MONGO_GRIDFS_METADATA_CACHE_WATCH", False
+        )
+        self.gridfs_buckets: Tuple[str, ...] = tuple(
+            app.config.get("MONGO_GRIDFS_BUCKETS", ())
+        )
+        self.gridfs_upload_batch_size: int = app.config.get(
+            "MONGO_GRIDFS_UPLOAD_BATCH_SIZE", 0
+        )
+        self.gridfs_upload_max_batches: int = app.config.get(
+            "MONGO_GRIDFS_UPLOAD_MAX_BATCHES", 4
+        )
+        self.gridfs_dedup: bool = app.config.get(
+            "MONGO_GRIDFS_DEDUP", False
+        )
+        self.gridfs_coalesce: bool = app.config.get(
+            "MONGO_GRIDFS_COALESCE", False
+        )
+        self.gridfs_coalesce_window: int = app.config.get(
+            "MONGO_GRIDFS_COALESCE_WINDOW", 16
+        )
+        self.gridfs_download_prefetch: int = app.config.get(
+            "MONGO_GRIDFS_DOWNLOAD_PREFETCH", 0
+        )
+        self.gridfs_upload_ttl: float = app.config.get(
+            "MONGO_GRIDFS_UPLOAD_TTL", 86400
+        )
+        self.gridfs_upload_gc_interval: float = app.config.get(
+            "MONGO_GRIDFS_UPLOAD_GC_INTERVAL", 0
+        )
+        self.gridfs_maintenance_interval: float = app.config.get(
+            "MONGO_GRIDFS_MAINTENANCE_INTERVAL", 0
+        )
+        self.gridfs_keep_revisions: int = app.config.get(
+            "MONGO_GRIDFS_KEEP_REVISIONS", 0
+        )
+        self.gridfs_orphan_grace: float = app.config.get(
+            "MONGO_GRIDFS_ORPHAN_GRACE", 3600
+        )
+        self.gridfs_maintenance_batch_size: int = app.config.get(
+            "MONGO_GRIDFS_MAINTENANCE_BATCH_SIZE", 500
+        )
+        self.gridfs_maintenance_duty: float = app.config.get(
+            "MONGO_GRIDFS_MAINTENANCE_DUTY", 0.1
+        )
+        self.gridfs_spool_threshold: int = app.config.get(
+            "MONGO_GRIDFS_SPOOL_THRESHOLD", 0
+        )
+        self.gridfs_spool_bytes: int = app.config.get(
+            "MONGO_GRIDFS_SPOOL_BYTES", 256 * 1024 * 1024
+        )
+        self.gridfs_spool_max_file_bytes: int = app.config.get(
+            "MONGO_GRIDFS_SPOOL_MAX_FILE_BYTES", 64 * 1024 * 1024
+        )
+        self.gridfs_spool_dir: Optional[str] = app.config.get(
+            "MONGO_GRIDFS_SPOOL_DIR", None
+        )
+
     @property
     def args(self) -> Tuple[Any, ...]:
         """
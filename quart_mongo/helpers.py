@@ -1,32 +1,111 @@
 """
 quart_mongo.helpers
 """
+import asyncio
+from collections import deque
 from datetime import datetime, timedelta, timezone
 import hashlib
-from io import BytesIO
+import inspect
+from io import BufferedIOBase, BytesIO
 from mimetypes import guess_type
+import mmap
+import secrets
+import tempfile
 import warnings
-from typing import BinaryIO
+import zipfile
+from types import TracebackType
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterable,
+    AsyncIterator,
+    BinaryIO,
+    Iterable,
+    Mapping
+)
 
+from bson import Binary, ObjectId
+from gridfs import DEFAULT_CHUNK_SIZE
 from gridfs.asynchronous import AsyncGridOut
-from motor.motor_asyncio import AsyncIOMotorGridOut
+from gridfs.errors import CorruptGridFile
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorGridOut
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
 from quart import current_app, request, Response
 from quart.helpers import DEFAULT_MIMETYPE
-from quart.wrappers.response import ResponseBody
+from quart.wrappers.response import DataBody, ResponseBody
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.sansio.http import is_resource_modified
+
+from .cache import CachedFile
+from .coalesce import Broadcast
+from .compression import check_encoding, compress_stream, decompressor
+
+
+FileSource = BinaryIO | AsyncIterable[bytes]
+"""
+A source of bytes to save to GridFS: a file-like object with a ``read``
+method, which may be a coroutine, or an async iterable of bytes such as
+:attr:`quart.Request.body`.
+"""
+
+
+def is_file_source(fileobj: Any) -> bool:
+    """
+    Checks if the object can be saved to GridFS.
+
+    Arguments:
+        fileobj: The object to check.
+    """
+    return hasattr(fileobj, "__aiter__") or \
+        (hasattr(fileobj, "read") and callable(fileobj.read))
+
+
+HASH_THREAD_THRESHOLD = 128 * 1024
+"""Buffers of at least this many bytes are hashed in a worker thread."""
+
+
+async def update_hash(digest: Any, data: bytes) -> None:
+    """
+    Updates a hash with data.
+
+    :mod:`hashlib` releases the GIL while it hashes large buffers, so
+    buffers of at least :data:`HASH_THREAD_THRESHOLD` bytes are hashed
+    in a worker thread and the event loop keeps serving requests.
+    Smaller buffers are hashed inline, where it is cheaper than the
+    hand-off.
+
+    Arguments:
+        digest: The hash object, such as :func:`hashlib.sha1`.
+        data: The data to add to the hash.
+    """
+    if len(data) >= HASH_THREAD_THRESHOLD:
+        await asyncio.to_thread(digest.update, data)
+    else:
+        digest.update(data)
 
 
 class GridFsFileWrapper:
     """
     GridFS File Wrapper to include sha1 for etag.
 
-    This is used since GridFS doesn't manage its own checksum.
+    This is used since GridFS doesn't manage its own checksum. When an
+    encoding is given the file is compressed while it is read, and the
+    sha1 is the checksum of the compressed data that is stored.
 
     Arguments:
         file: The file to use.
+        encoding: The content encoding to compress the file with, see
+            :func:`~quart_mongo.compression.available_encodings`.
     """
-    def __init__(self, file: BinaryIO) -> None:
+    def __init__(
+            self, file: FileSource, encoding: str | None = None
+    ) -> None:
         self.file = file
+        self.encoding = encoding
         self.hash = hashlib.sha1()
+        if encoding is not None:
+            check_encoding(encoding)
 
     def read(self, n: int) -> bytes:
         """
@@ -35,54 +114,1329 @@ class GridFsFileWrapper:
         Arguments:
             n: The number of bytes to read.
         """
-        data = self.file.read(n)
+        data = self.file.read(n)  # type: ignore[union-attr]
         if data:
             self.hash.update(data)
         return data
 
+    async def _pieces(self, size: int) -> AsyncIterator[bytes]:
+        if hasattr(self.file, "__aiter__"):
+            async for data in self.file:  # type: ignore[union-attr]
+                yield data
+        else:
+            while True:
+                data = self.file.read(size)  # type: ignore[union-attr]
+                if inspect.isawaitable(data):
+                    data = await data
+                if not data:
+                    break
+                yield data
+
+    async def chunks(self, chunk_size: int) -> AsyncIterator[bytes]:
+        """
+        Reads the file in pieces of ``chunk_size`` bytes and updates
+        the hash.
+
+        The data is consumed as it arrives and re-aligned to the chunk
+        size, so a piece is yielded as soon as a whole GridFS chunk is
+        available. Only the last piece may be shorter. Buffered binary
+        files, whose ``read`` only returns fewer bytes than asked at the
+        end of the file, are read in whole chunks without re-alignment.
+
+        Arguments:
+            chunk_size: The chunk size of the GridFS file.
+        """
+        pieces = self._pieces(chunk_size)
+        if self.encoding is None and isinstance(self.file, BufferedIOBase):
+            async for data in pieces:
+                await update_hash(self.hash, data)
+                yield data
+            return
 
-async def generate_etag(grid_out: AsyncGridOut | AsyncIOMotorGridOut) -> str:
+        if self.encoding is not None:
+            pieces = compress_stream(pieces, self.encoding)
+        buffer = bytearray()
+        async for data in pieces:
+            buffer += data
+            while len(buffer) >= chunk_size:
+                piece = bytes(buffer[:chunk_size])
+                del buffer[:chunk_size]
+                await update_hash(self.hash, piece)
+                yield piece
+        if buffer:
+            piece = bytes(buffer)
+            await update_hash(self.hash, piece)
+            yield piece
+
+
+class GridFSBody(ResponseBody):
     """
-    Generates etag for GridFS.
+    Streams a GridFS file as a response body.
 
-    GridFS does not manage its own checksum. Try to use a
-    sha1 sum that we have added during saving the file. This
-    function will fallback to a legacy md5 sum if it exists.
-    Otherwise, compute the sha1 sum directly.
+    The chunks are read from the ``chunks`` collection one batch at a
+    time while the response is being sent, so only about one chunk of
+    the file is held in memory for each download. When a range is set
+    with :meth:`make_conditional` only the chunks that overlap the range
+    are fetched.
+
+    With a ``prefetch`` window the next batches are fetched concurrently
+    while the current one is sent, so a download is not limited by the
+    round trip to MongoDB. At most ``prefetch`` batches are read ahead,
+    so a slow client never buffers more than ``prefetch * batch_size``
+    chunks.
 
     Arguments:
-        grid_out: An instance of `~gridfs.asynchronous.AsyncGridOut`
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        file_id: The ``_id`` of the file document.
+        length: The length of the file in bytes.
+        chunk_size: The chunk size of the file in bytes.
+        prefetch: The number of batches to read ahead, ``0`` reads the
+            chunks through a single cursor.
+
+    Attributes:
+        batch_size: The number of chunks to fetch per round trip.
     """
-    if isinstance(grid_out, AsyncIOMotorGridOut):
-        if grid_out.metadata is not None:
-            etag = grid_out.metadata.get("sha1")
+    batch_size = 1
+
+    def __init__(
+            self,
+            chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+            file_id: Any,
+            length: int,
+            chunk_size: int,
+            prefetch: int = 0
+    ) -> None:
+        self.chunks = chunks
+        self.file_id = file_id
+        self.size = length
+        self.chunk_size = chunk_size
+        self.prefetch = prefetch
+        self.begin = 0
+        self.end = length
+        self._cursor: Any = None
+        self._batches: deque[asyncio.Future[list[Mapping[str, Any]]]] = \
+            deque()
+        self._buffer: deque[Mapping[str, Any]] = deque()
+        self._fetch_n = 0
+        self._last_n = 0
+        self._next_n = 0
+        self._position = 0
+
+    async def __aenter__(self) -> "GridFSBody":
+        first_n = self.begin // self.chunk_size
+        self._last_n = max(self.end - 1, 0) // self.chunk_size
+        self._next_n = first_n
+        self._position = first_n * self.chunk_size
+        if self.prefetch > 0:
+            self._fetch_n = first_n
+            self._read_ahead()
         else:
-            etag = None
+            self._cursor = self.chunks.find(
+                {
+                    "files_id": self.file_id,
+                    "n": {"$gte": first_n, "$lte": self._last_n}
+                },
+                sort=[("n", 1)],
+                batch_size=self.batch_size
+            )
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type,
+            exc_value: BaseException,
+            tb: TracebackType
+    ) -> None:
+        if self._cursor is not None:
+            await self._cursor.close()
+            self._cursor = None
+        for batch in self._batches:
+            batch.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        self._batches.clear()
+        self._buffer.clear()
+
+    def __aiter__(self) -> "GridFSBody":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._position >= self.end:
+            raise StopAsyncIteration()
+
+        try:
+            chunk = await self._next_chunk()
+        except StopAsyncIteration:
+            raise CorruptGridFile(
+                f"no chunk #{self._next_n} for file {self.file_id!r}"
+            ) from None
+
+        if chunk["n"] != self._next_n:
+            raise CorruptGridFile(
+                f"expected chunk #{self._next_n} for file "
+                f"{self.file_id!r} but got chunk #{chunk['n']}"
+            )
+
+        data = chunk["data"]
+        start = max(self.begin - self._position, 0)
+        stop = min(self.end - self._position, len(data))
+        self._next_n += 1
+        self._position += len(data)
+        return bytes(data[start:stop])
+
+    async def _fetch(self, first_n: int, last_n: int) -> list[Any]:
+        cursor = self.chunks.find(
+            {"files_id": self.file_id, "n": {"$gte": first_n, "$lte": last_n}},
+            sort=[("n", 1)]
+        )
+        return await cursor.to_list(None)
+
+    def _read_ahead(self) -> None:
+        while len(self._batches) < self.prefetch and \
+                self._fetch_n <= self._last_n:
+            last_n = min(self._fetch_n + self.batch_size - 1, self._last_n)
+            self._batches.append(
+                asyncio.ensure_future(self._fetch(self._fetch_n, last_n))
+            )
+            self._fetch_n = last_n + 1
+
+    async def _next_chunk(self) -> Mapping[str, Any]:
+        if self._cursor is not None:
+            return await anext(self._cursor)
+
+        while not self._buffer:
+            if not self._batches:
+                raise StopAsyncIteration()
+            batch = await self._batches.popleft()
+            self._read_ahead()
+            self._buffer.extend(batch)
+        return self._buffer.popleft()
+
+    async def make_conditional(self, begin: int, end: int | None) -> int:
+        """
+        Limits the body to the given byte range.
+
+        Arguments:
+            begin: The first byte of the range. A negative value counts
+                back from the end of the file.
+            end: The byte after the last byte of the range or ``None``
+                for the end of the file.
+        """
+        if begin < 0:
+            begin = max(self.size + begin, 0)
+        self.begin = begin
+        self.end = self.size if end is None else min(self.size, end)
+        if self.begin >= self.end:
+            raise RequestedRangeNotSatisfiable(self.size)
+        return self.size
+
+
+class SharedGridFSBody(GridFSBody):
+    """
+    Streams a GridFS file as a response body, sharing one chunk read
+    with concurrent downloads of the same file.
+
+    Downloads of the whole file join the :class:`Broadcast` that is
+    registered for the file in ``downloads`` while it can still be
+    joined, or start a new one. A download that joins after the first
+    chunks were sent reads them on its own before it follows the
+    broadcast. Range requests read their chunks on their own like
+    :class:`GridFSBody`.
+
+    Arguments:
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        file_id: The ``_id`` of the file document.
+        length: The length of the file in bytes.
+        chunk_size: The chunk size of the file in bytes.
+        downloads: The running broadcasts by file.
+        window: The maximum number of chunks a broadcast buffers.
+    """
+    def __init__(
+            self,
+            chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+            file_id: Any,
+            length: int,
+            chunk_size: int,
+            downloads: dict[Any, Broadcast],
+            window: int = 16
+    ) -> None:
+        super().__init__(chunks, file_id, length, chunk_size)
+        self.downloads = downloads
+        self.window = window
+        self._broadcast: Broadcast | None = None
+        self._reader = 0
+        self._catching_up = False
+
+    @property
+    def key(self) -> tuple[str, Any]:
+        """
+        The key of the file in ``downloads``.
+        """
+        return (self.chunks.full_name, self.file_id)
+
+    async def __aenter__(self) -> "SharedGridFSBody":
+        if self.begin > 0 or self.end < self.size:
+            await super().__aenter__()
+            return self
+
+        key = self.key
+        broadcast = self.downloads.get(key)
+        if broadcast is None or not broadcast.joinable:
+            source = GridFSBody(
+                self.chunks,
+                self.file_id,
+                self.size,
+                self.chunk_size,
+                self.prefetch
+            )
+
+            async def _close() -> None:
+                if self.downloads.get(key) is broadcast:
+                    del self.downloads[key]
+                await source.__aexit__(None, None, None)  # type: ignore
+
+            broadcast = Broadcast(source, self.window, _close)
+            self.downloads[key] = broadcast
+            await source.__aenter__()
+
+        self._broadcast = broadcast
+        self._reader = broadcast.join()
+        missed = broadcast.start(self._reader)
+        if missed > 0:
+            self.end = missed
+            self._catching_up = True
+            await super().__aenter__()
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type,
+            exc_value: BaseException,
+            tb: TracebackType
+    ) -> None:
+        if self._broadcast is not None:
+            broadcast, self._broadcast = self._broadcast, None
+            await broadcast.leave(self._reader)
+        await super().__aexit__(exc_type, exc_value, tb)
+
+    async def __anext__(self) -> bytes:
+        if self._broadcast is None:
+            return await super().__anext__()
+
+        if self._catching_up:
+            try:
+                return await super().__anext__()
+            except StopAsyncIteration:
+                self._catching_up = False
+                await super().__aexit__(None, None, None)  # type: ignore
+
+        data = await self._broadcast.get(self._reader)
+        if data is None:
+            raise StopAsyncIteration()
+        return data
+
+
+class DecodedBody(ResponseBody):
+    """
+    Streams a compressed GridFS file as a decompressed response body.
+
+    This is used for clients that do not accept the content encoding
+    the file is stored with. The decompressed length is not known up
+    front, so the body does not support range requests.
+
+    Arguments:
+        body: The body of the stored file.
+        encoding: The content encoding of the stored file.
+    """
+    def __init__(self, body: GridFSBody, encoding: str) -> None:
+        self.body = body
+        self.encoding = encoding
+        self._decompressor = decompressor(encoding)
+        self._flushed = False
+
+    async def __aenter__(self) -> "DecodedBody":
+        await self.body.__aenter__()
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type,
+            exc_value: BaseException,
+            tb: TracebackType
+    ) -> None:
+        await self.body.__aexit__(exc_type, exc_value, tb)
+
+    def __aiter__(self) -> "DecodedBody":
+        return self
+
+    async def __anext__(self) -> bytes:
+        while not self._flushed:
+            try:
+                data = self._decompressor.decompress(await anext(self.body))
+            except StopAsyncIteration:
+                self._flushed = True
+                data = self._decompressor.flush()
+            if data:
+                return data
+        raise StopAsyncIteration()
+
+
+class MappedBody(ResponseBody):
+    """
+    Streams an in-memory or memory-mapped GridFS file as a response body.
+
+    The file is sent in pieces of ``buffer_size`` bytes, so only the
+    pages that are being sent are read from a mapping and a range set
+    with :meth:`make_conditional` is served without reading the rest.
 
+    Arguments:
+        data: The contents of the file or the mapped file, see
+            :func:`spool_body`.
+
+    Attributes:
+        buffer_size: The number of bytes sent per piece.
+    """
+    buffer_size = 64 * 1024
+
+    def __init__(self, data: bytes | mmap.mmap) -> None:
+        self.data = data
+        self.size = len(data)
+        self.begin = 0
+        self.end = self.size
+        self._position = 0
+
+    async def __aenter__(self) -> "MappedBody":
+        self._position = self.begin
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type,
+            exc_value: BaseException,
+            tb: TracebackType
+    ) -> None:
+        pass
+
+    def __aiter__(self) -> "MappedBody":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._position >= self.end:
+            raise StopAsyncIteration()
+        stop = min(self._position + self.buffer_size, self.end)
+        data = self.data[self._position:stop]
+        self._position = stop
+        return data
+
+    async def make_conditional(self, begin: int, end: int | None) -> int:
+        """
+        Limits the body to the given byte range.
+
+        Arguments:
+            begin: The first byte of the range. A negative value counts
+                back from the end of the file.
+            end: The byte after the last byte of the range or ``None``
+                for the end of the file.
+        """
+        if begin < 0:
+            begin = max(self.size + begin, 0)
+        self.begin = begin
+        self.end = self.size if end is None else min(self.size, end)
+        if self.begin >= self.end:
+            raise RequestedRangeNotSatisfiable(self.size)
+        return self.size
+
+
+async def spool_body(
+        body: ResponseBody,
+        directory: str | None = None
+) -> mmap.mmap:
+    """
+    Writes a response body to an anonymous temporary file and returns
+    a read-only memory map of it.
+
+    The file has no name and is removed by the operating system once
+    the map is garbage collected, so the contents live in the page
+    cache instead of the Python heap. The body must not be empty.
+
+    Arguments:
+        body: The body to spool, usually a :class:`GridFSBody`.
+        directory: The directory of the temporary file, or ``None`` for
+            the default of :mod:`tempfile`.
+    """
+    with tempfile.TemporaryFile(dir=directory) as spool:
+        async with body:
+            async for data in body:
+                await asyncio.to_thread(spool.write, data)
+        spool.flush()
+        return mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ByteRangesBody(ResponseBody):
+    """
+    Streams several byte ranges of a GridFS file as a
+    ``multipart/byteranges`` response body.
+
+    Every range is read with its own :class:`GridFSBody`, so only the
+    chunks that overlap one of the ranges are fetched, or sliced from
+    the data of a :class:`MappedBody`. Overlapping and adjacent ranges
+    are merged into one part.
+
+    Arguments:
+        body: The body of the whole file.
+        ranges: The requested ranges as ``(begin, end)`` pairs, where a
+            negative begin counts back from the end of the file and an
+            end of ``None`` is the end of the file.
+        content_type: The content type of every part.
+    """
+    def __init__(
+            self,
+            body: GridFSBody | MappedBody,
+            ranges: list[tuple[int, int | None]],
+            content_type: str
+    ) -> None:
+        self.body = body
+        self.ranges = _merge_ranges(ranges, body.size)
+        self.content_type = content_type
+        self.boundary = secrets.token_hex(16)
+        self._parts: AsyncGenerator[bytes, None] | None = None
+
+    @property
+    def multipart_type(self) -> str:
+        """
+        The content type of the whole response.
+        """
+        return f"multipart/byteranges; boundary={self.boundary}"
+
+    def _part_header(self, begin: int, end: int) -> bytes:
+        return (
+            f"--{self.boundary}\r\n"
+            f"Content-Type: {self.content_type}\r\n"
+            f"Content-Range: bytes {begin}-{end - 1}/{self.body.size}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+
+    def _closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode("latin-1")
+
+    @property
+    def length(self) -> int:
+        """
+        The length of the response body in bytes.
+        """
+        return sum(
+            len(self._part_header(begin, end)) + end - begin + 2
+            for begin, end in self.ranges
+        ) + len(self._closing())
+
+    async def _iter_parts(self) -> AsyncGenerator[bytes, None]:
+        for begin, end in self.ranges:
+            yield self._part_header(begin, end)
+            part: GridFSBody | MappedBody
+            if isinstance(self.body, MappedBody):
+                part = MappedBody(self.body.data)
+            else:
+                part = GridFSBody(
+                    self.body.chunks,
+                    self.body.file_id,
+                    self.body.size,
+                    self.body.chunk_size,
+                    self.body.prefetch
+                )
+            await part.make_conditional(begin, end)
+            async with part:
+                async for data in part:
+                    yield data
+            yield b"\r\n"
+        yield self._closing()
+
+    async def __aenter__(self) -> "ByteRangesBody":
+        self._parts = self._iter_parts()
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type,
+            exc_value: BaseException,
+            tb: TracebackType
+    ) -> None:
+        if self._parts is not None:
+            await self._parts.aclose()
+            self._parts = None
+
+    def __aiter__(self) -> "ByteRangesBody":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._parts is None:
+            raise StopAsyncIteration()
+        return await anext(self._parts)
+
+
+def _merge_ranges(
+        ranges: list[tuple[int, int | None]],
+        size: int
+) -> list[tuple[int, int]]:
+    """
+    Returns the satisfiable ranges in order with overlapping and
+    adjacent ranges merged.
+
+    Raises :class:`~werkzeug.exceptions.RequestedRangeNotSatisfiable`
+    if none of the ranges can be satisfied.
+    """
+    bounded = []
+    for begin, end in ranges:
+        if begin < 0:
+            begin = max(size + begin, 0)
+        end = size if end is None else min(size, end)
+        if begin < end:
+            bounded.append((begin, end))
+    if not bounded:
+        raise RequestedRangeNotSatisfiable(size)
+
+    bounded.sort()
+    merged = [bounded[0]]
+    for begin, end in bounded[1:]:
+        last_begin, last_end = merged[-1]
+        if begin <= last_end:
+            merged[-1] = (last_begin, max(last_end, end))
+        else:
+            merged.append((begin, end))
+    return merged
+
+
+def _is_multiple_range_request(response: Response) -> bool:
+    """
+    Checks if the current request asks for several byte ranges that
+    can be served for the response.
+    """
+    if request.method not in {"GET", "HEAD"}:
+        return False
+    request_range = request.range
+    if request_range is None or request_range.units != "bytes" or \
+            len(request_range.ranges) < 2:
+        return False
+    return response._is_range_request_processable(  # pylint: disable=W0212
+        request
+    )
+
+
+ARCHIVE_COMPRESSION = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED
+}
+"""The compression methods of :class:`ZipArchiveBody` by name."""
+
+
+class _ArchiveBuffer:
+    """
+    Collects what :class:`zipfile.ZipFile` writes until it is sent.
+    """
+    def __init__(self) -> None:
+        self._data = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._data += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._data)
+        self._data.clear()
+        return data
+
+
+def _zip_date_time(
+        upload_date: datetime | None
+) -> tuple[int, int, int, int, int, int]:
+    if upload_date is None or upload_date.year < 1980:
+        return (1980, 1, 1, 0, 0, 0)
+    return (
+        upload_date.year,
+        upload_date.month,
+        upload_date.day,
+        upload_date.hour,
+        upload_date.minute,
+        upload_date.second
+    )
+
+
+class ZipArchiveBody(ResponseBody):
+    """
+    Streams several GridFS files as a zip archive response body.
+
+    The files are read one chunk at a time and written through
+    :class:`zipfile.ZipFile`, and whatever it writes is sent right
+    away, so the memory use does not grow with the files. The sizes and
+    CRCs follow each file in a data descriptor, and files stored with a
+    content encoding are decompressed into the archive.
+
+    Arguments:
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        documents: The file documents of the files to archive.
+        compression: ``"stored"`` or ``"deflate"``.
+        prefetch: The number of chunk batches read ahead, see
+            :class:`GridFSBody`.
+    """
+    def __init__(
+            self,
+            chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+            documents: Iterable[Mapping[str, Any]],
+            compression: str = "deflate",
+            prefetch: int = 0
+    ) -> None:
+        if compression not in ARCHIVE_COMPRESSION:
+            raise ValueError(
+                f"Unsupported compression {compression!r}, expected one of "
+                f"{', '.join(ARCHIVE_COMPRESSION)}"
+            )
+        self.chunks = chunks
+        self.documents = documents
+        self.compression = compression
+        self.prefetch = prefetch
+        self._entries: AsyncGenerator[bytes, None] | None = None
+
+    async def _iter_archive(self) -> AsyncGenerator[bytes, None]:
+        buffer = _ArchiveBuffer()
+        compress_type = ARCHIVE_COMPRESSION[self.compression]
+        archive = zipfile.ZipFile(buffer, "w", compress_type)
+
+        for document in self.documents:
+            info = zipfile.ZipInfo(
+                document["filename"],
+                _zip_date_time(document.get("uploadDate"))
+            )
+            info.compress_type = compress_type
+            body = GridFSBody(
+                self.chunks,
+                document.get("chunksId", document["_id"]),
+                document["length"],
+                document["chunkSize"],
+                self.prefetch
+            )
+            encoding = get_content_encoding(document)
+            reader: ResponseBody
+            if encoding is None:
+                info.file_size = document["length"]
+                reader = body
+            else:
+                reader = DecodedBody(body, encoding)
+
+            async with reader:
+                with archive.open(
+                    info, "w", force_zip64=encoding is not None
+                ) as member:
+                    async for data in reader:
+                        if compress_type == zipfile.ZIP_DEFLATED and \
+                                len(data) >= HASH_THREAD_THRESHOLD:
+                            await asyncio.to_thread(member.write, data)
+                        else:
+                            member.write(data)
+                        output = buffer.drain()
+                        if output:
+                            yield output
+            yield buffer.drain()
+
+        archive.close()
+        yield buffer.drain()
+
+    async def __aenter__(self) -> "ZipArchiveBody":
+        self._entries = self._iter_archive()
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: type,
+            exc_value: BaseException,
+            tb: TracebackType
+    ) -> None:
+        if self._entries is not None:
+            await self._entries.aclose()
+            self._entries = None
+
+    def __aiter__(self) -> "ZipArchiveBody":
+        return self
+
+    async def __anext__(self) -> bytes:
+        if self._entries is None:
+            raise StopAsyncIteration()
+        return await anext(self._entries)
+
+
+def get_stored_etag(
+        grid_out: AsyncGridOut | AsyncIOMotorGridOut
+) -> str | None:
+    """
+    Returns the etag stored in the GridFS file document.
+
+    This looks for the sha1 sum that we have added during saving
+    the file and falls back to a legacy md5 sum if it exists. The
+    file contents are never read, so ``None`` is returned when the
+    document holds no checksum.
+
+    Arguments:
+        grid_out: An instance of `~gridfs.asynchronous.AsyncGridOut`
+            or `~motor.motor_asyncio.AsyncIOMotorGridOut`.
+    """
+    if isinstance(grid_out, AsyncIOMotorGridOut) and \
+            grid_out.metadata is not None:
+        etag = grid_out.metadata.get("sha1")
         if etag is not None:
             return etag
-        else:
-            pos = grid_out.tell()
-            raw = await grid_out.read()
-            grid_out.seek(pos)
-            return hashlib.sha1(raw).hexdigest()
+
+    try:
+        return grid_out.sha1
+    except AttributeError:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return grid_out.md5
+
+
+def _sha1_update(
+        metadata: Mapping[str, Any] | None,
+        etag: str,
+        in_metadata: bool
+) -> dict[str, Any]:
+    """
+    Returns the update that stores a sha1 in a GridFS file document.
+    """
+    if not in_metadata:
+        return {"$set": {"sha1": etag}}
+    if metadata is None:
+        return {"$set": {"metadata": {"sha1": etag}}}
+    return {"$set": {"metadata.sha1": etag}}
+
+
+def with_stored_etag(
+        document: Mapping[str, Any],
+        etag: str,
+        in_metadata: bool
+) -> Mapping[str, Any]:
+    """
+    Returns a copy of a GridFS file document with a sha1 stored like
+    :func:`generate_etag` stores it.
+
+    Arguments:
+        document: The file document.
+        etag: The sha1 of the file.
+        in_metadata: Store the sha1 as ``metadata.sha1`` like Motor
+            instead of ``sha1``.
+    """
+    if not in_metadata:
+        return {**document, "sha1": etag}
+    metadata = document.get("metadata") or {}
+    return {**document, "metadata": {**metadata, "sha1": etag}}
+
+
+async def generate_etag(
+        grid_out: AsyncGridOut | AsyncIOMotorGridOut,
+        files: AsyncCollection[Any] | AsyncIOMotorCollection | None = None
+) -> str:
+    """
+    Generates etag for GridFS.
+
+    GridFS does not manage its own checksum. Try to use the checksum
+    stored in the file document with :func:`get_stored_etag`.
+    Otherwise, compute the sha1 sum directly one chunk at a time.
+
+    If the ``files`` collection is given, the computed sha1 is stored
+    in the file document, so it is only computed once. It is stored as
+    ``sha1`` for PyMongo and as ``metadata.sha1`` for Motor.
+
+    Arguments:
+        grid_out: An instance of `~gridfs.asynchronous.AsyncGridOut`
+            or `~motor.motor_asyncio.AsyncIOMotorGridOut`.
+        files: The ``files`` collection of the GridFS bucket.
+    """
+    etag = get_stored_etag(grid_out)
+    if etag is not None:
+        return etag
+
+    is_motor = isinstance(grid_out, AsyncIOMotorGridOut)
+    pos = grid_out.tell()
+    if is_motor:
+        grid_out.seek(0)
     else:
-        try:
-            return grid_out.sha1
-        except AttributeError:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                etag = grid_out.md5
-            if etag is None:
-                pos = grid_out.tell()
-                raw = await grid_out.read()
-                await grid_out.seek(pos)
-                return hashlib.sha1(raw).hexdigest()
-            return etag
+        await grid_out.seek(0)
+
+    digest = hashlib.sha1()
+    while chunk := await grid_out.readchunk():
+        await update_hash(digest, chunk)
+    etag = digest.hexdigest()
+
+    if is_motor:
+        grid_out.seek(pos)
+    else:
+        await grid_out.seek(pos)
+
+    if files is not None:
+        await files.update_one(
+            {"_id": grid_out._id},  # pylint: disable=W0212
+            _sha1_update(grid_out.metadata, etag, is_motor)
+        )
+    return etag
+
+
+async def backfill_etags(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        in_metadata: bool = False
+) -> int:
+    """
+    Stores a sha1 in every GridFS file document without a checksum.
+
+    Each file is streamed through the hash with :class:`GridFSBody`.
+    Returns the number of file documents that were updated.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        in_metadata: Store the sha1 as ``metadata.sha1``, which is
+            the layout used by Motor.
+    """
+    query: dict[str, Any] = {
+        "sha1": {"$exists": False}, "md5": {"$exists": False}
+    }
+    if in_metadata:
+        query["metadata.sha1"] = {"$exists": False}
+
+    count = 0
+    async for document in files.find(query):
+        digest = hashlib.sha1()
+        body = GridFSBody(
+            chunks,
+            document["_id"],
+            document["length"],
+            document["chunkSize"]
+        )
+        async with body:
+            async for data in body:
+                await update_hash(digest, data)
+
+        await files.update_one(
+            {"_id": document["_id"]},
+            _sha1_update(
+                document.get("metadata"), digest.hexdigest(), in_metadata
+            )
+        )
+        count += 1
+    return count
+
+
+async def create_gridfs_indexes(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection
+) -> None:
+    """
+    Creates the indexes of a GridFS bucket.
+
+    These are the indexes the drivers check for on the first write of
+    every file, so creating them up front keeps index builds out of the
+    request path.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+    """
+    await files.create_index(
+        [("filename", ASCENDING), ("uploadDate", ASCENDING)]
+    )
+    await chunks.create_index(
+        [("files_id", ASCENDING), ("n", ASCENDING)], unique=True
+    )
+
+
+async def upload_gridfs_chunks(
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        files_id: Any,
+        file: GridFsFileWrapper,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        batch_size: int = 16,
+        max_batches: int = 4
+) -> int:
+    """
+    Writes the chunks of a file to GridFS with pipelined inserts.
+
+    The chunks are inserted ``batch_size`` at a time with
+    ``insert_many`` and up to ``max_batches`` batches are in flight
+    while the next ones are read, so at most about
+    ``batch_size * max_batches`` chunks are held in memory. If the
+    upload fails, the written chunks are deleted. Returns the length
+    of the file.
+
+    Arguments:
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        files_id: The ``files_id`` of the chunks.
+        file: The file to upload.
+        chunk_size: The chunk size of the file in bytes.
+        batch_size: The number of chunks inserted per round trip.
+        max_batches: The maximum number of batches in flight.
+    """
+    pending: set[asyncio.Future[Any]] = set()
+    batch: list[dict[str, Any]] = []
+    n = 0
+    length = 0
+
+    try:
+        async for piece in file.chunks(chunk_size):
+            batch.append({"files_id": files_id, "n": n, "data": Binary(piece)})
+            n += 1
+            length += len(piece)
+            if len(batch) < batch_size:
+                continue
+
+            if len(pending) >= max_batches:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    task.result()
+            pending.add(asyncio.ensure_future(chunks.insert_many(batch)))
+            batch = []
+
+        if batch:
+            pending.add(asyncio.ensure_future(chunks.insert_many(batch)))
+        await asyncio.gather(*pending)
+    except BaseException:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await chunks.delete_many({"files_id": files_id})
+        raise
+
+    return length
+
+
+async def upload_gridfs(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        file: GridFsFileWrapper,
+        document: dict[str, Any],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        batch_size: int = 16,
+        max_batches: int = 4
+) -> Any:
+    """
+    Uploads a file to GridFS with pipelined chunk inserts.
+
+    The chunks are written with :func:`upload_gridfs_chunks` and the
+    file document is inserted after every chunk is written, so readers
+    never see a partial file. Return the ``_id`` of the file document.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        file: The file to upload.
+        document: The fields of the file document, such as the
+            ``filename``. The ``length``, ``chunkSize``, ``uploadDate``
+            and ``sha1`` are added.
+        chunk_size: The chunk size of the file in bytes.
+        batch_size: The number of chunks inserted per round trip.
+        max_batches: The maximum number of batches in flight.
+    """
+    file_id = document.setdefault("_id", ObjectId())
+    length = await upload_gridfs_chunks(
+        chunks, file_id, file, chunk_size, batch_size, max_batches
+    )
+
+    document.update(
+        length=length,
+        chunkSize=chunk_size,
+        uploadDate=datetime.now(timezone.utc),
+        sha1=file.hash.hexdigest()
+    )
+    await files.insert_one(document)
+    return file_id
+
+
+async def hash_seekable(
+        fileobj: FileSource, chunk_size: int
+) -> str | None:
+    """
+    Returns the sha1 of a seekable file and rewinds it, or ``None`` if
+    the file cannot be read twice.
+
+    Arguments:
+        fileobj: The file to hash.
+        chunk_size: The number of bytes to read at a time.
+    """
+    if hasattr(fileobj, "__aiter__") or \
+            inspect.iscoroutinefunction(getattr(fileobj, "read", None)):
+        return None
+    seekable = getattr(fileobj, "seekable", None)
+    if seekable is None or not seekable():
+        return None
+
+    position = fileobj.tell()  # type: ignore[union-attr]
+    digest = hashlib.sha1()
+    while data := fileobj.read(chunk_size):  # type: ignore[union-attr]
+        await update_hash(digest, data)
+    fileobj.seek(position)  # type: ignore[union-attr]
+    return digest.hexdigest()
+
+
+async def release_blob(
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        blobs: AsyncCollection[Any] | AsyncIOMotorCollection,
+        digest: str
+) -> None:
+    """
+    Drops a reference to a shared chunk set and deletes its chunks
+    when no file refers to it anymore.
+
+    Arguments:
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        blobs: The ``blobs`` collection of the GridFS bucket.
+        digest: The sha1 of the shared chunk set.
+    """
+    blob = await blobs.find_one_and_update(
+        {"_id": digest},
+        {"$inc": {"refs": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if blob is None or blob["refs"] > 0:
+        return
+
+    # A concurrent upload may have taken a new reference in between.
+    result = await blobs.delete_one({"_id": digest, "refs": {"$lte": 0}})
+    if result.deleted_count:
+        await chunks.delete_many({"files_id": blob["chunksId"]})
+
+
+async def upload_deduplicated(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        blobs: AsyncCollection[Any] | AsyncIOMotorCollection,
+        file: GridFsFileWrapper,
+        document: dict[str, Any],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        batch_size: int = 16,
+        max_batches: int = 4
+) -> Any:
+    """
+    Uploads a file to GridFS, sharing the chunks of identical files.
+
+    The chunks of every distinct content are stored once and the file
+    documents refer to them with ``chunksId``. The ``blobs`` collection
+    maps each sha1 to its chunk set and counts the file documents that
+    refer to it, see :func:`release_blob`.
+
+    Seekable files are hashed before anything is written, so a
+    duplicate only costs a file document. Other sources are written
+    first and their chunks are deleted again if the content turns out
+    to be stored already. Return the ``_id`` of the file document.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        blobs: The ``blobs`` collection of the GridFS bucket.
+        file: The file to upload.
+        document: The fields of the file document, such as the
+            ``filename``. The ``length``, ``chunkSize``, ``uploadDate``,
+            ``sha1`` and ``chunksId`` are added.
+        chunk_size: The chunk size of new chunk sets in bytes.
+        batch_size: The number of chunks inserted per round trip.
+        max_batches: The maximum number of batches in flight.
+    """
+    file_id = document.setdefault("_id", ObjectId())
+
+    blob = None
+    digest = None
+    if file.encoding is None:
+        digest = await hash_seekable(file.file, chunk_size)
+    if digest is not None:
+        blob = await blobs.find_one_and_update(
+            {"_id": digest, "refs": {"$gt": 0}},
+            {"$inc": {"refs": 1}}
+        )
+
+    if blob is None:
+        chunks_id = ObjectId()
+        length = await upload_gridfs_chunks(
+            chunks, chunks_id, file, chunk_size, batch_size, max_batches
+        )
+        digest = file.hash.hexdigest()
+        blob = await blobs.find_one_and_update(
+            {"_id": digest},
+            {
+                "$inc": {"refs": 1},
+                "$setOnInsert": {
+                    "chunksId": chunks_id,
+                    "length": length,
+                    "chunkSize": chunk_size
+                }
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if blob["chunksId"] != chunks_id:
+            await chunks.delete_many({"files_id": chunks_id})
+
+    document.update(
+        length=blob["length"],
+        chunkSize=blob["chunkSize"],
+        uploadDate=datetime.now(timezone.utc),
+        sha1=digest,
+        chunksId=blob["chunksId"]
+    )
+    try:
+        await files.insert_one(document)
+    except BaseException:
+        await release_blob(chunks, blobs, digest)
+        raise
+    return file_id
+
+
+async def delete_gridfs(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        blobs: AsyncCollection[Any] | AsyncIOMotorCollection,
+        file_id: Any
+) -> Mapping[str, Any] | None:
+    """
+    Deletes a GridFS file.
+
+    The chunks of a file that shares them with other files are only
+    deleted with the last reference. Returns the deleted file document
+    or ``None`` if there is no such file.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        blobs: The ``blobs`` collection of the GridFS bucket.
+        file_id: The ``_id`` of the file document.
+    """
+    document = await files.find_one_and_delete({"_id": file_id})
+    if document is not None and "chunksId" in document:
+        await release_blob(chunks, blobs, document["sha1"])
+    else:
+        await chunks.delete_many({"files_id": file_id})
+    return document
+
+
+async def get_file_document(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        filename: str,
+        version: int = -1
+) -> Mapping[str, Any] | None:
+    """
+    Finds the file document of a version of a GridFS file.
+
+    The versions are numbered like
+    :meth:`~gridfs.asynchronous.AsyncGridFS.get_version`, so ``-1`` is
+    the most recent upload and ``0`` the first one. Returns ``None`` if
+    no such version exists.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        filename: The filename of the file.
+        version: The version of the file.
+    """
+    if version < 0:
+        skip = abs(version) - 1
+        direction = DESCENDING
+    else:
+        skip = version
+        direction = ASCENDING
+
+    cursor = files.find(
+        {"filename": filename},
+        sort=[("uploadDate", direction)],
+        skip=skip,
+        limit=-1
+    )
+    async for document in cursor:
+        return document
+    return None
+
+
+async def find_latest_documents(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        query: Mapping[str, Any]
+) -> list[Mapping[str, Any]]:
+    """
+    Finds the file documents of the most recent version of every
+    GridFS file that matches a query, ordered by filename.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        query: The query on the file documents.
+    """
+    documents: list[Mapping[str, Any]] = []
+    cursor = files.find(
+        query, sort=[("filename", ASCENDING), ("uploadDate", DESCENDING)]
+    )
+    async for document in cursor:
+        if not documents or \
+                documents[-1]["filename"] != document["filename"]:
+            documents.append(document)
+    return documents
+
+
+def is_not_modified(
+        etag: str | None,
+        last_modified: datetime | None
+) -> bool:
+    """
+    Checks if the current request can be answered with a 304.
+
+    Only the conditional request headers and the values from the
+    GridFS file document are used, so no chunks need to be read to
+    answer a revalidation. A request that sends ``If-None-Match``
+    is never answered here without an etag.
+
+    Arguments:
+        etag: The etag stored in the file document, if any.
+        last_modified: The upload date of the file.
+    """
+    if request.method not in {"GET", "HEAD"}:
+        return False
+    if "If-Match" in request.headers:
+        return False
+    if etag is None and "If-None-Match" in request.headers:
+        return False
+
+    return not is_resource_modified(
+        http_range=request.headers.get("Range"),
+        http_if_range=request.headers.get("If-Range"),
+        http_if_modified_since=request.headers.get("If-Modified-Since"),
+        http_if_none_match=request.headers.get("If-None-Match"),
+        http_if_match=request.headers.get("If-Match"),
+        etag=etag,
+        last_modified=last_modified,
+        ignore_if_range=True
+    )
+
+
+def get_content_encoding(document: Mapping[str, Any]) -> str | None:
+    """
+    Returns the encoding a GridFS file is compressed with, or ``None``
+    if it is stored uncompressed.
+
+    This is ``contentEncoding`` in files saved with PyMongo and
+    ``metadata.content_encoding`` in files saved with Motor.
+
+    Arguments:
+        document: The GridFS file document.
+    """
+    metadata = document.get("metadata") or {}
+    return document.get("contentEncoding") or \
+        metadata.get("content_encoding")
+
+
+def accepts_encoding(encoding: str) -> bool:
+    """
+    Checks if the current request accepts a content encoding.
+
+    Arguments:
+        encoding: The content encoding.
+    """
+    return request.accept_encodings.quality(encoding) > 0
 
 
 async def send_gridfs(
-        file: BytesIO,
+        file: BytesIO | ResponseBody,
         content_length: int,
         mimetype: str | None = None,
         as_attachment: bool = False,
@@ -90,16 +1444,20 @@ async def send_gridfs(
         add_etags: bool = True,
         etag: str | None = None,
         cache_timeout: int | None = None,
-        last_modified: datetime | None = None
+        last_modified: datetime | None = None,
+        content_encoding: str | None = None
 ) -> Response:
     """
     Return a Response to send a GridFS file.
 
     This is a copy of `~quart.helpers.send_file` with
-    changes for GridFS.
+    changes for GridFS. A request for several ranges is answered with
+    a streamed ``multipart/byteranges`` body, see
+    :class:`ByteRangesBody`.
 
     Arguments:
-        file: The bytes to send from GridFS.
+        file: The bytes to send from GridFS, either in memory, as a
+            :class:`MappedBody` or as a streaming :class:`GridFSBody`.
         content_length: The file content length from GridFS.
         mimetype: Mimetype to use, by default it will be guessed or
             revert to the DEFAULT_MIMETYPE.
@@ -111,9 +1469,28 @@ async def send_gridfs(
         etag: The etag to add to the response.
         last_modified: Used to override the last modified value.
         cache_timeout: Time in seconds for the response to be cached.
+        content_encoding: The encoding the file is compressed with. The
+            file is sent as it is if the client accepts the encoding and
+            decompressed while it is sent otherwise.
     """
+    length: int | None = content_length
+    encoded = content_encoding is not None
+    if content_encoding is not None and not accepts_encoding(
+        content_encoding
+    ):
+        if not isinstance(file, GridFSBody):
+            raise TypeError("Only a GridFSBody can be decompressed")
+        file = DecodedBody(file, content_encoding)
+        content_encoding = None
+        length = None
+        if etag is not None:
+            etag = f"{etag}-identity"
+
     file_body: ResponseBody
-    file_body = current_app.response_class.io_body_class(file)
+    if isinstance(file, ResponseBody):
+        file_body = file
+    else:
+        file_body = MappedBody(file.getvalue())
 
     if mimetype is None and attachment_filename is not None:
         mimetype = guess_type(attachment_filename)[0] or DEFAULT_MIMETYPE
@@ -125,7 +1502,12 @@ async def send_gridfs(
         )
 
     response = current_app.response_class(file_body, mimetype=mimetype)
-    response.content_length = content_length
+    if length is not None:
+        response.content_length = length
+    if content_encoding is not None:
+        response.content_encoding = content_encoding
+    if encoded:
+        response.vary.add("Accept-Encoding")
 
     if as_attachment:
         response.headers.add(
@@ -144,7 +1526,75 @@ async def send_gridfs(
     if add_etags and etag is not None:
         response.set_etag(etag)
 
-    await response.make_conditional(
-        request, accept_ranges=True, complete_length=file.getbuffer().nbytes
+    if isinstance(file_body, (GridFSBody, MappedBody)) and \
+            _is_multiple_range_request(response):
+        assert request.range is not None
+        ranges = ByteRangesBody(
+            file_body,
+            request.range.ranges,
+            response.content_type or mimetype
+        )
+        response.response = ranges
+        response.content_type = ranges.multipart_type
+        response.content_length = ranges.length
+        response.headers["Accept-Ranges"] = "bytes"
+        response.status_code = 206
+    else:
+        await response.make_conditional(
+            request, accept_ranges=True, complete_length=length
+        )
+
+    # A HEAD response only needs the headers, so the file is never read.
+    if request.method == "HEAD":
+        response.response = DataBody(b"")
+    return response
+
+
+async def send_cached_gridfs(
+        cached: CachedFile,
+        cache_timeout: int | None = None
+) -> Response:
+    """
+    Return a Response to send a GridFS file from the
+    :class:`~quart_mongo.cache.GridFSCache` with a :class:`MappedBody`,
+    which serves spooled files from their memory map.
+
+    Arguments:
+        cached: The cached file.
+        cache_timeout: Time in seconds for the response to be cached.
+    """
+    return await send_gridfs(
+        MappedBody(cached.data),
+        len(cached.data),
+        mimetype=cached.content_type,
+        as_attachment=True,
+        attachment_filename=cached.filename,
+        add_etags=True,
+        etag=cached.etag,
+        cache_timeout=cache_timeout,
+        last_modified=cached.upload_date
+    )
+
+
+def send_gridfs_archive(
+        body: ZipArchiveBody,
+        attachment_filename: str = "archive.zip"
+) -> Response:
+    """
+    Return a Response to send a :class:`ZipArchiveBody` as an
+    attachment.
+
+    The length of the archive is not known up front, so the response
+    is sent chunked and does not support range requests.
+
+    Arguments:
+        body: The archive to send.
+        attachment_filename: The filename of the archive.
+    """
+    response = current_app.response_class(body, mimetype="application/zip")
+    response.headers.add(
+        "Content-Disposition", "attachment", filename=attachment_filename
     )
+    if request.method == "HEAD":
+        response.response = DataBody(b"")
     return response
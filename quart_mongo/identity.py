@@ -0,0 +1,222 @@
+"""
+quart_mongo.identity
+"""
+from typing import Any, Callable, Coroutine, Dict, Hashable, Mapping, Tuple
+
+from quart import g, has_app_context
+
+
+IDENTITY_MAP_KEY = "_quart_mongo_identity_map"
+"""The attribute of :data:`~quart.g` that holds the identity map."""
+
+WRITE_METHODS = (
+    "insert_one",
+    "insert_many",
+    "replace_one",
+    "update_one",
+    "update_many",
+    "delete_one",
+    "delete_many",
+    "find_one_and_delete",
+    "find_one_and_replace",
+    "find_one_and_update",
+    "bulk_write",
+    "drop",
+    "rename"
+)
+"""The collection methods that invalidate the identity map."""
+
+_MISSING = object()
+
+
+class IdentityMap:
+    """
+    The documents found by ``_id`` during a request.
+
+    Documents are kept by collection namespace and ``_id``, and the same
+    document object is returned for every lookup, so changes made to it
+    in the request are seen by later lookups. Documents that were not
+    found are kept as ``None``.
+    """
+    def __init__(self) -> None:
+        self._documents: Dict[Tuple[str, type, Hashable], Any] = {}
+        self._versions: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def version(self, namespace: str) -> int:
+        """
+        Returns the number of times the documents of a collection were
+        dropped, which is read before a lookup and given to :meth:`put`.
+
+        Arguments:
+            namespace: The full name of the collection.
+        """
+        return self._versions.get(namespace, 0)
+
+    def get(
+            self, namespace: str, document_id: Hashable,
+            default: Any = _MISSING
+    ) -> Any:
+        """
+        Returns the document of an ``_id``, ``None`` if it was not found,
+        or ``default`` if it was not looked up yet.
+
+        Arguments:
+            namespace: The full name of the collection.
+            document_id: The ``_id`` of the document.
+            default: The value returned for an ``_id`` that was not
+                looked up yet. Defaults to a private sentinel.
+        """
+        return self._documents.get(
+            (namespace, type(document_id), document_id), default
+        )
+
+    def put(
+            self, namespace: str, document_id: Hashable, document: Any,
+            version: int
+    ) -> None:
+        """
+        Keeps the document of an ``_id``, unless the documents of the
+        collection were dropped by a write during the lookup.
+
+        Arguments:
+            namespace: The full name of the collection.
+            document_id: The ``_id`` of the document.
+            document: The document, or ``None`` if it was not found.
+            version: The :meth:`version` of the collection before the
+                lookup.
+        """
+        if version != self.version(namespace):
+            return
+        self._documents[
+            (namespace, type(document_id), document_id)
+        ] = document
+
+    def forget(self, namespace: str) -> None:
+        """
+        Drops the documents of a collection.
+
+        Arguments:
+            namespace: The full name of the collection.
+        """
+        self._versions[namespace] = self.version(namespace) + 1
+        for key in [key for key in self._documents if key[0] == namespace]:
+            del self._documents[key]
+
+
+async def begin_identity_map() -> None:
+    """
+    Starts an identity map on :data:`~quart.g` for the current request.
+    """
+    if IDENTITY_MAP_KEY not in g:
+        setattr(g, IDENTITY_MAP_KEY, IdentityMap())
+
+
+async def end_identity_map(*_: Any) -> None:
+    """
+    Drops the identity map of the current request.
+    """
+    g.pop(IDENTITY_MAP_KEY, None)
+
+
+def current_identity_map() -> IdentityMap | None:
+    """
+    Returns the identity map of the current request, or ``None`` outside
+    of a request or if the identity map is disabled.
+    """
+    if not has_app_context():
+        return None
+    return g.get(IDENTITY_MAP_KEY)
+
+
+def _lookup_id(filter: Any, args: Tuple[Any, ...],  # pylint: disable=W0622
+               kwargs: Mapping[str, Any]) -> Any:
+    """
+    Returns the ``_id`` a ``find_one`` call looks up, or ``_MISSING`` if
+    the call does more than find a document by ``_id``.
+    """
+    if args or kwargs or filter is None:
+        return _MISSING
+    if isinstance(filter, Mapping):
+        if list(filter) != ["_id"]:
+            return _MISSING
+        filter = filter["_id"]
+    try:
+        hash(filter)
+    except TypeError:
+        return _MISSING
+    return filter
+
+
+def _invalidating(name: str) -> Callable[..., Coroutine[Any, Any, Any]]:
+    async def write(self: Any, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await getattr(
+                super(IdentityMapMixin, self), name
+            )(*args, **kwargs)
+        finally:
+            identity_map = current_identity_map()
+            if identity_map is not None:
+                identity_map.forget(self.full_name)
+
+    write.__name__ = name
+    write.__qualname__ = f"IdentityMapMixin.{name}"
+    write.__doc__ = f"""
+        Like ``{name}`` of the driver, and drops the documents of the
+        collection from the identity map of the request.
+        """
+    return write
+
+
+class IdentityMapMixin:
+    """
+    Memoizes ``find_one`` by ``_id`` in the identity map of the request.
+
+    Only calls with a filter on ``_id`` alone and no other arguments are
+    memoized. The documents of the collection are dropped from the
+    identity map after any write through the methods of
+    :data:`WRITE_METHODS`, while writes made otherwise are not seen until
+    the next request.
+    """
+    async def find_one(
+            self, filter: Any = None,  # pylint: disable=W0622
+            *args: Any, **kwargs: Any
+    ) -> Any:
+        """
+        Like ``find_one`` of the driver, and memoized in the identity map
+        of the request when looking up a document by ``_id``.
+        """
+        identity_map = current_identity_map()
+        document_id = _lookup_id(filter, args, kwargs)
+        if identity_map is None or document_id is _MISSING:
+            return await super().find_one(  # type: ignore[misc]
+                filter, *args, **kwargs
+            )
+
+        namespace: str = self.full_name  # type: ignore[attr-defined]
+        document = identity_map.get(namespace, document_id)
+        if document is _MISSING:
+            version = identity_map.version(namespace)
+            document = await super().find_one(  # type: ignore[misc]
+                filter
+            )
+            identity_map.put(namespace, document_id, document, version)
+        return document
+
+
+for _name in WRITE_METHODS:
+    setattr(IdentityMapMixin, _name, _invalidating(_name))
+del _name
+
+
+__all__ = (
+    "IDENTITY_MAP_KEY",
+    "IdentityMap",
+    "IdentityMapMixin",
+    "WRITE_METHODS",
+    "begin_identity_map",
+    "current_identity_map",
+    "end_identity_map"
+)
@@ -0,0 +1,161 @@
+"""
+quart_mongo.loader
+"""
+import asyncio
+from typing import Any, Dict, Hashable, Iterable, List, Set
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.asynchronous.collection import AsyncCollection
+from quart import g, has_app_context
+
+from .identity import current_identity_map
+
+
+LOADERS_KEY = "_quart_mongo_loaders"
+"""The attribute of :data:`~quart.g` that holds the loaders."""
+
+_MISSING = object()
+
+
+class DocumentLoader:
+    """
+    Batches the lookups of documents by ``_id``.
+
+    The ``_id`` values passed to :meth:`load` in the same turn of the
+    event loop are found with a single ``$in`` query, so concurrent
+    lookups cost one round trip instead of one each. Every caller gets
+    its own document, or ``None`` if there is none.
+
+    If the identity map of the request is enabled, documents it holds
+    are returned without a query and the found documents are added to
+    it.
+
+    Arguments:
+        collection: The collection of the documents.
+        max_batch_size: The largest number of ``_id`` values in one
+            query.
+    """
+    def __init__(
+            self,
+            collection: AsyncCollection[Any] | AsyncIOMotorCollection,
+            max_batch_size: int = 1000
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("'max_batch_size' must be at least 1")
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Hashable, asyncio.Future[Any]] = {}
+        self._tasks: Set[asyncio.Task[None]] = set()
+
+    def load(self, document_id: Hashable) -> asyncio.Future[Any]:
+        """
+        Returns a future of the document with an ``_id``, which must be
+        hashable. Every caller gets its own future, so cancelling one
+        does not cancel the lookup for the others.
+
+        Arguments:
+            document_id: The ``_id`` of the document.
+        """
+        loop = asyncio.get_running_loop()
+        identity_map = current_identity_map()
+        if identity_map is not None:
+            document = identity_map.get(
+                self.collection.full_name, document_id, _MISSING
+            )
+            if document is not _MISSING:
+                future = loop.create_future()
+                future.set_result(document)
+                return future
+
+        future = self._pending.get(document_id)
+        if future is None:
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[document_id] = loop.create_future()
+        return asyncio.shield(future)
+
+    async def load_many(
+            self, document_ids: Iterable[Hashable]
+    ) -> List[Any]:
+        """
+        Returns the documents with some ``_id`` values, in the same order
+        and with ``None`` for the missing ones.
+
+        Arguments:
+            document_ids: The ``_id`` values of the documents.
+        """
+        return list(await asyncio.gather(
+            *[self.load(document_id) for document_id in document_ids]
+        ))
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch_size):
+            batch = {
+                key: pending[key]
+                for key in keys[start:start + self.max_batch_size]
+            }
+            task = asyncio.create_task(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(
+            self, batch: Dict[Hashable, asyncio.Future[Any]]
+    ) -> None:
+        namespace = self.collection.full_name
+        identity_map = current_identity_map()
+        version = identity_map.version(namespace) \
+            if identity_map is not None else 0
+
+        found: Dict[Hashable, Any] = {}
+        try:
+            async for document in self.collection.find(
+                {"_id": {"$in": list(batch)}}
+            ):
+                found[document["_id"]] = document
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as error:  # pylint: disable=W0718
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for key, future in batch.items():
+            document = found.get(key)
+            if identity_map is not None:
+                identity_map.put(namespace, key, document, version)
+            if not future.done():
+                future.set_result(document)
+
+
+def get_loader(
+        collection: AsyncCollection[Any] | AsyncIOMotorCollection
+) -> DocumentLoader:
+    """
+    Returns the loader of a collection for the current request.
+
+    Every caller in a request shares the loader, so their lookups are
+    batched together. Outside of a request a new loader is returned.
+
+    Arguments:
+        collection: The collection of the documents.
+    """
+    if not has_app_context():
+        return DocumentLoader(collection)
+
+    loaders: Dict[str, DocumentLoader] = g.setdefault(LOADERS_KEY, {})
+    loader = loaders.get(collection.full_name)
+    if loader is None or loader.collection is not collection:
+        loader = loaders[collection.full_name] = DocumentLoader(collection)
+    return loader
+
+
+__all__ = (
+    "DocumentLoader",
+    "LOADERS_KEY",
+    "get_loader"
+)
@@ -0,0 +1,187 @@
+"""
+quart_mongo.maintenance
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING
+from pymongo.asynchronous.collection import AsyncCollection
+
+from .helpers import delete_gridfs
+
+
+class Throttle:
+    """
+    Spaces out batches of background work so they only use a share of
+    the time.
+
+    After each batch, :meth:`pause` sleeps in proportion to how long
+    the batch took, so the work slows down by itself when MongoDB is
+    busy with other requests and takes longer to answer.
+
+    Arguments:
+        duty: The share of the time spent working, between ``0`` and
+            ``1``. ``1`` never sleeps.
+    """
+    def __init__(self, duty: float) -> None:
+        self.duty = min(max(duty, 0.01), 1.0)
+        self._started = asyncio.get_running_loop().time()
+
+    async def pause(self) -> None:
+        """
+        Sleeps after a batch of work.
+        """
+        loop = asyncio.get_running_loop()
+        elapsed = loop.time() - self._started
+        await asyncio.sleep(elapsed * (1 - self.duty) / self.duty)
+        self._started = loop.time()
+
+
+async def _delete_orphans(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        blobs: AsyncCollection[Any] | AsyncIOMotorCollection,
+        ids: List[Any]
+) -> int:
+    live = set()
+    for owners, field in ((files, "_id"), (uploads, "_id"),
+                          (blobs, "chunksId")):
+        async for document in owners.find(
+            {field: {"$in": ids}}, projection=[field]
+        ):
+            live.add(document[field])
+
+    orphans = [files_id for files_id in ids if files_id not in live]
+    if not orphans:
+        return 0
+    result = await chunks.delete_many({"files_id": {"$in": orphans}})
+    return result.deleted_count
+
+
+async def sweep_orphan_chunks(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        blobs: AsyncCollection[Any] | AsyncIOMotorCollection,
+        grace: float = 3600,
+        batch_size: int = 500,
+        duty: float = 0.1
+) -> int:
+    """
+    Deletes the chunks that belong to no GridFS file. Returns the
+    number of deleted chunks.
+
+    Interrupted uploads leave chunks without a file document behind.
+    Only the first chunk of each file is read, from the index and in
+    batches, and the chunks of a file are kept if it belongs to a
+    file, a resumable upload or a deduplicated blob. Files are written
+    chunks first, so only chunks with an ``ObjectId`` older than
+    ``grace`` seconds are deleted, which must be longer than the
+    slowest upload.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        uploads: The ``uploads`` collection of the GridFS bucket.
+        blobs: The ``blobs`` collection of the GridFS bucket.
+        grace: The minimum age in seconds of deleted chunks.
+        batch_size: The number of files checked at once.
+        duty: The share of the time spent sweeping, see
+            :class:`Throttle`.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace)
+    throttle = Throttle(duty)
+    deleted = 0
+    batch: List[Any] = []
+
+    cursor = chunks.find(
+        {"files_id": {"$lt": ObjectId.from_datetime(cutoff)}, "n": 0},
+        projection={"_id": False, "files_id": True},
+        sort=[("files_id", ASCENDING), ("n", ASCENDING)],
+        batch_size=batch_size
+    )
+    try:
+        async for chunk in cursor:
+            batch.append(chunk["files_id"])
+            if len(batch) >= batch_size:
+                deleted += await _delete_orphans(
+                    files, chunks, uploads, blobs, batch
+                )
+                batch = []
+                await throttle.pause()
+    finally:
+        await cursor.close()
+
+    if batch:
+        deleted += await _delete_orphans(files, chunks, uploads, blobs, batch)
+    return deleted
+
+
+async def prune_revisions(
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        blobs: AsyncCollection[Any] | AsyncIOMotorCollection,
+        keep: int,
+        batch_size: int = 500,
+        duty: float = 0.1
+) -> Dict[str, int]:
+    """
+    Deletes all but the newest revisions of every GridFS file. Returns
+    the number of deleted revisions by filename.
+
+    The file documents are read in ``filename`` and ``uploadDate``
+    order from the index, and revisions are deleted like
+    :func:`~quart_mongo.helpers.delete_gridfs` does.
+
+    Arguments:
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        blobs: The ``blobs`` collection of the GridFS bucket.
+        keep: The number of revisions to keep per filename.
+        batch_size: The number of file documents read between pauses.
+        duty: The share of the time spent pruning, see
+            :class:`Throttle`.
+    """
+    if keep < 1:
+        raise ValueError("At least one revision must be kept")
+
+    throttle = Throttle(duty)
+    pruned: Dict[str, int] = {}
+    filename: Any = None
+    revision = 0
+    read = 0
+
+    cursor = files.find(
+        {},
+        projection=["filename"],
+        sort=[("filename", DESCENDING), ("uploadDate", DESCENDING)]
+    )
+    try:
+        async for document in cursor:
+            if read and document.get("filename") == filename:
+                revision += 1
+            else:
+                filename = document.get("filename")
+                revision = 0
+            if revision >= keep and await delete_gridfs(
+                files, chunks, blobs, document["_id"]
+            ) is not None:
+                pruned[filename] = pruned.get(filename, 0) + 1
+            read += 1
+            if read % batch_size == 0:
+                await throttle.pause()
+    finally:
+        await cursor.close()
+
+    return pruned
+
+
+__all__ = (
+    "Throttle",
+    "prune_revisions",
+    "sweep_orphan_chunks"
+)
@@ -3,21 +3,67 @@ quart_mongo.motor
 """
 from __future__ import annotations
 
-from io import BytesIO
+import asyncio
+import logging
 from mimetypes import guess_type
-from typing import Any, BinaryIO, Optional
+import mmap
+from typing import Any, Iterable, Mapping, Optional
 
 from bson import ObjectId
-from gridfs import NoFile
-from motor.motor_asyncio import AsyncIOMotorGridFSBucket
-from quart import Quart, abort, Response
+from gridfs import DEFAULT_CHUNK_SIZE
+from motor.motor_asyncio import (
+    AsyncIOMotorGridFSBucket,
+    AsyncIOMotorGridOut
+)
+from pymongo.errors import PyMongoError
+from quart import Quart, abort, request, Response
 
+from quart_mongo.cache import FileDocumentCache, GridFSCache, watch_files
+from quart_mongo.cli import register_commands
+from quart_mongo.coalesce import Broadcast, SingleFlight
 from quart_mongo.config import MongoConfig, register_helpers
-from quart_mongo.helpers import GridFsFileWrapper, generate_etag, send_gridfs
+from quart_mongo.helpers import (
+    FileSource,
+    GridFSBody,
+    GridFsFileWrapper,
+    MappedBody,
+    SharedGridFSBody,
+    ZipArchiveBody,
+    backfill_etags,
+    create_gridfs_indexes,
+    delete_gridfs,
+    find_latest_documents,
+    generate_etag,
+    get_content_encoding,
+    get_file_document,
+    get_stored_etag,
+    is_file_source,
+    is_not_modified,
+    send_cached_gridfs,
+    send_gridfs,
+    send_gridfs_archive,
+    spool_body,
+    upload_deduplicated,
+    upload_gridfs,
+    with_stored_etag
+)
+from quart_mongo.identity import begin_identity_map, end_identity_map
+from quart_mongo.maintenance import prune_revisions, sweep_orphan_chunks
+from quart_mongo.uploads import (
+    create_upload,
+    create_upload_indexes,
+    expire_uploads,
+    finalize_upload,
+    get_upload,
+    write_upload
+)
 
 from .wrappers import AsyncIOMotorClient, AsyncIOMotorDatabase
 
 
+log = logging.getLogger(__name__)
+
+
 # pylint: disable=W1113
 
 
@@ -47,6 +93,15 @@ class Motor:
             **kwargs: Any
     ) -> None:
         self.config: MongoConfig | None = None
+        self.gridfs_cache: GridFSCache | None = None
+        self.gridfs_metadata_cache: FileDocumentCache | None = None
+        self._watch_task: asyncio.Task[None] | None = None
+        self._expire_task: asyncio.Task[None] | None = None
+        self._maintenance_task: asyncio.Task[None] | None = None
+        self._buckets: dict[tuple[str, str], AsyncIOMotorGridFSBucket] = {}
+        self._indexed: set[tuple[str, str]] = set()
+        self._lookups = SingleFlight()
+        self._downloads: dict[Any, Broadcast] = {}
         self.cx: AsyncIOMotorClient | None = None
         self.db: AsyncIOMotorDatabase | None = None
 
@@ -83,8 +138,30 @@ class Motor:
             kwargs: Keyword arguments for :class:`~AsyncIOMotorClient`.
         """
         self.config = MongoConfig(app, uri, *args, **kwargs)
+
+        if self.config.gridfs_cache_bytes > 0:
+            self.gridfs_cache = GridFSCache(
+                self.config.gridfs_cache_bytes,
+                self.config.gridfs_cache_max_file_bytes,
+                self.config.gridfs_cache_ttl,
+                self.config.gridfs_spool_bytes,
+                self.config.gridfs_spool_max_file_bytes
+            )
+
+        if self.config.gridfs_metadata_cache_ttl > 0:
+            self.gridfs_metadata_cache = FileDocumentCache(
+                self.config.gridfs_metadata_cache_ttl,
+                self.config.gridfs_metadata_cache_size
+            )
+
+        if self.config.identity_map:
+            app.before_request(begin_identity_map)
+            app.teardown_request(end_identity_map)
+
         app.before_serving(self._before_serving)
+        app.after_serving(self._after_serving)
         register_helpers(app)
+        register_commands(app, self)
 
     async def _before_serving(self) -> None:
         """
@@ -96,16 +173,230 @@ class Motor:
 
         The purpose of the function is to setup `AsyncIOMotorClient` and also
         `AsyncIOMotorDatabase` if the MongoDB URI provides the
-        database name.
+        database name. It also creates the indexes of the GridFS buckets
+        set with ``MONGO_GRIDFS_BUCKETS`` and deletes their expired
+        resumable uploads in the background if
+        ``MONGO_GRIDFS_UPLOAD_GC_INTERVAL`` is set. The buckets are
+        maintained if ``MONGO_GRIDFS_MAINTENANCE_INTERVAL`` is set.
         """
         if self.config is None:
             raise ValueError("MongoDB Config for Motor is ``None``")
 
-        self.cx = AsyncIOMotorClient(*self.config.args, **self.config.kwargs)
+        self.cx = AsyncIOMotorClient(
+            *self.config.args,
+            coalesce_reads=self.config.coalesce_reads,
+            **self.config.kwargs
+        )
 
         if self.config.database_name:
             self.db = self.cx[self.config.database_name]
 
+        if self.db is not None:
+            for base in self.config.gridfs_buckets:
+                await self._ensure_indexes(self.db, base)
+
+        if self.config.gridfs_metadata_cache_watch and (
+                self.gridfs_metadata_cache is not None or
+                self.gridfs_cache is not None
+        ) and self.db is not None:
+            self._watch_task = asyncio.create_task(self._watch_files())
+
+        if self.config.gridfs_upload_gc_interval > 0 and \
+                self.db is not None:
+            self._expire_task = asyncio.create_task(self._expire_uploads())
+
+        if self.config.gridfs_maintenance_interval > 0 and \
+                self.db is not None:
+            self._maintenance_task = asyncio.create_task(self._maintain())
+
+    async def _after_serving(self) -> None:
+        """
+        After Serving Function (Private)
+
+        This function is registered with application with the
+        :attr:`~Motor.init_app` and is called by the application after
+        serving. It stops watching the GridFS ``files`` collections and
+        the background maintenance.
+        """
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        if self._expire_task is not None:
+            self._expire_task.cancel()
+            self._expire_task = None
+        if self._maintenance_task is not None:
+            self._maintenance_task.cancel()
+            self._maintenance_task = None
+
+    async def _expire_uploads(self) -> None:
+        """
+        Expire Uploads Function (Private)
+
+        Deletes the expired resumable uploads of the GridFS buckets set
+        with ``MONGO_GRIDFS_BUCKETS`` every
+        ``MONGO_GRIDFS_UPLOAD_GC_INTERVAL`` seconds.
+        """
+        assert self.config is not None
+        assert self.db is not None
+
+        while True:
+            await asyncio.sleep(self.config.gridfs_upload_gc_interval)
+            for base in self.config.gridfs_buckets:
+                try:
+                    await self.expire_uploads(base)
+                except PyMongoError as error:
+                    log.warning(
+                        "Could not expire GridFS uploads: %s", error
+                    )
+
+    async def _maintain(self) -> None:
+        """
+        Maintain Function (Private)
+
+        Deletes the orphaned chunks of the GridFS buckets set with
+        ``MONGO_GRIDFS_BUCKETS`` every ``MONGO_GRIDFS_MAINTENANCE_INTERVAL``
+        seconds, and their old revisions if
+        ``MONGO_GRIDFS_KEEP_REVISIONS`` is set.
+        """
+        assert self.config is not None
+        assert self.db is not None
+
+        while True:
+            await asyncio.sleep(self.config.gridfs_maintenance_interval)
+            for base in self.config.gridfs_buckets:
+                try:
+                    await self.sweep_orphan_chunks(base)
+                    if self.config.gridfs_keep_revisions > 0:
+                        await self.prune_revisions(base=base)
+                except PyMongoError as error:
+                    log.warning("Could not maintain GridFS: %s", error)
+
+    async def _watch_files(self) -> None:
+        """
+        Watch Files Function (Private)
+
+        Invalidates the GridFS file document cache and file cache from
+        a change stream on the ``files`` collections of the default
+        database.
+        """
+        assert self.db is not None
+        caches = [
+            cache for cache in (self.gridfs_metadata_cache, self.gridfs_cache)
+            if cache is not None
+        ]
+
+        pipeline = [{"$match": {"ns.coll": {"$regex": r"\.files$"}}}]
+        try:
+            async with self.db.watch(
+                pipeline, full_document="updateLookup"
+            ) as stream:
+                await watch_files(self.db.name, stream, caches)
+        except PyMongoError as error:
+            log.warning("Stopped watching GridFS files: %s", error)
+
+    def _get_database(
+            self, db: Optional[str], caller: str
+    ) -> AsyncIOMotorDatabase:
+        """
+        Get Database Function (Private)
+
+        Returns the target database for the GridFS helpers.
+
+        Arguments:
+            db: The target database, if different from the default
+                database.
+            caller: The name of the calling method for the error message.
+        """
+        if db and self.cx is not None:
+            db_obj = self.cx[db]
+        elif self.db is not None:
+            db_obj = self.db
+        else:
+            db_obj = None
+
+        assert db_obj is not None, \
+            f"Please initialize the app before calling {caller}!"
+        return db_obj
+
+    def _get_bucket(
+            self, db_obj: AsyncIOMotorDatabase, base: str
+    ) -> AsyncIOMotorGridFSBucket:
+        """
+        Get Bucket Function (Private)
+
+        Returns the GridFS bucket for the database and base name. The
+        buckets are created when first used and reused afterwards.
+
+        Arguments:
+            db_obj: The database of the GridFS bucket.
+            base: The base name of the GridFS collections.
+        """
+        key = (db_obj.name, base)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = AsyncIOMotorGridFSBucket(db_obj, base)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def _ensure_indexes(
+            self, db_obj: AsyncIOMotorDatabase, base: str
+    ) -> None:
+        """
+        Ensure Indexes Function (Private)
+
+        Creates the indexes of a GridFS bucket once per process, for the
+        uploads that do not go through the driver.
+
+        Arguments:
+            db_obj: The database of the GridFS bucket.
+            base: The base name of the GridFS collections.
+        """
+        key = (db_obj.name, base)
+        if key not in self._indexed:
+            await create_gridfs_indexes(
+                db_obj[f"{base}.files"], db_obj[f"{base}.chunks"]
+            )
+            self._indexed.add(key)
+
+    async def _find_file(
+            self,
+            db_obj: AsyncIOMotorDatabase,
+            base: str,
+            filename: str,
+            version: int
+    ) -> Mapping[str, Any] | None:
+        """
+        Find File Function (Private)
+
+        Returns the file document of a version of a GridFS file, using
+        the file document cache if it is enabled. Concurrent lookups of
+        the same file share one query if ``MONGO_GRIDFS_COALESCE`` is set.
+
+        Arguments:
+            db_obj: The database of the GridFS bucket.
+            base: The base name of the GridFS collections.
+            filename: The filename of the file.
+            version: The version of the file.
+        """
+        cache = self.gridfs_metadata_cache
+        key = (db_obj.name, base, filename, version)
+
+        if cache is not None:
+            document = cache.get(key)
+            if document is not None:
+                return document
+
+        files = db_obj[f"{base}.files"]
+        if self.config is not None and self.config.gridfs_coalesce:
+            document = await self._lookups.do(
+                key, lambda: get_file_document(files, filename, version)
+            )
+        else:
+            document = await get_file_document(files, filename, version)
+        if cache is not None and document is not None:
+            cache.put(key, document)
+        return document
+
     async def send_file(
             self,
             filename: str,
@@ -119,6 +410,8 @@ class Motor:
 
         Returns an instance of the :attr:`~quart.Quart.response_class`
         containing the named file, and implement conditional GET semantics.
+        HEAD requests are answered from the file document without
+        reading any chunks.
 
         .. code-block:: python
 
@@ -143,37 +436,98 @@ class Motor:
         if not isinstance(cache_for, int):
             raise TypeError("'cache_for' must be an integer")
 
-        if db and self.cx is not None:
-            db_obj = self.cx[db]
-        elif self.db is not None:
-            db_obj = self.db
-        else:
-            db_obj = None
-
-        assert db_obj is not None, "Please initialize the app before calling \
-            send_file!"
+        db_obj = self._get_database(db, "send_file")
 
-        storage = AsyncIOMotorGridFSBucket(db_obj, base)
+        cache = self.gridfs_cache
+        key = (db_obj.name, base, filename, version)
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None and GridFSCache.is_fresh(cached):
+            return await send_cached_gridfs(cached, cache_for)
 
-        try:
-            grid_out = await storage.open_download_stream_by_name(
-                filename, revision=version
-            )
-        except NoFile:
+        document = await self._find_file(db_obj, base, filename, version)
+        if document is None:
             abort(404)
 
-        etag = await generate_etag(grid_out)
+        grid_out = AsyncIOMotorGridOut(db_obj[base], file_document=document)
+
+        etag = get_stored_etag(grid_out)
+
+        if cache is not None and cached is not None and GridFSCache.is_current(
+            cached, grid_out._id, etag, grid_out.upload_date
+        ):
+            cache.refresh(key)
+            return await send_cached_gridfs(cached, cache_for)
+
+        # Revalidations and HEAD requests are answered from the file
+        # document alone, so a legacy file without a stored checksum is
+        # only hashed if its contents are sent.
+        if etag is None and request.method != "HEAD" and \
+                not is_not_modified(None, grid_out.upload_date):
+            if self.config is not None and self.config.gridfs_backfill_etags:
+                etag = await generate_etag(grid_out, db_obj[f"{base}.files"])
+                # The cached file document must hold the stored sha1 too,
+                # or the next requests would hash the file again.
+                if self.gridfs_metadata_cache is not None:
+                    self.gridfs_metadata_cache.put(
+                        key, with_stored_etag(document, etag, True)
+                    )
+            else:
+                etag = await generate_etag(grid_out)
 
         if grid_out.metadata:
             content_type = grid_out.metadata.get("content_type", None)
         else:
             content_type = None
 
-        raw: bytes = await grid_out.read()
-        file = BytesIO(raw)
+        # Deduplicated files read the chunk set they share.
+        chunks = db_obj[f"{base}.chunks"]
+        chunks_id = document.get("chunksId", document["_id"])
+        body: GridFSBody | MappedBody
+        if self.config is not None and self.config.gridfs_coalesce:
+            body = SharedGridFSBody(
+                chunks,
+                chunks_id,
+                grid_out.length,
+                grid_out.chunk_size,
+                self._downloads,
+                self.config.gridfs_coalesce_window
+            )
+        else:
+            body = GridFSBody(
+                chunks, chunks_id, grid_out.length, grid_out.chunk_size
+            )
+        if self.config is not None:
+            body.prefetch = self.config.gridfs_download_prefetch
+
+        # Large files are kept in a memory-mapped temporary file
+        # instead of the heap, within the limits of spooled files.
+        config = self.config
+        spool = config is not None and \
+            0 < config.gridfs_spool_threshold <= grid_out.length
+        encoding = get_content_encoding(document)
+        if cache is not None and encoding is None and \
+                request.method != "HEAD" and \
+                cache.accepts(grid_out.length, spool) and \
+                not is_not_modified(etag, grid_out.upload_date):
+            raw: bytes | mmap.mmap
+            if config is not None and spool:
+                raw = await spool_body(body, config.gridfs_spool_dir)
+            else:
+                async with body:
+                    raw = b"".join([data async for data in body])
+            body = MappedBody(raw)
+            cache.put(
+                key,
+                raw,
+                grid_out._id,  # pylint: disable=W0212
+                grid_out.filename,
+                content_type,
+                etag,
+                grid_out.upload_date
+            )
 
         return await send_gridfs(
-            file,
+            body,
             grid_out.length,
             mimetype=content_type,
             as_attachment=True,
@@ -181,22 +535,94 @@ class Motor:
             add_etags=True,
             etag=etag,
             cache_timeout=cache_for,
-            last_modified=grid_out.upload_date
+            last_modified=grid_out.upload_date,
+            content_encoding=encoding
             )
 
+    async def send_archive(
+            self,
+            files: Iterable[str] | Mapping[str, Any],
+            archive_name: str = "archive.zip",
+            base: str = "fs",
+            compression: str = "deflate",
+            db: Optional[str] = None
+    ) -> Response:
+        """
+        Respond with a zip archive of several files from GridFS.
+
+        The archive is built while it is sent, straight from the GridFS
+        chunks, so neither the files nor the archive are kept in memory
+        or on disk. Every file is archived in its most recent revision.
+
+        .. code-block:: python
+
+            @app.route("/posts/<ObjectId:post_id>/attachments.zip")
+            async def get_attachments(post_id):
+                return await mongo.send_archive(
+                    {"metadata.post_id": post_id}, "attachments.zip"
+                )
+
+        :param files: the filenames of the files to archive, or a query on
+           the file documents. If a filename does not exist, return with
+           HTTP status 404.
+        :param str archive_name: the filename of the archive
+        :param str base: the base name of the GridFS collections to use
+        :param str compression: ``"deflate"`` to compress the files or
+           ``"stored"`` to archive them as they are, which suits files
+           that are already compressed
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be string or unicode")
+        if isinstance(files, str):
+            raise TypeError("'files' must be a list of filenames or a query")
+
+        db_obj = self._get_database(db, "send_archive")
+
+        documents: list[Mapping[str, Any]]
+        if isinstance(files, Mapping):
+            documents = await find_latest_documents(
+                db_obj[f"{base}.files"], files
+            )
+        else:
+            documents = []
+            for filename in files:
+                document = await self._find_file(db_obj, base, filename, -1)
+                if document is None:
+                    abort(404)
+                documents.append(document)
+
+        prefetch = 0
+        if self.config is not None:
+            prefetch = self.config.gridfs_download_prefetch
+        body = ZipArchiveBody(
+            db_obj[f"{base}.chunks"], documents, compression, prefetch
+        )
+        return send_gridfs_archive(body, archive_name)
+
     async def save_file(
             self,
             filename: str,
-            fileobj: BinaryIO,
+            fileobj: FileSource,
             base: str = "fs",
             content_type: Optional[str] = None,
             db: Optional[str] = None,
+            compress: Optional[str] = None,
             **kwargs: Any
     ) -> ObjectId:
         """
         Save a file-like object to GridFS using the given filename.
         Return the "_id" of the created file.
 
+        The file is written one GridFS chunk at a time. Besides file-like
+        objects, ``fileobj`` can be an async iterable of bytes such as
+        :attr:`~quart.Request.body`, so a streamed upload is stored while
+        it arrives. If ``MONGO_GRIDFS_UPLOAD_BATCH_SIZE`` is set, the
+        chunks are inserted in concurrent batches and the file document
+        is inserted last. With ``MONGO_GRIDFS_DEDUP`` the chunks are
+        shared with files of the same content, see :meth:`delete_file`.
+
         .. code-block:: python
 
             @app.route("/uploads/<path:filename>", methods=["POST"])
@@ -205,20 +631,27 @@ class Motor:
                 return redirect(url_for("get_upload", filename=filename))
 
         :param str filename: the filename of the file to return
-        :param file fileobj: the file-like object to save
+        :param file fileobj: the file-like object or async iterable of
+           bytes to save
         :param str base: base the base name of the GridFS collections to use
         :param str content_type: the MIME content-type of the file. If
            ``None``, the content-type is guessed from the filename using
            :func:`~mimetypes.guess_type`
         :param str db: the target database, if different from the default
             database.
+        :param str compress: the content encoding to store the file with,
+           ``"gzip"`` or ``"zstd"`` if :mod:`zstandard` is installed.
+           :meth:`send_file` sends the compressed chunks to clients that
+           accept the encoding and decompresses them for other clients.
         :param kwargs: extra attributes to be stored in the file's document,
            passed directly to :meth:`gridfs.GridFS.put`
         """
         if not isinstance(base, str):
             raise TypeError("'base' must be a string or unicode")
-        if not (hasattr(fileobj, "read") and callable(fileobj.read)):
-            raise TypeError("'fileobj' must have read() method")
+        if not is_file_source(fileobj):
+            raise TypeError(
+                "'fileobj' must have read() method or be an async iterable"
+            )
 
         if kwargs:
             metadata = kwargs.copy()
@@ -231,28 +664,443 @@ class Motor:
         else:
             metadata["content_type"] = content_type
 
-        if db and self.cx is not None:
-            db_obj = self.cx[db]
-        elif self.db is not None:
-            db_obj = self.db
-        else:
-            db_obj = None
-
-        assert db_obj is not None, "Please initialize the app before calling \
-            save_file!"
+        if compress is not None:
+            metadata["content_encoding"] = compress
 
-        storage = AsyncIOMotorGridFSBucket(db_obj, base)
+        db_obj = self._get_database(db, "save_file")
 
         # GridFS does not manage its own checksum, so we attach a sha1 to the
         # file for use as an etag.
-        hashingfile = GridFsFileWrapper(fileobj)
+        hashingfile = GridFsFileWrapper(fileobj, compress)
+
+        config = self.config
+        if config is not None and (
+            config.gridfs_dedup or config.gridfs_upload_batch_size > 0
+        ):
+            await self._ensure_indexes(db_obj, base)
+            chunk_size = DEFAULT_CHUNK_SIZE
+            document = {"filename": filename, "metadata": metadata}
+            files = db_obj[f"{base}.files"]
+            chunks = db_obj[f"{base}.chunks"]
+            batch_size = max(config.gridfs_upload_batch_size, 1)
+            if config.gridfs_dedup:
+                oid = await upload_deduplicated(
+                    files,
+                    chunks,
+                    db_obj[f"{base}.blobs"],
+                    hashingfile,
+                    document,
+                    chunk_size,
+                    batch_size,
+                    config.gridfs_upload_max_batches
+                )
+            else:
+                oid = await upload_gridfs(
+                    files,
+                    chunks,
+                    hashingfile,
+                    document,
+                    chunk_size,
+                    batch_size,
+                    config.gridfs_upload_max_batches
+                )
+        else:
+            storage = self._get_bucket(db_obj, base)
+            async with storage.open_upload_stream(
+                filename, metadata=metadata
+                    ) as grid_in:
+                async for piece in hashingfile.chunks(grid_in.chunk_size):
+                    await grid_in.write(piece)
+                await grid_in.set("sha1", hashingfile.hash.hexdigest())
+                oid = grid_in._id  # pylint: disable=W0212
+                await grid_in.close()
 
-        async with storage.open_upload_stream(
-            filename, metadata=metadata
-                ) as grid_in:
-            await grid_in.write(hashingfile)
-            await grid_in.set("sha1", hashingfile.hash.hexdigest())
-            oid = grid_in._id  # pylint: disable=W0212
-            await grid_in.close()
+        if self.gridfs_cache is not None:
+            self.gridfs_cache.invalidate(db_obj.name, base, filename)
+        if self.gridfs_metadata_cache is not None:
+            self.gridfs_metadata_cache.invalidate(db_obj.name, base, filename)
 
         return oid
+
+    async def delete_file(
+            self,
+            file_id: Any,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> None:
+        """
+        Delete a file from GridFS by the "_id" of its file document.
+
+        Files saved with ``MONGO_GRIDFS_DEDUP`` share their chunks with
+        identical files, so their chunks are only deleted together with
+        the last file that refers to them. Other files are deleted like
+        :meth:`gridfs.GridFS.delete` does.
+
+        .. code-block:: python
+
+            @app.route("/uploads/<ObjectId:file_id>", methods=["DELETE"])
+            async def delete_upload(file_id):
+                await mongo.delete_file(file_id)
+                return "", 204
+
+        :param file_id: the "_id" of the file to delete
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "delete_file")
+
+        document = await delete_gridfs(
+            db_obj[f"{base}.files"],
+            db_obj[f"{base}.chunks"],
+            db_obj[f"{base}.blobs"],
+            file_id
+        )
+        if document is None:
+            return
+
+        filename = document["filename"]
+        if self.gridfs_cache is not None:
+            self.gridfs_cache.invalidate(db_obj.name, base, filename)
+        if self.gridfs_metadata_cache is not None:
+            self.gridfs_metadata_cache.invalidate(db_obj.name, base, filename)
+
+    async def backfill_etags(
+            self,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> int:
+        """
+        Store a sha1 in every GridFS file document without a checksum.
+
+        Files saved without a checksum have their sha1 computed from the
+        chunks whenever an etag is needed. This computes it once and
+        stores it as ``metadata.sha1`` in the file document. Return the
+        number of files that were updated.
+
+        This is also available as the ``quart gridfs backfill-etags``
+        command.
+
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "backfill_etags")
+
+        return await backfill_etags(
+            db_obj[f"{base}.files"],
+            db_obj[f"{base}.chunks"],
+            in_metadata=True
+        )
+
+    async def create_upload(
+            self,
+            filename: str,
+            base: str = "fs",
+            content_type: Optional[str] = None,
+            db: Optional[str] = None,
+            **kwargs: Any
+    ) -> ObjectId:
+        """
+        Start a resumable upload of a file to GridFS using the given
+        filename. Return the "_id" of the upload, which becomes the
+        "_id" of the file.
+
+        The file is sent in pieces with :meth:`upload_chunk`, which can
+        be resumed from :meth:`upload_offset` after a dropped
+        connection, and published with :meth:`finalize_upload`. The
+        chunks are written to GridFS as they arrive. Uploads that are
+        not finalized expire after ``MONGO_GRIDFS_UPLOAD_TTL`` seconds,
+        see :meth:`expire_uploads`.
+
+        .. code-block:: python
+
+            @app.route("/uploads/<path:filename>", methods=["POST"])
+            async def start_upload(filename):
+                upload_id = await mongo.create_upload(filename)
+                return {"upload_id": str(upload_id)}, 201
+
+        :param str filename: the filename of the file
+        :param str base: the base name of the GridFS collections to use
+        :param str content_type: the MIME content-type of the file. If
+           ``None``, the content-type is guessed from the filename using
+           :func:`~mimetypes.guess_type`
+        :param str db: the target database, if different from the default
+            database.
+        :param kwargs: extra attributes to be stored in the metadata of
+           the file's document
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        if content_type is None:
+            content_type, _ = guess_type(filename)
+
+        db_obj = self._get_database(db, "create_upload")
+        await self._ensure_indexes(db_obj, base)
+        uploads = db_obj[f"{base}.uploads"]
+        key = (db_obj.name, f"{base}.uploads")
+        if key not in self._indexed:
+            await create_upload_indexes(uploads)
+            self._indexed.add(key)
+
+        metadata = dict(kwargs, content_type=content_type)
+        document = {"metadata": metadata}
+        chunk_size = DEFAULT_CHUNK_SIZE
+        assert self.config is not None
+        return await create_upload(
+            uploads,
+            filename,
+            document,
+            self.config.gridfs_upload_ttl,
+            chunk_size
+        )
+
+    async def upload_chunk(
+            self,
+            upload_id: Any,
+            offset: int,
+            data: bytes,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> int:
+        """
+        Write a piece of a resumable upload at the given offset. Return
+        the number of bytes received so far.
+
+        Bytes before the returned offset that are sent again are
+        skipped, so a client can safely repeat a piece it is unsure
+        about. A piece that starts after the offset, or arrives while
+        another piece is being written or the upload is being finalized,
+        raises :class:`~quart_mongo.uploads.UploadOffsetError`, which
+        holds the offset to resume from. :class:`~gridfs.errors.NoFile`
+        is raised if the upload does not exist or has expired.
+
+        .. code-block:: python
+
+            @app.route("/uploads/<ObjectId:upload_id>", methods=["PATCH"])
+            async def resume_upload(upload_id):
+                offset = int(request.headers["Upload-Offset"])
+                data = await request.get_data()
+                try:
+                    offset = await mongo.upload_chunk(upload_id, offset, data)
+                except UploadOffsetError as error:
+                    return "", 409, {"Upload-Offset": str(error.offset)}
+                return "", 204, {"Upload-Offset": str(offset)}
+
+        :param upload_id: the "_id" returned by :meth:`create_upload`
+        :param int offset: the offset of the piece in the file
+        :param bytes data: the piece of the file
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "upload_chunk")
+        assert self.config is not None
+
+        return await write_upload(
+            db_obj[f"{base}.uploads"],
+            db_obj[f"{base}.chunks"],
+            upload_id,
+            offset,
+            data,
+            self.config.gridfs_upload_ttl
+        )
+
+    async def upload_offset(
+            self,
+            upload_id: Any,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> int:
+        """
+        Return the number of bytes received for a resumable upload,
+        which is where the client resumes. Raise
+        :class:`~gridfs.errors.NoFile` if the upload does not exist or
+        has expired.
+
+        :param upload_id: the "_id" returned by :meth:`create_upload`
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "upload_offset")
+
+        session = await get_upload(db_obj[f"{base}.uploads"], upload_id)
+        return session["length"]
+
+    async def finalize_upload(
+            self,
+            upload_id: Any,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> ObjectId:
+        """
+        Publish a resumable upload as a GridFS file. Return the "_id" of
+        the file.
+
+        The sha1 of the file is computed from the stored chunks and the
+        file document is inserted in a single write, so the file is
+        either complete or not visible at all. No piece can be written
+        once finalizing has started. Finalizing an upload again after an
+        interruption is safe. Raise
+        :class:`~quart_mongo.uploads.UploadOffsetError` if a piece is
+        being written and :class:`~gridfs.errors.NoFile` if the upload
+        does not exist or has expired.
+
+        :param upload_id: the "_id" returned by :meth:`create_upload`
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "finalize_upload")
+
+        document = await finalize_upload(
+            db_obj[f"{base}.uploads"],
+            db_obj[f"{base}.files"],
+            db_obj[f"{base}.chunks"],
+            upload_id
+        )
+
+        filename = document["filename"]
+        if self.gridfs_cache is not None:
+            self.gridfs_cache.invalidate(db_obj.name, base, filename)
+        if self.gridfs_metadata_cache is not None:
+            self.gridfs_metadata_cache.invalidate(db_obj.name, base, filename)
+
+        return document["_id"]
+
+    async def expire_uploads(
+            self,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> int:
+        """
+        Delete the resumable uploads that expired and their chunks.
+        Return the number of deleted uploads.
+
+        This runs in the background for ``MONGO_GRIDFS_BUCKETS`` if
+        ``MONGO_GRIDFS_UPLOAD_GC_INTERVAL`` is set and is also available
+        as the ``quart gridfs expire-uploads`` command.
+
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "expire_uploads")
+
+        return await expire_uploads(
+            db_obj[f"{base}.uploads"],
+            db_obj[f"{base}.files"],
+            db_obj[f"{base}.chunks"]
+        )
+
+    async def sweep_orphan_chunks(
+            self,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> int:
+        """
+        Delete the chunks that belong to no file, resumable upload or
+        shared blob, which interrupted uploads leave behind. Return the
+        number of deleted chunks.
+
+        Only chunks older than ``MONGO_GRIDFS_ORPHAN_GRACE`` seconds are
+        deleted, so uploads in progress keep their chunks. The sweep
+        pauses between batches of ``MONGO_GRIDFS_MAINTENANCE_BATCH_SIZE``
+        files to work only ``MONGO_GRIDFS_MAINTENANCE_DUTY`` of the
+        time.
+
+        This runs in the background for ``MONGO_GRIDFS_BUCKETS`` if
+        ``MONGO_GRIDFS_MAINTENANCE_INTERVAL`` is set and is also
+        available as the ``quart gridfs sweep-chunks`` command.
+
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "sweep_orphan_chunks")
+        assert self.config is not None
+
+        return await sweep_orphan_chunks(
+            db_obj[f"{base}.files"],
+            db_obj[f"{base}.chunks"],
+            db_obj[f"{base}.uploads"],
+            db_obj[f"{base}.blobs"],
+            self.config.gridfs_orphan_grace,
+            self.config.gridfs_maintenance_batch_size,
+            self.config.gridfs_maintenance_duty
+        )
+
+    async def prune_revisions(
+            self,
+            keep: Optional[int] = None,
+            base: str = "fs",
+            db: Optional[str] = None
+    ) -> int:
+        """
+        Delete all but the newest revisions of every file. Return the
+        number of deleted revisions.
+
+        Saving a file under an existing filename adds a revision, and
+        :meth:`send_file` only serves the newest one by default. The
+        pruning pauses like :meth:`sweep_orphan_chunks`.
+
+        This runs in the background for ``MONGO_GRIDFS_BUCKETS`` if
+        ``MONGO_GRIDFS_MAINTENANCE_INTERVAL`` and
+        ``MONGO_GRIDFS_KEEP_REVISIONS`` are set and is also available as
+        the ``quart gridfs prune-revisions`` command.
+
+        :param int keep: the number of revisions to keep per filename.
+           If ``None``, ``MONGO_GRIDFS_KEEP_REVISIONS`` is used.
+        :param str base: the base name of the GridFS collections to use
+        :param str db: the target database, if different from the default
+            database.
+        """
+        if not isinstance(base, str):
+            raise TypeError("'base' must be a string or unicode")
+
+        db_obj = self._get_database(db, "prune_revisions")
+        assert self.config is not None
+        if keep is None:
+            keep = self.config.gridfs_keep_revisions
+
+        pruned = await prune_revisions(
+            db_obj[f"{base}.files"],
+            db_obj[f"{base}.chunks"],
+            db_obj[f"{base}.blobs"],
+            keep,
+            self.config.gridfs_maintenance_batch_size,
+            self.config.gridfs_maintenance_duty
+        )
+
+        for filename in pruned:
+            if self.gridfs_cache is not None:
+                self.gridfs_cache.invalidate(db_obj.name, base, filename)
+            if self.gridfs_metadata_cache is not None:
+                self.gridfs_metadata_cache.invalidate(
+                    db_obj.name, base, filename
+                )
+
+        return sum(pruned.values())
@@ -2,7 +2,7 @@
 quart_mongo.motor.wrapper
 """
 from __future__ import annotations
-from typing import Any, Optional
+from typing import Any, Mapping, Optional
 
 from bson.typings import _DocumentType
 from motor.core import AgnosticBaseProperties
@@ -11,6 +11,12 @@ from pymongo.collection import Collection
 from pymongo.database import Database
 from quart import abort
 
+from quart_mongo.cache import WrapperCache
+from quart_mongo.coalesce import CoalescingMixin, SingleFlight
+from quart_mongo.identity import IdentityMapMixin
+from quart_mongo.loader import DocumentLoader, get_loader
+from quart_mongo.pagination import InvalidPageToken, Page, SortSpec, paginate
+
 from .typing import (
     CodecOptions,
     ServerMode,
@@ -26,11 +32,32 @@ class AsyncIOMotorClient(motor_asyncio.AsyncIOMotorClient):
     Returns instances of Quart-Mongo Motor
     :class:`~quart_mongo.motor.wrappers.Database` instead of native motor
     :class:`~AsyncIOMotorDatabase` when accessed with dot notation.
+
+    The wrappers are created once per name and kept in a
+    :class:`~quart_mongo.cache.WrapperCache`.
+
+    Parameters:
+        coalesce_reads: Share identical ``find_one`` calls in flight on
+            the collection wrappers, see
+            `quart_mongo.coalesce.CoalescingMixin`. Defaults to ``False``.
     """
 
+    def __init__(
+            self, *args: Any, coalesce_reads: bool = False, **kwargs: Any
+    ) -> None:
+        """__init__."""
+        self._wrappers: WrapperCache[AsyncIOMotorDatabase] = WrapperCache()
+        self._read_flight = SingleFlight() if coalesce_reads else None
+        super().__init__(*args, **kwargs)
+
     def __getitem__(self, name: str) -> AsyncIOMotorDatabase:
         """__getitem__."""
-        return AsyncIOMotorDatabase(self, name)
+        database = self._wrappers.get(name)
+        if database is None:
+            database = self._wrappers.put(
+                name, AsyncIOMotorDatabase(self, name)
+            )
+        return database
 
 
 class AsyncIOMotorDatabase(motor_asyncio.AsyncIOMotorDatabase):
@@ -41,6 +68,9 @@ class AsyncIOMotorDatabase(motor_asyncio.AsyncIOMotorDatabase):
     :class:`~quart_mongo.motor.wrappers.AsyncIOMotorCollection`
     :class:`~motor.motor_asyncio.AsyncIOMotorCollection` when accessed with \
         dot notation.
+
+    The wrappers are created once per name and kept in a
+    :class:`~quart_mongo.cache.WrapperCache`.
     """
 
     def __init__(
@@ -48,6 +78,8 @@ class AsyncIOMotorDatabase(motor_asyncio.AsyncIOMotorDatabase):
     ) -> None:
         """__init__."""
         self._client = client
+        self._wrappers: WrapperCache[AsyncIOMotorCollection] = \
+            WrapperCache()
         delegate = kwargs.get("_delegate") or \
             Database(client.delegate, name, **kwargs)
 
@@ -55,13 +87,28 @@ class AsyncIOMotorDatabase(motor_asyncio.AsyncIOMotorDatabase):
 
     def __getitem__(self, name: str) -> AsyncIOMotorCollection:
         """__getitem__."""
-        return AsyncIOMotorCollection(self, name)
+        collection = self._wrappers.get(name)
+        if collection is None:
+            collection = self._wrappers.put(
+                name, AsyncIOMotorCollection(self, name)
+            )
+        return collection
 
 
-class AsyncIOMotorCollection(motor_asyncio.AsyncIOMotorCollection):
+class AsyncIOMotorCollection(
+        IdentityMapMixin, CoalescingMixin,
+        motor_asyncio.AsyncIOMotorCollection
+):
     """
     Wrapper for :class:`~motor.motor_asyncio.AsyncIOMotorCollection`
     with helpers.
+
+    Sub-collections are created once per name and kept in a
+    :class:`~quart_mongo.cache.WrapperCache`. With ``MONGO_IDENTITY_MAP``,
+    ``find_one`` by ``_id`` is memoized for the request, see
+    :class:`~quart_mongo.identity.IdentityMapMixin`, and with
+    ``MONGO_COALESCE_READS`` identical ``find_one`` calls in flight are
+    shared, see :class:`~quart_mongo.coalesce.CoalescingMixin`.
     """
     def __init__(
         self,
@@ -92,13 +139,18 @@ class AsyncIOMotorCollection(motor_asyncio.AsyncIOMotorCollection):
 
         super(AgnosticBaseProperties, self).__init__(delegate)
         self.database = database
+        self._wrappers: WrapperCache[AsyncIOMotorCollection] = \
+            WrapperCache()
 
     def __getitem__(self, name: str) -> AsyncIOMotorCollection:
-        return AsyncIOMotorCollection(
-            self.database,
-            self.name + "." + name,
-            _delegate=self.delegate[name]
-        )
+        collection = self._wrappers.get(name)
+        if collection is None:
+            collection = self._wrappers.put(name, AsyncIOMotorCollection(
+                self.database,
+                self.name + "." + name,
+                _delegate=self.delegate[name]
+            ))
+        return collection
 
     async def find_one_or_404(
             self, *args: Any, **kwargs: Any
@@ -127,3 +179,88 @@ class AsyncIOMotorCollection(motor_asyncio.AsyncIOMotorCollection):
         if found is None:
             abort(404)
         return found
+
+    def loader(self) -> DocumentLoader:
+        """
+        Returns the loader of this collection for the request.
+
+        This function returns the `quart_mongo.loader.DocumentLoader`
+        shared by the request. Lookups by ``_id`` made with it in the same
+        turn of the event loop are sent as one ``$in`` query.
+
+        .. code-block:: python
+            @app.route("/post/<ObjectId:post_id>")
+            async def post(post_id):
+                post = await motor.db.posts.find_one_or_404(post_id)
+                comments = await motor.db.comments.find(
+                    {"post": post_id}
+                ).to_list()
+                authors = await motor.db.users.loader().load_many(
+                    comment["author"] for comment in comments
+                )
+                return await render_template("post.html",
+                    post=post, comments=zip(comments, authors))
+        """
+        return get_loader(self)
+
+    async def paginate(  # pylint: disable=W0622
+            self,
+            filter: Optional[Mapping[str, Any]] = None,
+            sort: Optional[SortSpec] = None,
+            page_size: int = 20,
+            token: Optional[str] = None,
+            **kwargs: Any
+    ) -> Page:
+        """
+        Returns a page of the documents and a continuation token.
+
+        Pages use a range query after the last document of the page before
+        instead of ``skip``, so deep pages cost as much as the first one
+        with an index on the sort keys followed by ``_id``. The token is
+        signed with the ``SECRET_KEY`` of the app and is ``None`` on the
+        last page.
+
+        Raises :class:`~quart_mongo.pagination.InvalidPageToken` if the
+        token was tampered with or was made for another sort.
+
+        .. code-block:: python
+            @app.route("/posts")
+            async def posts():
+                page = await motor.db.posts.paginate(
+                    {"draft": False},
+                    sort=[("published", DESCENDING)],
+                    token=request.args.get("page")
+                )
+                return {"items": page.items, "next": page.next_token}
+
+        Parameters:
+            filter: The filter of the documents.
+            sort: A sort key or a list of ``(key, direction)`` pairs.
+            page_size: The number of documents per page.
+            token: The ``next_token`` of the page before, or ``None`` for
+                the first page.
+            kwargs: Extra arguments to be passed to
+                `AsyncIOMotorCollection.Collection.find`, except ``limit``
+                and ``skip``.
+        """
+        return await paginate(self, filter, sort, page_size, token, **kwargs)
+
+    async def paginate_or_404(self, *args: Any, **kwargs: Any) -> Page:
+        """
+        Returns a page of the documents or raise a 404 with the browser.
+
+        This function is like `paginate`, but rather than returning an
+        empty page or raising on an invalid token, it will raise a 404
+        error (Not Found HTTP status) on the request.
+
+        Parameters:
+            args: Arguments to be passed to `paginate`.
+            kwargs: Extra arguments to be passed to `paginate`.
+        """
+        try:
+            page = await self.paginate(*args, **kwargs)
+        except InvalidPageToken:
+            abort(404)
+        if not page.items:
+            abort(404)
+        return page
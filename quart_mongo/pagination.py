@@ -0,0 +1,245 @@
+"""
+quart_mongo.pagination
+"""
+from typing import (
+    Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+)
+
+from bson import json_util
+from itsdangerous import BadData, URLSafeSerializer
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING
+from pymongo.asynchronous.collection import AsyncCollection
+from quart import current_app
+
+
+SortSpec = str | Sequence[Tuple[str, int]]
+"""A sort key or a list of ``(key, direction)`` pairs."""
+
+TOKEN_SALT = "quart-mongo.paginate"
+"""The salt of the signed continuation tokens."""
+
+
+class InvalidPageToken(ValueError):
+    """
+    Raised when a continuation token was not signed with the secret key
+    or was made for another sort.
+    """
+
+
+class Page(NamedTuple):
+    """
+    A page of documents returned by ``paginate``.
+
+    Arguments:
+        items: The documents of the page.
+        next_token: The continuation token of the next page, or ``None``
+            if this is the last page.
+    """
+    items: List[Any]
+    next_token: Optional[str]
+
+
+def normalize_sort(sort: Optional[SortSpec]) -> List[Tuple[str, int]]:
+    """
+    Returns a sort spec as ``(key, direction)`` pairs that end with
+    ``_id``, so every document has a distinct position.
+
+    The ``_id`` takes the direction of the last key, so a compound index
+    on the sort keys followed by ``_id`` serves the query.
+
+    Arguments:
+        sort: A sort key, a list of ``(key, direction)`` pairs or
+            ``None`` to sort by ``_id``.
+    """
+    if sort is None:
+        keys: List[Tuple[str, int]] = []
+    elif isinstance(sort, str):
+        keys = [(sort, ASCENDING)]
+    else:
+        keys = [(key, direction) for key, direction in sort]
+
+    for key, direction in keys:
+        if direction not in (ASCENDING, DESCENDING):
+            raise ValueError(
+                f"Sort direction of {key!r} must be ASCENDING or DESCENDING"
+            )
+    if "_id" not in [key for key, _ in keys]:
+        keys.append(("_id", keys[-1][1] if keys else ASCENDING))
+    return keys
+
+
+def _get_value(document: Mapping[str, Any], key: str) -> Any:
+    value: Any = document
+    for part in key.split("."):
+        value = value.get(part) if isinstance(value, Mapping) else None
+    return value
+
+
+def keyset_filter(
+        filter: Optional[Mapping[str, Any]],  # pylint: disable=W0622
+        sort: List[Tuple[str, int]],
+        values: List[Any]
+) -> Mapping[str, Any]:
+    """
+    Returns a filter for the documents after the given sort values.
+
+    MongoDB sorts null and missing values before all others, but range
+    operators never match them, so they are handled on their own: after
+    a null value come the non-null ones in ascending order and nothing
+    in descending order, and null values come after any other value in
+    descending order. ``_id`` is never null.
+
+    Arguments:
+        filter: The filter of the pages.
+        sort: The normalized sort spec.
+        values: The sort values of the last document of the page before.
+    """
+    after: List[Mapping[str, Any]] = []
+    for i, (key, direction) in enumerate(sort):
+        condition: Dict[str, Any] = {
+            prior: value for (prior, _), value in zip(sort[:i], values)
+        }
+        value = values[i]
+        if direction == ASCENDING and value is None:
+            condition[key] = {"$ne": None}
+        elif direction == ASCENDING:
+            condition[key] = {"$gt": value}
+        elif value is None:
+            continue
+        elif key == "_id":
+            condition[key] = {"$lt": value}
+        else:
+            condition["$or"] = [{key: {"$lt": value}}, {key: None}]
+        after.append(condition)
+
+    keyset = after[0] if len(after) == 1 else {"$or": after}
+    if not filter:
+        return keyset
+    return {"$and": [filter, keyset]}
+
+
+def _serializer(secret_key: Optional[str]) -> URLSafeSerializer:
+    if secret_key is None:
+        secret_key = current_app.secret_key
+    if not secret_key:
+        raise RuntimeError("A secret key is needed to sign page tokens")
+    return URLSafeSerializer(
+        secret_key, salt=TOKEN_SALT, serializer=json_util
+    )
+
+
+def encode_token(
+        sort: List[Tuple[str, int]],
+        document: Mapping[str, Any],
+        secret_key: Optional[str] = None
+) -> str:
+    """
+    Returns the signed continuation token after a document.
+
+    Arguments:
+        sort: The normalized sort spec.
+        document: The last document of the page.
+        secret_key: The key to sign the token with, or ``None`` for the
+            ``SECRET_KEY`` of the app.
+    """
+    values = [_get_value(document, key) for key, _ in sort]
+    return _serializer(secret_key).dumps(
+        {"sort": [list(pair) for pair in sort], "values": values}
+    )
+
+
+def decode_token(
+        token: str,
+        sort: List[Tuple[str, int]],
+        secret_key: Optional[str] = None
+) -> List[Any]:
+    """
+    Returns the sort values of a continuation token.
+
+    Raises :class:`InvalidPageToken` if the token was not signed with
+    the secret key or was made for another sort.
+
+    Arguments:
+        token: The continuation token.
+        sort: The normalized sort spec.
+        secret_key: The key the token was signed with, or ``None`` for
+            the ``SECRET_KEY`` of the app.
+    """
+    try:
+        payload = _serializer(secret_key).loads(token)
+    except BadData as error:
+        raise InvalidPageToken("The page token is invalid") from error
+
+    if not isinstance(payload, dict) or \
+            payload.get("sort") != [list(pair) for pair in sort] or \
+            len(payload.get("values", ())) != len(sort):
+        raise InvalidPageToken("The page token is for another sort")
+    return payload["values"]
+
+
+async def paginate(
+        collection: AsyncCollection[Any] | AsyncIOMotorCollection,
+        filter: Optional[Mapping[str, Any]] = None,  # pylint: disable=W0622
+        sort: Optional[SortSpec] = None,
+        page_size: int = 20,
+        token: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        **kwargs: Any
+) -> Page:
+    """
+    Returns a page of the documents of a collection.
+
+    Pages are found with a range query after the sort values of the last
+    document of the page before, so every page is as fast as the first
+    one on an index of the sort keys followed by ``_id``.
+
+    Arguments:
+        collection: The collection to page through.
+        filter: The filter of the documents.
+        sort: A sort key or a list of ``(key, direction)`` pairs.
+            ``_id`` is added as the last key.
+        page_size: The number of documents per page.
+        token: The continuation token of the page, or ``None`` for the
+            first page.
+        secret_key: The key the tokens are signed with, or ``None`` for
+            the ``SECRET_KEY`` of the app.
+        kwargs: Extra arguments for ``find``. A projection must include
+            the sort keys. ``limit`` and ``skip`` are rejected, as the
+            pages are bounded by ``page_size`` and ``token``.
+    """
+    if page_size < 1:
+        raise ValueError("'page_size' must be at least 1")
+    for name in ("limit", "skip"):
+        if name in kwargs:
+            raise ValueError(
+                f"'{name}' cannot be used with paginate, the pages are "
+                "bounded by 'page_size' and 'token'"
+            )
+
+    keys = normalize_sort(sort)
+    query = filter
+    if token is not None:
+        values = decode_token(token, keys, secret_key)
+        query = keyset_filter(filter, keys, values)
+
+    cursor = collection.find(query, sort=keys, limit=page_size + 1, **kwargs)
+    items = await cursor.to_list(page_size + 1)
+
+    next_token = None
+    if len(items) > page_size:
+        del items[page_size:]
+        next_token = encode_token(keys, items[-1], secret_key)
+    return Page(items, next_token)
+
+
+__all__ = (
+    "InvalidPageToken",
+    "Page",
+    "SortSpec",
+    "decode_token",
+    "encode_token",
+    "keyset_filter",
+    "normalize_sort",
+    "paginate"
+)
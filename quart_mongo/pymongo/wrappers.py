@@ -2,7 +2,7 @@
 quart_mongo.pymongo.wrappers
 """
 from __future__ import annotations
-from typing import Any
+from typing import Any, Mapping, Optional
 
 from bson.typings import _DocumentType
 from pymongo import AsyncMongoClient
@@ -10,6 +10,12 @@ from pymongo.asynchronous.collection import AsyncCollection
 from pymongo.asynchronous.database import AsyncDatabase
 from quart import abort
 
+from quart_mongo.cache import WrapperCache
+from quart_mongo.coalesce import CoalescingMixin, SingleFlight
+from quart_mongo.identity import IdentityMapMixin
+from quart_mongo.loader import DocumentLoader, get_loader
+from quart_mongo.pagination import InvalidPageToken, Page, SortSpec, paginate
+
 
 # pylint: disable=W0223
 
@@ -21,18 +27,34 @@ class MongoClient(AsyncMongoClient[_DocumentType]):
     :class:`~quart_mongo.wrappers.Database` instead of native PyMongo
     :class:`~pymongo.asynchronous.database.Database` when accessed with
         dot notation.
+
+    The wrappers are created once per name and kept in a
+    :class:`~quart_mongo.cache.WrapperCache`.
+
+    Arguments:
+        coalesce_reads: Share identical ``find_one`` calls in flight on
+            the collection wrappers, see
+            :class:`~quart_mongo.coalesce.CoalescingMixin`. Defaults to
+            ``False``.
     """
+    def __init__(
+            self, *args: Any, coalesce_reads: bool = False, **kwargs: Any
+    ) -> None:
+        self._wrappers: WrapperCache[Database[_DocumentType]] = \
+            WrapperCache()
+        self._read_flight = SingleFlight() if coalesce_reads else None
+        super().__init__(*args, **kwargs)
+
     def __getattr__(self, name: str) -> Database[_DocumentType]:
-        attr = super().__getattr__(name)
-        if isinstance(attr, AsyncDatabase):
-            return Database(self, name)
-        return attr
+        if name.startswith("_"):
+            return super().__getattr__(name)
+        return self[name]
 
     def __getitem__(self, name: str) -> Database[_DocumentType]:
-        item_ = super().__getitem__(name)
-        if isinstance(item_, AsyncDatabase):
-            return Database(self, name)
-        return item_
+        database = self._wrappers.get(name)
+        if database is None:
+            database = self._wrappers.put(name, Database(self, name))
+        return database
 
 
 class Database(AsyncDatabase[_DocumentType]):
@@ -43,39 +65,65 @@ class Database(AsyncDatabase[_DocumentType]):
     :class:`~quart_mongo.wrappers.Collection` instead of native PyMongo
     :class:~pymongo.asynchronous.collection.AsyncCollection when accessed
         with dot notation.
+
+    The wrappers are created once per name and kept in a
+    :class:`~quart_mongo.cache.WrapperCache`.
     """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._wrappers: WrapperCache[Collection[_DocumentType]] = \
+            WrapperCache()
+        super().__init__(*args, **kwargs)
+
     def __getattr__(self, name: str) -> Collection[_DocumentType]:
-        attr = super().__getattr__(name)
-        if isinstance(attr, AsyncCollection):
-            return Collection(self, name)
-        return attr
+        if name.startswith("_"):
+            return super().__getattr__(name)
+        return self[name]
 
     def __getitem__(self, name: str) -> Collection[_DocumentType]:
-        item_ = super().__getitem__(name)
-        if isinstance(item_, AsyncCollection):
-            return Collection(self, name)
-        return item_
+        collection = self._wrappers.get(name)
+        if collection is None:
+            collection = self._wrappers.put(name, Collection(self, name))
+        return collection
 
 
-class Collection(AsyncCollection[_DocumentType]):
+class Collection(
+        IdentityMapMixin, CoalescingMixin, AsyncCollection[_DocumentType]
+):
     """
     Subclass of Pymongo \
         :class:`~pymongo.asynchronous.collection.AsyncCollection`
     with helpers.
+
+    Sub-collections are created once per name and kept in a
+    :class:`~quart_mongo.cache.WrapperCache`. With ``MONGO_IDENTITY_MAP``,
+    ``find_one`` by ``_id`` is memoized for the request, see
+    :class:`~quart_mongo.identity.IdentityMapMixin`, and with
+    ``MONGO_COALESCE_READS`` identical ``find_one`` calls in flight are
+    shared, see :class:`~quart_mongo.coalesce.CoalescingMixin`.
     """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self._wrappers: WrapperCache[Collection[_DocumentType]] = \
+            WrapperCache()
+        super().__init__(*args, **kwargs)
+
     def __getattr__(self, name: str) -> Collection[_DocumentType]:
-        attr = super().__getattr__(name)
-        if isinstance(attr, AsyncCollection):
-            db = self._database
-            return Collection(db, attr.name)
-        return attr
+        if name.startswith("_"):
+            return super().__getattr__(name)
+        return self[name]
 
     def __getitem__(self, name: str) -> Collection[_DocumentType]:
-        item = super().__getitem__(name)
-        if isinstance(item, AsyncCollection):
-            db = self._database
-            return Collection(db, name)
-        return item
+        collection = self._wrappers.get(name)
+        if collection is None:
+            collection = self._wrappers.put(name, Collection(
+                self._database,
+                f"{self._name}.{name}",
+                False,
+                self.codec_options,
+                self.read_preference,
+                self.write_concern,
+                self.read_concern
+            ))
+        return collection
 
     async def find_one_or_404(
             self, *args: Any, **kwargs: Any
@@ -100,6 +148,88 @@ class Collection(AsyncCollection[_DocumentType]):
             abort(404)
         return found
 
+    def loader(self) -> DocumentLoader:
+        """
+        Returns the :class:`~quart_mongo.loader.DocumentLoader` of this
+        collection for the request.
+
+        Concurrent lookups by ``_id`` are sent as one ``$in`` query, so
+        resolving the authors of many posts costs a single round trip.
+
+        .. code-block:: python
+
+            @app.route("/posts")
+            async def posts():
+                users = mongo.db.users.loader()
+                items = await mongo.db.posts.find().to_list()
+                authors = await users.load_many(
+                    post["author"] for post in items
+                )
+                return await render_template(
+                    "posts.html", posts=zip(items, authors)
+                )
+        """
+        return get_loader(self)
+
+    async def paginate(  # pylint: disable=W0622
+            self,
+            filter: Optional[Mapping[str, Any]] = None,
+            sort: Optional[SortSpec] = None,
+            page_size: int = 20,
+            token: Optional[str] = None,
+            **kwargs: Any
+    ) -> Page:
+        """
+        Returns a page of the documents and a continuation token.
+
+        Pages use a range query after the last document of the page before
+        instead of ``skip``, so deep pages cost as much as the first one
+        with an index on the sort keys followed by ``_id``. The token is
+        signed with the ``SECRET_KEY`` of the app and is ``None`` on the
+        last page.
+
+        Raises :class:`~quart_mongo.pagination.InvalidPageToken` if the
+        token was tampered with or was made for another sort.
+
+        .. code-block:: python
+
+            @app.route("/posts")
+            async def posts():
+                page = await mongo.db.posts.paginate(
+                    {"draft": False},
+                    sort=[("published", DESCENDING)],
+                    token=request.args.get("page")
+                )
+                return {"items": page.items, "next": page.next_token}
+
+        Arguments:
+            filter: The filter of the documents.
+            sort: A sort key or a list of ``(key, direction)`` pairs.
+            page_size: The number of documents per page.
+            token: The ``next_token`` of the page before, or ``None`` for
+                the first page.
+            kwargs: Extra arguments for
+                :meth:`~pymongo.asynchronous.collection.AsyncCollection.find`,
+                except ``limit`` and ``skip``.
+        """
+        return await paginate(self, filter, sort, page_size, token, **kwargs)
+
+    async def paginate_or_404(self, *args: Any, **kwargs: Any) -> Page:
+        """
+        Returns a page of the documents or raises a 404.
+
+        This is like :meth:`paginate`, but rather than returning an empty
+        page or raising on an invalid token, cause a 404 Not Found HTTP
+        status on the request.
+        """
+        try:
+            page = await self.paginate(*args, **kwargs)
+        except InvalidPageToken:
+            abort(404)
+        if not page.items:
+            abort(404)
+        return page
+
 
 __all__ = (
     "MongoClient",
@@ -0,0 +1,349 @@
+"""
+quart_mongo.uploads
+"""
+from datetime import datetime, timedelta, timezone
+import hashlib
+from typing import Any, Mapping
+
+from bson import Binary, ObjectId
+from gridfs import DEFAULT_CHUNK_SIZE
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, ReplaceOne, ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.errors import DuplicateKeyError
+
+from .helpers import GridFSBody, update_hash
+
+
+WRITE_LEASE = 60
+"""Seconds after which the claim of an interrupted upload write runs out."""
+
+
+class UploadOffsetError(ValueError):
+    """
+    Raised when a piece of a resumable upload does not continue the
+    bytes received so far.
+
+    Arguments:
+        offset: The number of bytes received so far, where the client
+            has to resume.
+    """
+    def __init__(self, offset: int) -> None:
+        super().__init__(f"The upload continues at offset {offset}")
+        self.offset = offset
+
+
+def _expires(ttl: float) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl)
+
+
+async def create_upload(
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        filename: str,
+        document: Mapping[str, Any],
+        ttl: float,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> ObjectId:
+    """
+    Creates a resumable upload session.
+
+    The session document in the ``uploads`` collection is the pending
+    file: it holds the fields of the file document, the number of
+    bytes received and the bytes after the last whole chunk. Its
+    ``_id`` becomes the ``_id`` of the file. Returns the ``_id``.
+
+    Arguments:
+        uploads: The ``uploads`` collection of the GridFS bucket.
+        filename: The filename of the file.
+        document: Extra fields of the file document.
+        ttl: Seconds the session is kept after the last piece.
+        chunk_size: The chunk size of the file in bytes.
+    """
+    upload_id = ObjectId()
+    await uploads.insert_one({
+        "_id": upload_id,
+        "filename": filename,
+        "chunkSize": chunk_size,
+        "length": 0,
+        "tail": Binary(b""),
+        "document": dict(document),
+        "expires": _expires(ttl)
+    })
+    return upload_id
+
+
+async def get_upload(
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        upload_id: Any
+) -> Mapping[str, Any]:
+    """
+    Returns an upload session that has not expired.
+
+    Raises :class:`~gridfs.errors.NoFile` if there is no such session.
+
+    Arguments:
+        uploads: The ``uploads`` collection of the GridFS bucket.
+        upload_id: The ``_id`` of the session.
+    """
+    session = await uploads.find_one({
+        "_id": upload_id,
+        "expires": {"$gt": datetime.now(timezone.utc)}
+    })
+    if session is None:
+        raise NoFile(f"no upload session with _id {upload_id!r}")
+    return session
+
+
+async def write_upload(
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        upload_id: Any,
+        offset: int,
+        data: bytes,
+        ttl: float,
+        lease: float = WRITE_LEASE
+) -> int:
+    """
+    Writes a piece of a resumable upload at an offset.
+
+    Whole chunks go straight into the ``chunks`` collection under the
+    ``_id`` of the session and the rest is kept in the session until
+    the next piece. A piece may repeat bytes that were already received,
+    which are skipped, but it must not leave a gap. Returns the number
+    of bytes received so far.
+
+    The session is claimed with a lease before any chunk is written and
+    advanced only while the lease is held, so a write running at the
+    same time is refused instead of touching the chunks. Only the
+    chunks of the piece are replaced, so a piece can be written again
+    after an interrupted write.
+
+    Raises :class:`UploadOffsetError` if the piece leaves a gap, another
+    piece is being written or the upload is being finalized, and
+    :class:`~gridfs.errors.NoFile` if there is no such session.
+
+    Arguments:
+        uploads: The ``uploads`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        upload_id: The ``_id`` of the session.
+        offset: The offset of the piece in the file.
+        data: The piece of the file.
+        ttl: Seconds the session is kept after this piece.
+        lease: Seconds after which the claim of an interrupted write
+            runs out.
+    """
+    session = await get_upload(uploads, upload_id)
+    length = session["length"]
+    if offset > length:
+        raise UploadOffsetError(length)
+    data = data[length - offset:]
+    if not data:
+        return length
+
+    token = ObjectId()
+    now = datetime.now(timezone.utc)
+    claimed = await uploads.find_one_and_update(
+        {
+            "_id": upload_id,
+            "length": length,
+            "finalizing": {"$ne": True},
+            "$or": [{"writing": None}, {"writing.until": {"$lte": now}}]
+        },
+        {"$set": {"writing": {
+            "token": token, "until": now + timedelta(seconds=lease)
+        }}}
+    )
+    if claimed is None:
+        session = await get_upload(uploads, upload_id)
+        raise UploadOffsetError(session["length"])
+
+    chunk_size = session["chunkSize"]
+    buffer = bytes(session["tail"]) + data
+    first_n = (length - len(session["tail"])) // chunk_size
+    whole = len(buffer) - len(buffer) % chunk_size
+    try:
+        if whole:
+            await chunks.bulk_write([
+                ReplaceOne(
+                    {"files_id": upload_id, "n": first_n + i // chunk_size},
+                    {
+                        "files_id": upload_id,
+                        "n": first_n + i // chunk_size,
+                        "data": Binary(buffer[i:i + chunk_size])
+                    },
+                    upsert=True
+                )
+                for i in range(0, whole, chunk_size)
+            ])
+    except BaseException:
+        await uploads.update_one(
+            {"_id": upload_id, "writing.token": token},
+            {"$unset": {"writing": ""}}
+        )
+        raise
+
+    updated = await uploads.find_one_and_update(
+        {"_id": upload_id, "writing.token": token},
+        {
+            "$set": {
+                "length": length + len(data),
+                "tail": Binary(buffer[whole:]),
+                "expires": _expires(ttl)
+            },
+            "$unset": {"writing": ""}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        session = await get_upload(uploads, upload_id)
+        raise UploadOffsetError(session["length"])
+    return updated["length"]
+
+
+async def finalize_upload(
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        upload_id: Any
+) -> Mapping[str, Any]:
+    """
+    Publishes a resumable upload as a GridFS file.
+
+    The session is marked as finalizing first, so no piece can be
+    written anymore. Then the last partial chunk is written, chunks
+    past the end left by an interrupted write are deleted, the sha1 is
+    computed from the stored chunks, and the file document is inserted
+    in one write, so the file becomes visible at once. The session is
+    deleted afterwards. Finalizing again after an interruption is safe
+    and returns the stored file document.
+
+    Raises :class:`UploadOffsetError` if a piece is being written and
+    :class:`~gridfs.errors.NoFile` if there is no such session.
+
+    Arguments:
+        uploads: The ``uploads`` collection of the GridFS bucket.
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        upload_id: The ``_id`` of the session.
+    """
+    now = datetime.now(timezone.utc)
+    session = await uploads.find_one_and_update(
+        {
+            "_id": upload_id,
+            "expires": {"$gt": now},
+            "$or": [{"writing": None}, {"writing.until": {"$lte": now}}]
+        },
+        {"$set": {"finalizing": True}},
+        return_document=ReturnDocument.AFTER
+    )
+    if session is None:
+        session = await get_upload(uploads, upload_id)
+        raise UploadOffsetError(session["length"])
+    length = session["length"]
+    chunk_size = session["chunkSize"]
+    tail = bytes(session["tail"])
+    last_n = length // chunk_size
+    if tail:
+        await chunks.replace_one(
+            {"files_id": upload_id, "n": last_n},
+            {"files_id": upload_id, "n": last_n, "data": Binary(tail)},
+            upsert=True
+        )
+        last_n += 1
+    await chunks.delete_many({"files_id": upload_id, "n": {"$gte": last_n}})
+
+    digest = hashlib.sha1()
+    body = GridFSBody(chunks, upload_id, length, chunk_size)
+    async with body:
+        async for data in body:
+            await update_hash(digest, data)
+
+    document = dict(session["document"])
+    document.update(
+        _id=upload_id,
+        filename=session["filename"],
+        length=length,
+        chunkSize=chunk_size,
+        uploadDate=datetime.now(timezone.utc),
+        sha1=digest.hexdigest()
+    )
+    try:
+        await files.insert_one(document)
+    except DuplicateKeyError:
+        stored = await files.find_one({"_id": upload_id})
+        if stored is not None:
+            document = stored
+    await uploads.delete_one({"_id": upload_id})
+    return document
+
+
+async def delete_upload(
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection,
+        upload_id: Any
+) -> None:
+    """
+    Deletes an upload session and its chunks, unless the file was
+    already published.
+
+    Arguments:
+        uploads: The ``uploads`` collection of the GridFS bucket.
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+        upload_id: The ``_id`` of the session.
+    """
+    if await files.find_one({"_id": upload_id}, projection=["_id"]) is None:
+        await chunks.delete_many({"files_id": upload_id})
+    await uploads.delete_one({"_id": upload_id})
+
+
+async def expire_uploads(
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection,
+        files: AsyncCollection[Any] | AsyncIOMotorCollection,
+        chunks: AsyncCollection[Any] | AsyncIOMotorCollection
+) -> int:
+    """
+    Deletes the expired upload sessions and their chunks. Returns the
+    number of deleted sessions.
+
+    Arguments:
+        uploads: The ``uploads`` collection of the GridFS bucket.
+        files: The ``files`` collection of the GridFS bucket.
+        chunks: The ``chunks`` collection of the GridFS bucket.
+    """
+    count = 0
+    expired = uploads.find(
+        {"expires": {"$lte": datetime.now(timezone.utc)}},
+        projection=["_id"]
+    )
+    async for session in expired:
+        await delete_upload(uploads, files, chunks, session["_id"])
+        count += 1
+    return count
+
+
+async def create_upload_indexes(
+        uploads: AsyncCollection[Any] | AsyncIOMotorCollection
+) -> None:
+    """
+    Creates the index on the expiry of the upload sessions.
+
+    Arguments:
+        uploads: The ``uploads`` collection of the GridFS bucket.
+    """
+    await uploads.create_index([("expires", ASCENDING)])
+
+
+__all__ = (
+    "UploadOffsetError",
+    "WRITE_LEASE",
+    "create_upload",
+    "create_upload_indexes",
+    "delete_upload",
+    "expire_uploads",
+    "finalize_upload",
+    "get_upload",
+    "write_upload"
+)
@@ -0,0 +1,81 @@
+"""
+tests.motor.gridfs.test_backfill_etags
+"""
+from hashlib import sha1
+
+import pytest
+
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from quart import Quart
+from quart_mongo import Motor
+from quart_mongo.cache import FileDocumentCache
+
+
+@pytest.mark.asyncio
+async def test_backfill_etags(mongo: Motor) -> None:
+    """
+    Test that `quart_mongo.Motor.backfill_etags` stores a
+    sha1 for files without a checksum.
+    """
+    data = b"a" * 500 * 1024
+    assert mongo.db is not None
+    storage = AsyncIOMotorGridFSBucket(mongo.db)
+    await storage.upload_from_stream("myfile.txt", data)
+
+    assert await mongo.backfill_etags() == 1
+    assert await mongo.backfill_etags() == 0
+
+    document = await mongo.db["fs.files"].find_one({"filename": "myfile.txt"})
+    assert document is not None
+    assert document["metadata"]["sha1"] == sha1(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_send_file_backfills_etag(
+    app: Quart, mongo: Motor
+) -> None:
+    """
+    Test that `quart_mongo.Motor.send_file` stores the computed
+    sha1 when ``MONGO_GRIDFS_BACKFILL_ETAGS`` is set.
+    """
+    data = b"a" * 500 * 1024
+    assert mongo.db is not None
+    assert mongo.config is not None
+    mongo.config.gridfs_backfill_etags = True
+    storage = AsyncIOMotorGridFSBucket(mongo.db)
+    await storage.upload_from_stream("myfile.txt", data)
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.get_etag()[0] == sha1(data).hexdigest()
+
+    document = await mongo.db["fs.files"].find_one({"filename": "myfile.txt"})
+    assert document is not None
+    assert document["metadata"]["sha1"] == sha1(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_send_file_backfills_cached_document(
+    app: Quart, mongo: Motor
+) -> None:
+    """
+    Test that the file document cache holds the sha1 stored by
+    `quart_mongo.Motor.send_file`, so the file is only hashed once.
+    """
+    data = b"a" * 500 * 1024
+    assert mongo.db is not None
+    assert mongo.config is not None
+    mongo.config.gridfs_backfill_etags = True
+    mongo.gridfs_metadata_cache = FileDocumentCache(60)
+    storage = AsyncIOMotorGridFSBucket(mongo.db)
+    await storage.upload_from_stream("myfile.txt", data)
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.get_etag()[0] == sha1(data).hexdigest()
+
+    cached = mongo.gridfs_metadata_cache.get(
+        (mongo.db.name, "fs", "myfile.txt", -1)
+    )
+    assert cached is not None
+    assert cached["metadata"]["sha1"] == sha1(data).hexdigest()
@@ -0,0 +1,162 @@
+"""
+tests.motor.gridfs.test_cache
+"""
+from io import BytesIO
+import mmap
+
+import pytest
+
+from quart import Quart
+from quart_mongo import Motor
+from quart_mongo.cache import FileDocumentCache, GridFSCache
+from quart_mongo.helpers import MappedBody
+
+
+@pytest.fixture
+def cache(mongo: Motor) -> GridFSCache:
+    """
+    Enables the GridFS cache on the extension.
+    """
+    mongo.gridfs_cache = GridFSCache(1024 * 1024, 1024 * 1024)
+    return mongo.gridfs_cache
+
+
+@pytest.mark.asyncio
+async def test_serves_cached_file(
+    app: Quart, mongo: Motor, cache: GridFSCache
+) -> None:
+    """
+    Test that a cached file is served without MongoDB.
+    """
+    await mongo.save_file("myfile.txt", BytesIO(b"these are the bytes"))
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert await resp.get_data() == b"these are the bytes"
+
+    assert len(cache) == 1
+    assert mongo.db is not None
+    await mongo.db["fs.files"].delete_many({})
+    await mongo.db["fs.chunks"].delete_many({})
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.content_type.startswith("text/plain")
+        assert await resp.get_data() == b"these are the bytes"
+
+
+@pytest.mark.asyncio
+async def test_save_file_invalidates_cache(
+    app: Quart, mongo: Motor, cache: GridFSCache
+) -> None:
+    """
+    Test that saving a file removes it from the cache.
+    """
+    await mongo.save_file("myfile.txt", BytesIO(b"these are the bytes"))
+
+    async with app.test_request_context("/"):
+        await mongo.send_file("myfile.txt")
+
+    await mongo.save_file("myfile.txt", BytesIO(b"these are new bytes"))
+    assert len(cache) == 0
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert await resp.get_data() == b"these are new bytes"
+
+
+@pytest.mark.asyncio
+async def test_caches_file_documents(
+    app: Quart, mongo: Motor
+) -> None:
+    """
+    Test that file documents are resolved from the cache
+    and invalidated by saving a file.
+    """
+    mongo.gridfs_metadata_cache = FileDocumentCache(60)
+    await mongo.save_file("myfile.txt", BytesIO(b"these are the bytes"))
+
+    async with app.test_request_context("/"):
+        await mongo.send_file("myfile.txt")
+
+    assert len(mongo.gridfs_metadata_cache) == 1
+    assert mongo.db is not None
+    await mongo.db["fs.files"].update_many({}, {"$set": {"filename": "x"}})
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert await resp.get_data() == b"these are the bytes"
+
+    await mongo.save_file("myfile.txt", BytesIO(b"these are new bytes"))
+    assert len(mongo.gridfs_metadata_cache) == 0
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert await resp.get_data() == b"these are new bytes"
+
+
+@pytest.mark.asyncio
+async def test_spools_large_cached_file(
+    app: Quart, mongo: Motor
+) -> None:
+    """
+    Test that a cached file above ``MONGO_GRIDFS_SPOOL_THRESHOLD`` is
+    kept in a memory map within the limits of spooled files and served
+    from it.
+    """
+    assert mongo.config is not None
+    mongo.config.gridfs_spool_threshold = 256 * 1024
+    cache = GridFSCache(
+        64 * 1024,
+        64 * 1024,
+        max_mapped_bytes=1024 * 1024,
+        max_mapped_file_bytes=1024 * 1024
+    )
+    mongo.gridfs_cache = cache
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(2))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert isinstance(resp.response, MappedBody)
+        assert await resp.get_data() == data
+
+    assert mongo.db is not None
+    cached = cache.get((mongo.db.name, "fs", "myfile.txt", -1))
+    assert cached is not None
+    assert isinstance(cached.data, mmap.mmap)
+
+    async with app.test_request_context(
+        "/", headers={"Range": "bytes=10-19"}
+    ):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.status_code == 206
+        assert await resp.get_data() == data[10:20]
+
+
+@pytest.mark.asyncio
+async def test_cached_file_serves_multiple_ranges(app: Quart) -> None:
+    """
+    Test that a request for several ranges of a cached file is answered
+    with a multipart/byteranges body.
+    """
+    app.config["MONGO_GRIDFS_CACHE_BYTES"] = 1024 * 1024
+    mongo = Motor(app)
+    await app.startup()
+    assert mongo.gridfs_cache is not None
+    await mongo.save_file("ranges.txt", BytesIO(b"0123456789"))
+
+    headers = {"Range": "bytes=0-1,5-6"}
+    for _ in range(2):
+        async with app.test_request_context("/", headers=headers):
+            resp = await mongo.send_file("ranges.txt")
+            assert resp.status_code == 206
+            assert resp.mimetype == "multipart/byteranges"
+            body = await resp.get_data()
+            assert len(body) == resp.content_length
+
+        boundary = resp.mimetype_params["boundary"].encode()
+        parts = body.split(b"--" + boundary)
+        assert parts[1].endswith(b"\r\n\r\n01\r\n")
+        assert parts[2].endswith(b"\r\n\r\n56\r\n")
+    assert len(mongo.gridfs_cache) == 1
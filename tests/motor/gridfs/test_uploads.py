@@ -0,0 +1,194 @@
+"""
+tests.motor.gridfs.test_uploads
+"""
+import asyncio
+from datetime import datetime
+from hashlib import sha1
+from typing import Any
+
+import pytest
+
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from quart import Quart
+from quart_mongo import Motor
+from quart_mongo.uploads import (
+    UploadOffsetError,
+    finalize_upload,
+    write_upload
+)
+
+
+@pytest.mark.asyncio
+async def test_resumes_upload(app: Quart, mongo: Motor) -> None:
+    """
+    Test that a resumable upload skips repeated bytes, rejects gaps and
+    publishes the file with its sha1 when finalized.
+    """
+    data = b"".join(bytes([i]) * 100 * 1024 for i in range(6))
+    upload_id = await mongo.create_upload("upload.txt", foo="bar")
+
+    assert await mongo.upload_chunk(upload_id, 0, data[:300000]) == 300000
+    with pytest.raises(UploadOffsetError) as error:
+        await mongo.upload_chunk(upload_id, 400000, data[400000:])
+    assert error.value.offset == 300000
+    assert await mongo.upload_offset(upload_id) == 300000
+
+    assert await mongo.upload_chunk(upload_id, 200000, data[200000:]) == \
+        len(data)
+    assert mongo.db is not None
+    files = mongo.db["fs.files"]
+    assert await files.count_documents({"filename": "upload.txt"}) == 0
+
+    assert await mongo.finalize_upload(upload_id) == upload_id
+    document = await files.find_one({"_id": upload_id})
+    assert document["metadata"]["foo"] == "bar"
+    assert document["sha1"] == sha1(data).hexdigest()
+    storage = AsyncIOMotorGridFSBucket(mongo.db)
+    gridfile = await storage.open_download_stream(upload_id)
+    assert await gridfile.read() == data
+    assert await mongo.db["fs.uploads"].count_documents({}) == 0
+
+    async with app.test_request_context("/"):
+        resp = await mongo.send_file("upload.txt")
+        assert await resp.get_data() == data
+
+
+@pytest.mark.asyncio
+async def test_expires_uploads(mongo: Motor) -> None:
+    """
+    Test that expired uploads are deleted with their chunks.
+    """
+    assert mongo.config is not None
+    mongo.config.gridfs_upload_ttl = -1
+    upload_id = await mongo.create_upload("upload.txt")
+
+    with pytest.raises(NoFile):
+        await mongo.upload_chunk(upload_id, 0, b"these are the bytes")
+
+    assert mongo.db is not None
+    await mongo.db["fs.chunks"].insert_one(
+        {"files_id": upload_id, "n": 0, "data": b"these are the bytes"}
+    )
+    assert await mongo.expire_uploads() == 1
+    assert await mongo.db["fs.uploads"].count_documents({}) == 0
+    assert await mongo.db["fs.chunks"].count_documents(
+        {"files_id": upload_id}
+    ) == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_interrupted_upload(mongo: Motor) -> None:
+    """
+    Test that a piece can be written again after its chunks were stored
+    without advancing the session, and that finalizing drops chunks
+    past the end.
+    """
+    data = b"".join(bytes([i]) * 100 * 1024 for i in range(6))
+    upload_id = await mongo.create_upload("upload.txt")
+
+    assert mongo.db is not None
+    chunks = mongo.db["fs.chunks"]
+    await chunks.insert_many([
+        {"files_id": upload_id, "n": n, "data": b"x" * 255 * 1024}
+        for n in range(3)
+    ])
+    assert await mongo.upload_chunk(upload_id, 0, data) == len(data)
+
+    await chunks.insert_one(
+        {"files_id": upload_id, "n": 5, "data": b"these are stale bytes"}
+    )
+    assert await mongo.finalize_upload(upload_id) == upload_id
+    document = await mongo.db["fs.files"].find_one({"_id": upload_id})
+    assert document["sha1"] == sha1(data).hexdigest()
+    storage = AsyncIOMotorGridFSBucket(mongo.db)
+    gridfile = await storage.open_download_stream(upload_id)
+    assert await gridfile.read() == data
+    assert await chunks.count_documents({"files_id": upload_id}) == 3
+
+
+class PausedChunks:
+    """
+    A ``chunks`` collection whose chunk writes wait until resumed.
+    """
+    def __init__(self, chunks: Any) -> None:
+        self.chunks = chunks
+        self.entered = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.chunks, name)
+
+    async def bulk_write(self, *args: Any, **kwargs: Any) -> Any:
+        """
+        Waits until resumed and writes the chunks.
+        """
+        self.entered.set()
+        await self.resume.wait()
+        return await self.chunks.bulk_write(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_refuses_concurrent_writes(mongo: Motor) -> None:
+    """
+    Test that a shorter piece at the same offset is refused while a
+    piece is being written, and accepted once that write is cancelled.
+    """
+    data = b"".join(bytes([i]) * 100 * 1024 for i in range(6))
+    upload_id = await mongo.create_upload("upload.txt")
+    assert mongo.db is not None
+    uploads = mongo.db["fs.uploads"]
+    chunks = mongo.db["fs.chunks"]
+
+    paused = PausedChunks(chunks)
+    first = asyncio.ensure_future(
+        write_upload(uploads, paused, upload_id, 0, data, 60)
+    )
+    await paused.entered.wait()
+    with pytest.raises(UploadOffsetError) as error:
+        await mongo.upload_chunk(upload_id, 0, data[:300000])
+    assert error.value.offset == 0
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert await mongo.upload_chunk(upload_id, 0, data[:300000]) == 300000
+
+    paused = PausedChunks(chunks)
+    paused.resume.set()
+    assert await write_upload(
+        uploads, paused, upload_id, 0, data, 60
+    ) == len(data)
+
+    assert await mongo.finalize_upload(upload_id) == upload_id
+    document = await mongo.db["fs.files"].find_one({"_id": upload_id})
+    assert document["sha1"] == sha1(data).hexdigest()
+    storage = AsyncIOMotorGridFSBucket(mongo.db)
+    gridfile = await storage.open_download_stream(upload_id)
+    assert await gridfile.read() == data
+
+
+@pytest.mark.asyncio
+async def test_finalize_blocks_writes(mongo: Motor) -> None:
+    """
+    Test that no piece is written once finalizing has started and that
+    finalizing again returns the stored file document.
+    """
+    upload_id = await mongo.create_upload("upload.txt")
+    await mongo.upload_chunk(upload_id, 0, b"these are the bytes")
+    assert mongo.db is not None
+    uploads = mongo.db["fs.uploads"]
+    await uploads.update_one(
+        {"_id": upload_id}, {"$set": {"finalizing": True}}
+    )
+    with pytest.raises(UploadOffsetError):
+        await mongo.upload_chunk(upload_id, 19, b" and more")
+
+    files = mongo.db["fs.files"]
+    upload_date = datetime(2024, 1, 1)
+    await files.insert_one({"_id": upload_id, "uploadDate": upload_date})
+    document = await finalize_upload(
+        uploads, files, mongo.db["fs.chunks"], upload_id
+    )
+    assert document == {"_id": upload_id, "uploadDate": upload_date}
+    assert await uploads.count_documents({}) == 0
@@ -63,3 +63,23 @@ async def test_motor_custom_class(app: Quart, uri: str) -> None:
     await mongo.db.things.insert_one({"_id": "thing", "val": "foo"})
     things = await mongo.db.things.find_one()
     assert isinstance(things, CustomDict)
+
+
+@pytest.mark.asyncio
+async def test_motor_creates_gridfs_indexes(db_name: str, uri: str) -> None:
+    """
+    Test that the indexes of the buckets in ``MONGO_GRIDFS_BUCKETS``
+    are created before serving.
+    """
+    app = Quart(__name__)
+    app.config["MONGO_GRIDFS_BUCKETS"] = ["fs"]
+    mongo = Motor(app, uri)
+    await app.startup()
+
+    assert mongo.db is not None
+    files_indexes = await mongo.db["fs.files"].index_information()
+    chunks_indexes = await mongo.db["fs.chunks"].index_information()
+    assert "filename_1_uploadDate_1" in files_indexes
+    assert chunks_indexes["files_id_1_n_1"]["unique"] is True
+
+    await mongo.cx.drop_database(db_name)
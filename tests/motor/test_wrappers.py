@@ -1,11 +1,18 @@
 """
 tests.motor.test_wrappers
 """
+import asyncio
+from typing import Dict
+
 import pytest
 
 from quart import Quart
 from werkzeug.exceptions import NotFound
-from quart_mongo import Motor
+from quart_mongo import ASCENDING, DESCENDING, Motor
+from quart_mongo.motor.wrappers import (
+    AsyncIOMotorCollection,
+    AsyncIOMotorDatabase
+)
 
 
 @pytest.mark.asyncio
@@ -31,3 +38,142 @@ async def test_motor_find_one_or_404_found(app: Quart, uri: str) -> None:
     await mongo.db.things.insert_one({"_id": "thing", "val": "foo"})
     thing = await mongo.db.things.find_one_or_404({"_id": "thing"})
     assert thing["val"] == "foo"
+
+
+@pytest.mark.asyncio
+async def test_motor_reuses_wrappers(app: Quart, uri: str) -> None:
+    """
+    Test that the same database and collection wrappers are returned
+    for every access.
+    """
+    mongo = Motor(app, uri)
+    await app.startup()
+    assert mongo.cx is not None
+    assert mongo.db is not None
+    assert isinstance(mongo.cx.other, AsyncIOMotorDatabase)
+    assert mongo.cx.other is mongo.cx["other"]
+    assert isinstance(mongo.db.things, AsyncIOMotorCollection)
+    assert mongo.db.things is mongo.db["things"]
+
+    sub = mongo.db.things.parts
+    assert sub is mongo.db.things["parts"]
+    assert sub.name == "things.parts"
+
+
+@pytest.mark.asyncio
+async def test_motor_paginate(app: Quart, uri: str) -> None:
+    """
+    Test that pages follow each other through the continuation token.
+    """
+    mongo = Motor(app, uri)
+    app.secret_key = "secret"
+    await app.startup()
+    assert mongo.db is not None
+    await mongo.db.pages.insert_many(
+        [{"_id": i, "rank": i % 3} for i in range(7)]
+    )
+
+    async with app.app_context():
+        first = await mongo.db.pages.paginate(sort="rank", page_size=4)
+        second = await mongo.db.pages.paginate(
+            sort="rank", page_size=4, token=first.next_token
+        )
+        with pytest.raises(NotFound):
+            await mongo.db.pages.paginate_or_404({"rank": 5})
+
+    assert [thing["_id"] for thing in first.items] == [0, 3, 6, 1]
+    assert [thing["_id"] for thing in second.items] == [4, 2, 5]
+    assert second.next_token is None
+
+
+@pytest.mark.asyncio
+async def test_motor_paginate_missing_sort_values(
+    app: Quart, uri: str
+) -> None:
+    """
+    Test that documents with a null or missing sort value are paged
+    through in both directions.
+    """
+    mongo = Motor(app, uri)
+    app.secret_key = "secret"
+    await app.startup()
+    assert mongo.db is not None
+    await mongo.db.pages.insert_many(
+        [{"_id": 0}, {"_id": 1, "rank": None}, {"_id": 2, "rank": 1},
+         {"_id": 3}, {"_id": 4, "rank": 0}]
+    )
+
+    async with app.app_context():
+        for direction, expected in ((ASCENDING, [0, 1, 3, 4, 2]),
+                                    (DESCENDING, [2, 4, 3, 1, 0])):
+            seen = []
+            token = None
+            while True:
+                page = await mongo.db.pages.paginate(
+                    sort=[("rank", direction)], page_size=2, token=token
+                )
+                seen.extend(thing["_id"] for thing in page.items)
+                token = page.next_token
+                if token is None:
+                    break
+            assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_motor_identity_map(app: Quart, uri: str) -> None:
+    """
+    Test that documents found by ``_id`` are kept for the request and
+    dropped by writes.
+    """
+    app.config["MONGO_IDENTITY_MAP"] = True
+    mongo = Motor(app, uri)
+    await app.startup()
+    assert mongo.db is not None
+    await mongo.db.kept.insert_one({"_id": "thing", "val": "foo"})
+
+    @app.route("/thing")
+    async def thing() -> Dict[str, bool]:
+        assert mongo.db is not None
+        first = await mongo.db.kept.find_one_or_404({"_id": "thing"})
+        again = await mongo.db.kept.find_one("thing")
+        await mongo.db.kept.update_one(
+            {"_id": "thing"}, {"$set": {"val": "bar"}}
+        )
+        updated = await mongo.db.kept.find_one("thing")
+        return {"kept": first is again, "dropped": updated["val"] == "bar"}
+
+    response = await app.test_client().get("/thing")
+    assert await response.get_json() == {"kept": True, "dropped": True}
+
+
+@pytest.mark.asyncio
+async def test_motor_loader(app: Quart, uri: str) -> None:
+    """
+    Test that concurrent lookups by ``_id`` get their own documents.
+    """
+    mongo = Motor(app, uri)
+    await app.startup()
+    assert mongo.db is not None
+    await mongo.db.users.insert_many([{"_id": i} for i in range(3)])
+
+    users = mongo.db.users.loader()
+    found = await users.load_many([2, 7, 0])
+    assert found == [{"_id": 2}, None, {"_id": 0}]
+
+
+@pytest.mark.asyncio
+async def test_motor_coalesce_reads(app: Quart, uri: str) -> None:
+    """
+    Test that identical reads in flight share a result.
+    """
+    app.config["MONGO_COALESCE_READS"] = True
+    mongo = Motor(app, uri)
+    await app.startup()
+    assert mongo.db is not None
+    await mongo.db.shared.insert_one({"_id": "thing", "val": "foo"})
+
+    found = await asyncio.gather(
+        *[mongo.db.shared.find_one("thing") for _ in range(10)]
+    )
+    assert found == [{"_id": "thing", "val": "foo"}] * 10
+    assert found[0] is not found[1]
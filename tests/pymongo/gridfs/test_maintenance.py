@@ -0,0 +1,68 @@
+"""
+tests.pymongo.gridfs.test_maintenance
+"""
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+
+import pytest
+
+from bson import ObjectId
+from quart import Quart
+from quart_mongo import PyMongo
+
+
+@pytest.mark.asyncio
+async def test_sweeps_orphan_chunks(mongo: PyMongo) -> None:
+    """
+    Test that old chunks without a file are deleted and the chunks of
+    files, uploads and recent writes are kept.
+    """
+    oid = await mongo.save_file("my-file", BytesIO(b"these are the bytes"))
+    upload_id = await mongo.create_upload("upload.txt")
+    await mongo.upload_chunk(upload_id, 0, b"x" * 300 * 1024)
+    old = ObjectId.from_datetime(
+        datetime.now(timezone.utc) - timedelta(days=1)
+    )
+    young = ObjectId()
+
+    assert mongo.db is not None
+    chunks = mongo.db["fs.chunks"]
+    await chunks.insert_many([
+        {"files_id": old, "n": 0, "data": b"orphan"},
+        {"files_id": old, "n": 1, "data": b"orphan"},
+        {"files_id": young, "n": 0, "data": b"in progress"},
+        {"files_id": "named", "n": 0, "data": b"not an ObjectId"}
+    ])
+
+    assert await mongo.sweep_orphan_chunks() == 2
+    assert await chunks.count_documents({"files_id": old}) == 0
+    assert await chunks.count_documents({"files_id": young}) == 1
+    assert await chunks.count_documents({"files_id": "named"}) == 1
+    assert await chunks.count_documents({"files_id": oid}) == 1
+    assert await chunks.count_documents({"files_id": upload_id}) == 1
+
+    await chunks.delete_many({"files_id": {"$in": [young, "named"]}})
+    await mongo.db["fs.uploads"].delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_prunes_revisions(test_app: Quart, mongo: PyMongo) -> None:
+    """
+    Test that only the newest revisions of a file are kept.
+    """
+    for i in range(3):
+        await mongo.save_file("my-file", BytesIO(f"revision {i}".encode()))
+    await mongo.save_file("other-file", BytesIO(b"only revision"))
+
+    assert await mongo.prune_revisions(keep=2) == 1
+    assert mongo.db is not None
+    assert await mongo.db["fs.files"].count_documents(
+        {"filename": "my-file"}
+    ) == 2
+
+    async with test_app.test_request_context("/"):
+        resp = await mongo.send_file("my-file", version=0)
+        assert await resp.get_data() == b"revision 1"
+
+    with pytest.raises(ValueError):
+        await mongo.prune_revisions(keep=0)
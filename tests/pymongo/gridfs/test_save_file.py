@@ -1,12 +1,15 @@
 """
 tests.pymongo.gridfs.test_save_file
 """
+from hashlib import sha1
 from io import BytesIO
+from typing import AsyncGenerator
 
 import pytest
 
 from bson import ObjectId
 from gridfs.asynchronous import AsyncGridFS
+from quart import Quart
 from quart_mongo import PyMongo
 
 
@@ -63,3 +66,87 @@ async def test_returns_oid(mongo: PyMongo) -> None:
     oid = await mongo.save_file("my-file", fileobj)
 
     assert isinstance(oid, ObjectId)
+
+
+@pytest.mark.asyncio
+async def test_saves_async_iterable(mongo: PyMongo) -> None:
+    """
+    Test that an async iterable of bytes is saved in chunks.
+    """
+    data = b"".join(bytes([i]) * 100 * 1024 for i in range(6))
+
+    async def stream() -> AsyncGenerator[bytes, None]:
+        for i in range(0, len(data), 100 * 1024):
+            yield data[i:i + 100 * 1024]
+
+    oid = await mongo.save_file("my-file", stream())
+
+    assert mongo.db is not None
+    gridfs = AsyncGridFS(mongo.db)
+    gridfile = await gridfs.get(oid)
+    assert await gridfile.read() == data
+    assert gridfile.sha1 == sha1(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_rejects_non_file_source(mongo: PyMongo) -> None:
+    """
+    Test that saving an object without a read() method or async
+    iteration raises a TypeError.
+    """
+    with pytest.raises(TypeError):
+        await mongo.save_file("my-file", b"bytes")  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_saves_file_in_batches(mongo: PyMongo) -> None:
+    """
+    Test that a file saved with ``MONGO_GRIDFS_UPLOAD_BATCH_SIZE`` is
+    stored as a regular GridFS file.
+    """
+    assert mongo.config is not None
+    mongo.config.gridfs_upload_batch_size = 2
+    mongo.config.gridfs_upload_max_batches = 2
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(7)) + b"tail"
+
+    oid = await mongo.save_file("my-file.txt", BytesIO(data))
+
+    assert mongo.db is not None
+    assert await mongo.db["fs.chunks"].count_documents(
+        {"files_id": oid}
+    ) == 8
+    gridfs = AsyncGridFS(mongo.db)
+    gridfile = await gridfs.get(oid)
+    assert await gridfile.read() == data
+    assert gridfile.sha1 == sha1(data).hexdigest()
+    assert gridfile.content_type == "text/plain"
+
+
+@pytest.mark.asyncio
+async def test_deduplicates_identical_files(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that identical files saved with ``MONGO_GRIDFS_DEDUP`` share
+    their chunks until the last of them is deleted.
+    """
+    assert mongo.config is not None
+    mongo.config.gridfs_dedup = True
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(3))
+
+    first = await mongo.save_file("first.txt", BytesIO(data))
+    second = await mongo.save_file("second.txt", BytesIO(data))
+
+    assert mongo.db is not None
+    chunks = mongo.db["fs.chunks"]
+    assert await chunks.count_documents({}) == 3
+
+    async with test_app.test_request_context("/"):
+        resp = await mongo.send_file("second.txt")
+        assert await resp.get_data() == data
+
+    await mongo.delete_file(first)
+    assert await chunks.count_documents({}) == 3
+    await mongo.delete_file(second)
+    assert await chunks.count_documents({}) == 0
+    assert await mongo.db["fs.blobs"].count_documents({}) == 0
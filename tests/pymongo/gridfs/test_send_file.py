@@ -1,17 +1,21 @@
 """
 tests.gridfs.test_send_file
 """
+import asyncio
+import gzip
 import warnings
 from hashlib import md5, sha1
 from io import BytesIO
 from typing import Any, Dict
+from zipfile import ZipFile
 
 import pytest
 
 from gridfs.asynchronous import AsyncGridFS
 from quart import Quart
 from werkzeug.exceptions import NotFound
-from quart_mongo import PyMongo
+from quart_mongo import GridFSBody, PyMongo
+from quart_mongo.helpers import SharedGridFSBody
 
 
 @pytest.mark.asyncio
@@ -139,3 +143,295 @@ async def test_sets_cache_headers(
         resp = await mongo.send_file("myfile.txt", cache_for=60)
         assert resp.cache_control.max_age == 60
         assert resp.cache_control.public is True
+
+
+@pytest.mark.asyncio
+async def test_streams_file_body(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that the file is streamed from the chunks
+    collection instead of being read into memory.
+    """
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(4))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    async with test_app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert isinstance(resp.response, GridFSBody)
+
+        async with resp.response as body:
+            chunks = [chunk async for chunk in body]
+
+        assert len(chunks) == 4
+        assert b"".join(chunks) == data
+
+
+@pytest.mark.asyncio
+async def test_prefetches_chunks(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that the file is streamed in order with a prefetch window.
+    """
+    assert mongo.config is not None
+    mongo.config.gridfs_download_prefetch = 2
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(5))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    async with test_app.test_request_context("/"):
+        resp = await mongo.send_file("myfile.txt")
+        assert isinstance(resp.response, GridFSBody)
+        assert resp.response.prefetch == 2
+
+        async with resp.response as body:
+            chunks = [chunk async for chunk in body]
+
+        assert len(chunks) == 5
+        assert b"".join(chunks) == data
+
+
+@pytest.mark.asyncio
+async def test_serves_range_requests(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that a range request only returns the
+    requested bytes.
+    """
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(4))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    environ_args: Dict[str, Any] = {
+            "path": "/",
+            "method": "GET",
+            "headers": {
+                "Range": "bytes=300000-600000",
+            },
+        }
+
+    async with test_app.test_request_context(**environ_args):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.status_code == 206
+        assert resp.content_length == 300001
+        assert await resp.get_data() == data[300000:600001]
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_skips_chunks(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that a revalidation of a file without a stored
+    checksum is answered without reading any chunks.
+    """
+    assert mongo.db is not None
+    storage = AsyncGridFS(mongo.db)
+
+    async with storage.new_file(filename="myfile.txt") as grid_file:
+        await grid_file.write(b"a" * 500 * 1024)
+
+    # Any chunk read would now fail with a corrupt file.
+    await mongo.db["fs.chunks"].delete_many({})
+
+    environ_args: Dict[str, Any] = {
+            "path": "/",
+            "method": "GET",
+            "headers": {
+                "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT",
+            },
+        }
+
+    async with test_app.test_request_context(**environ_args):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_sends_compressed_file(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that a compressed file is sent as it is stored to clients
+    that accept the encoding and decompressed for other clients.
+    """
+    data = b"a,b,c\n" * 100 * 1024
+    await mongo.save_file("export.csv", BytesIO(data), compress="gzip")
+
+    headers = {"Accept-Encoding": "gzip"}
+    async with test_app.test_request_context("/", headers=headers):
+        resp = await mongo.send_file("export.csv")
+        assert resp.content_encoding == "gzip"
+        assert "Accept-Encoding" in resp.vary
+        compressed = await resp.get_data()
+        assert len(compressed) < len(data)
+        assert gzip.decompress(compressed) == data
+
+    async with test_app.test_request_context("/"):
+        resp = await mongo.send_file("export.csv")
+        assert resp.content_encoding is None
+        assert await resp.get_data() == data
+
+
+@pytest.mark.asyncio
+async def test_serves_multiple_ranges(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that a request for several ranges is answered with a
+    multipart/byteranges body.
+    """
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(4))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    headers = {"Range": "bytes=0-9,700000-700009"}
+    async with test_app.test_request_context("/", headers=headers):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.status_code == 206
+        assert resp.mimetype == "multipart/byteranges"
+        body = await resp.get_data()
+        assert len(body) == resp.content_length
+
+    boundary = resp.mimetype_params["boundary"].encode()
+    parts = body.split(b"--" + boundary)
+    assert parts[-1] == b"--\r\n"
+    assert b"Content-Range: bytes 0-9/%d" % len(data) in parts[1]
+    assert parts[1].endswith(b"\r\n\r\n" + data[0:10] + b"\r\n")
+    assert parts[2].endswith(
+        b"\r\n\r\n" + data[700000:700010] + b"\r\n"
+    )
+
+
+class CountingChunks:
+    """
+    Counts the queries made on a GridFS ``chunks`` collection.
+    """
+    def __init__(self, chunks: Any) -> None:
+        self.chunks = chunks
+        self.finds = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.chunks, name)
+
+    def find(self, *args: Any, **kwargs: Any) -> Any:
+        """
+        Counts the query and runs it on the collection.
+        """
+        self.finds += 1
+        return self.chunks.find(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_coalesces_concurrent_downloads(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that concurrent downloads of the same file share one read of
+    the chunks with ``MONGO_GRIDFS_COALESCE``.
+    """
+    assert mongo.config is not None
+    mongo.config.gridfs_coalesce = True
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(3))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    responses = []
+    for _ in range(5):
+        async with test_app.test_request_context("/"):
+            responses.append(await mongo.send_file("myfile.txt"))
+
+    chunks = None
+    for resp in responses:
+        assert isinstance(resp.response, SharedGridFSBody)
+        if chunks is None:
+            chunks = CountingChunks(resp.response.chunks)
+        resp.response.chunks = chunks
+
+    results = await asyncio.gather(*[resp.get_data() for resp in responses])
+    assert results == [data] * 5
+    assert chunks is not None and chunks.finds == 1
+    assert not mongo._downloads  # pylint: disable=W0212
+
+
+@pytest.mark.asyncio
+async def test_late_download_joins_broadcast(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that a download that starts after the first chunk was sent
+    joins the running broadcast and reads the missed chunk on its own.
+    """
+    assert mongo.config is not None
+    mongo.config.gridfs_coalesce = True
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(3))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    responses = []
+    for _ in range(2):
+        async with test_app.test_request_context("/"):
+            responses.append(await mongo.send_file("myfile.txt"))
+    first, late = [resp.response for resp in responses]
+    assert isinstance(first, SharedGridFSBody)
+    assert isinstance(late, SharedGridFSBody)
+
+    async with first:
+        pieces = [await anext(first)]
+        async with late:
+            assert late._broadcast is first._broadcast  # pylint: disable=W0212
+            late_data = b"".join([piece async for piece in late])
+        pieces.extend([piece async for piece in first])
+
+    assert b"".join(pieces) == data
+    assert late_data == data
+    assert not mongo._downloads  # pylint: disable=W0212
+
+
+@pytest.mark.asyncio
+async def test_head_skips_chunks(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that a HEAD request is answered from the file document with
+    an empty body.
+    """
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(2))
+    await mongo.save_file("myfile.txt", BytesIO(data))
+
+    async with test_app.test_request_context("/", method="HEAD"):
+        resp = await mongo.send_file("myfile.txt")
+        assert resp.status_code == 200
+        assert resp.content_length == len(data)
+        assert resp.content_type.startswith("text/plain")
+        assert resp.headers["ETag"] == f'"{sha1(data).hexdigest()}"'
+        assert resp.last_modified is not None
+        assert not isinstance(resp.response, GridFSBody)
+        assert await resp.get_data() == b""
+
+
+@pytest.mark.asyncio
+async def test_sends_archive(test_app: Quart, mongo: PyMongo) -> None:
+    """
+    Test that several files are streamed as one zip archive, by
+    filenames or by query.
+    """
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(3))
+    await mongo.save_file("first.txt", BytesIO(b"old revision"))
+    await mongo.save_file("first.txt", BytesIO(data))
+    await mongo.save_file("second.txt", BytesIO(data), compress="gzip")
+
+    async with test_app.test_request_context("/"):
+        resp = await mongo.send_archive(
+            ["first.txt", "second.txt"], "files.zip", compression="stored"
+        )
+        assert resp.mimetype == "application/zip"
+        assert "files.zip" in resp.headers["Content-Disposition"]
+        archive = ZipFile(BytesIO(await resp.get_data()))
+        assert archive.read("first.txt") == data
+        assert archive.read("second.txt") == data
+
+        resp = await mongo.send_archive({"filename": "first.txt"})
+        archive = ZipFile(BytesIO(await resp.get_data()))
+        assert archive.namelist() == ["first.txt"]
+        assert archive.read("first.txt") == data
+
+        with pytest.raises(NotFound):
+            await mongo.send_archive(["first.txt", "no-such_file.txt"])
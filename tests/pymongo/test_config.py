@@ -94,3 +94,25 @@ async def test_custom_document_class(
     assert isinstance(value, CustomDict)
 
     await mongo.cx.close()
+
+
+@pytest.mark.asyncio
+async def test_creates_gridfs_indexes(uri: str, db_name: str) -> None:
+    """
+    Test that the indexes of the buckets in ``MONGO_GRIDFS_BUCKETS``
+    are created before serving.
+    """
+    app = Quart(__name__)
+    app.config["MONGO_GRIDFS_BUCKETS"] = ["fs"]
+    mongo = PyMongo(app, uri)
+    await app.startup()
+
+    assert mongo.db is not None
+    files_indexes = await mongo.db["fs.files"].index_information()
+    chunks_indexes = await mongo.db["fs.chunks"].index_information()
+    assert "filename_1_uploadDate_1" in files_indexes
+    assert chunks_indexes["files_id_1_n_1"]["unique"] is True
+
+    assert mongo.cx is not None
+    await mongo.cx.drop_database(db_name)
+    await app.shutdown()
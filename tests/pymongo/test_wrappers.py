@@ -1,13 +1,16 @@
 """
 tests.pymongo.wrappers
 """
+import asyncio
 from typing import Any, Dict
 
 import pytest
 from quart import Quart
 from werkzeug.exceptions import HTTPException
 
-from quart_mongo import PyMongo
+from quart_mongo import ASCENDING, DESCENDING, PyMongo
+from quart_mongo.coalesce import read_key
+from quart_mongo.pymongo.wrappers import Collection, Database
 
 
 @pytest.fixture
@@ -40,3 +43,147 @@ async def test_find_one_or_404(mongo: PyMongo) -> None:
         {"_id": "thing"}
         )
     assert thing["val"] == "foo"
+
+
+def test_reuses_wrappers(mongo: PyMongo) -> None:
+    """
+    Test that the same database and collection wrappers are returned
+    for every access.
+    """
+    assert mongo.cx is not None
+    assert mongo.db is not None
+    assert isinstance(mongo.cx.other, Database)
+    assert mongo.cx.other is mongo.cx["other"]
+    assert isinstance(mongo.db.things, Collection)
+    assert mongo.db.things is mongo.db["things"]
+
+    sub = mongo.db.things.parts
+    assert isinstance(sub, Collection)
+    assert sub is mongo.db.things["parts"]
+    assert sub.name == "things.parts"
+
+
+@pytest.mark.asyncio
+async def test_paginate(test_app: Quart, mongo: PyMongo) -> None:
+    """
+    Test that pages follow each other through the continuation token.
+    """
+    assert mongo.db is not None
+    test_app.secret_key = "secret"
+    await mongo.db.things.insert_many(
+        [{"_id": i, "rank": i % 3} for i in range(7)]
+    )
+
+    seen = []
+    token = None
+    async with test_app.app_context():
+        while True:
+            page = await mongo.db.things.paginate(
+                sort=[("rank", DESCENDING)], page_size=3, token=token
+            )
+            seen.extend(thing["_id"] for thing in page.items)
+            token = page.next_token
+            if token is None:
+                break
+
+        with pytest.raises(HTTPException) as notfound:
+            await mongo.db.things.paginate_or_404(
+                sort="rank", token=page.next_token or "forged"
+            )
+        assert notfound.value.code == 404
+
+    assert seen == [5, 2, 4, 1, 6, 3, 0]
+
+
+@pytest.mark.asyncio
+async def test_paginate_missing_sort_values(
+    test_app: Quart, mongo: PyMongo
+) -> None:
+    """
+    Test that documents with a null or missing sort value are paged
+    through in both directions.
+    """
+    assert mongo.db is not None
+    test_app.secret_key = "secret"
+    await mongo.db.things.insert_many(
+        [{"_id": 0}, {"_id": 1, "rank": None}, {"_id": 2, "rank": 1},
+         {"_id": 3}, {"_id": 4, "rank": 0}]
+    )
+
+    async with test_app.app_context():
+        for direction, expected in ((ASCENDING, [0, 1, 3, 4, 2]),
+                                    (DESCENDING, [2, 4, 3, 1, 0])):
+            seen = []
+            token = None
+            while True:
+                page = await mongo.db.things.paginate(
+                    sort=[("rank", direction)], page_size=2, token=token
+                )
+                seen.extend(thing["_id"] for thing in page.items)
+                token = page.next_token
+                if token is None:
+                    break
+            assert seen == expected
+
+
+@pytest.mark.asyncio
+async def test_identity_map(test_app: Quart) -> None:
+    """
+    Test that documents found by ``_id`` are kept for the request and
+    dropped by writes.
+    """
+    test_app.config["MONGO_IDENTITY_MAP"] = True
+    mongo = PyMongo(test_app)
+    assert mongo.db is not None
+    await mongo.db.things.insert_one({"_id": "thing", "val": "foo"})
+
+    @test_app.route("/thing")
+    async def thing() -> Dict[str, bool]:
+        assert mongo.db is not None
+        first = await mongo.db.things.find_one_or_404({"_id": "thing"})
+        again = await mongo.db.things.find_one("thing")
+        await mongo.db.things.update_one(
+            {"_id": "thing"}, {"$set": {"val": "bar"}}
+        )
+        updated = await mongo.db.things.find_one("thing")
+        return {"kept": first is again, "dropped": updated["val"] == "bar"}
+
+    response = await test_app.test_client().get("/thing")
+    assert await response.get_json() == {"kept": True, "dropped": True}
+
+
+@pytest.mark.asyncio
+async def test_loader(mongo: PyMongo) -> None:
+    """
+    Test that concurrent lookups by ``_id`` get their own documents.
+    """
+    assert mongo.db is not None
+    await mongo.db.users.insert_many([{"_id": i} for i in range(3)])
+
+    users = mongo.db.users.loader()
+    found = await users.load_many([2, 7, 0])
+    assert found == [{"_id": 2}, None, {"_id": 0}]
+
+
+@pytest.mark.asyncio
+async def test_coalesce_reads(test_app: Quart) -> None:
+    """
+    Test that identical reads in flight share a result and reads in a
+    session run on their own.
+    """
+    test_app.config["MONGO_COALESCE_READS"] = True
+    mongo = PyMongo(test_app)
+    assert mongo.cx is not None
+    assert mongo.db is not None
+    await mongo.db.things.insert_one({"_id": "thing", "val": "foo"})
+
+    found = await asyncio.gather(
+        *[mongo.db.things.find_one("thing") for _ in range(10)]
+    )
+    assert found == [{"_id": "thing", "val": "foo"}] * 10
+    assert found[0] is not found[1]
+
+    async with mongo.cx.start_session() as session:
+        async with session.bind(end_session=False):
+            assert read_key(mongo.db.things, "thing", (), {}) is None
+            assert await mongo.db.things.find_one("thing") == found[0]
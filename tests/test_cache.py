@@ -0,0 +1,199 @@
+"""
+tests.test_cache
+"""
+from datetime import datetime
+import mmap
+from typing import Any, AsyncGenerator, Dict, List
+
+import pytest
+
+from quart_mongo.cache import (
+    FileDocumentCache,
+    GridFSCache,
+    WrapperCache,
+    watch_files
+)
+
+
+UPLOAD_DATE = datetime(2024, 1, 1)
+
+
+def test_evicts_least_recently_used() -> None:
+    """
+    Test that the cache evicts the least recently used
+    files to stay within its size.
+    """
+    cache = GridFSCache(100, 100)
+    cache.put(("test", "fs", "a", -1), b"a" * 40, 1, "a", None, "x",
+              UPLOAD_DATE)
+    cache.put(("test", "fs", "b", -1), b"b" * 40, 2, "b", None, "x",
+              UPLOAD_DATE)
+    assert cache.get(("test", "fs", "a", -1)) is not None
+
+    cache.put(("test", "fs", "c", -1), b"c" * 40, 3, "c", None, "x",
+              UPLOAD_DATE)
+
+    assert cache.get(("test", "fs", "b", -1)) is None
+    assert cache.get(("test", "fs", "a", -1)) is not None
+    assert cache.size == 80
+
+
+def test_skips_large_files() -> None:
+    """
+    Test that files above the maximum file size are not cached.
+    """
+    cache = GridFSCache(100, 10)
+    cache.put(("test", "fs", "a", -1), b"a" * 40, 1, "a", None, "x",
+              UPLOAD_DATE)
+    assert len(cache) == 0
+
+
+def test_spooled_files_have_own_limits() -> None:
+    """
+    Test that spooled files are bounded by the mapped limits and do not
+    evict the files kept in memory.
+    """
+    cache = GridFSCache(10, 10, max_mapped_bytes=100,
+                        max_mapped_file_bytes=60)
+    assert not cache.accepts(40)
+    assert cache.accepts(40, mapped=True)
+    assert not cache.accepts(80, mapped=True)
+
+    cache.put(("test", "fs", "a", -1), b"a" * 10, 1, "a", None, "x",
+              UPLOAD_DATE)
+    for name in ("b", "c", "d"):
+        mapped = mmap.mmap(-1, 40)
+        cache.put(("test", "fs", name, -1), mapped, 2, name, None, "x",
+                  UPLOAD_DATE)
+
+    assert cache.get(("test", "fs", "a", -1)) is not None
+    assert cache.get(("test", "fs", "b", -1)) is None
+    assert cache.get(("test", "fs", "d", -1)) is not None
+    assert cache.size == 10
+    assert cache.mapped_size == 80
+
+
+def test_ttl_and_revalidation() -> None:
+    """
+    Test that an expired file can be revalidated
+    against its file document.
+    """
+    cache = GridFSCache(100, 100, ttl=0)
+    key = ("test", "fs", "a", -1)
+    cache.put(key, b"a" * 40, 1, "a", None, "x", UPLOAD_DATE)
+
+    cached = cache.get(key)
+    assert cached is not None
+    assert not GridFSCache.is_fresh(cached)
+    assert GridFSCache.is_current(cached, 1, "x", UPLOAD_DATE)
+    assert not GridFSCache.is_current(cached, 1, "y", UPLOAD_DATE)
+    assert not GridFSCache.is_current(cached, 2, "x", UPLOAD_DATE)
+
+
+def test_invalidate() -> None:
+    """
+    Test that invalidating a filename removes all of its versions.
+    """
+    cache = GridFSCache(100, 100)
+    cache.put(("test", "fs", "a", -1), b"a", 1, "a", None, "x", UPLOAD_DATE)
+    cache.put(("test", "fs", "a", 0), b"a", 1, "a", None, "x", UPLOAD_DATE)
+    cache.put(("test", "fs", "b", -1), b"b", 2, "b", None, "x", UPLOAD_DATE)
+
+    cache.invalidate("test", "fs", "a")
+
+    assert len(cache) == 1
+    assert cache.size == 1
+
+
+def test_file_document_cache_expires() -> None:
+    """
+    Test that cached file documents expire after the ttl.
+    """
+    cache = FileDocumentCache(0)
+    cache.put(("test", "fs", "a", -1), {"_id": 1})
+    assert cache.get(("test", "fs", "a", -1)) is None
+
+    cache = FileDocumentCache(60, max_entries=1)
+    cache.put(("test", "fs", "a", -1), {"_id": 1})
+    cache.put(("test", "fs", "b", -1), {"_id": 2})
+    assert cache.get(("test", "fs", "a", -1)) is None
+    assert cache.get(("test", "fs", "b", -1)) == {"_id": 2}
+
+
+@pytest.mark.asyncio
+async def test_file_document_cache_watch() -> None:
+    """
+    Test that changes to a files collection invalidate
+    the cached file documents.
+    """
+    async def stream(
+            changes: List[Dict[str, Any]]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        for change in changes:
+            yield change
+
+    cache = FileDocumentCache(60)
+    cache.put(("test", "fs", "a", -1), {"_id": 1})
+    cache.put(("test", "fs", "b", -1), {"_id": 2})
+    cache.put(("test", "images", "c", -1), {"_id": 3})
+
+    await cache.watch("test", stream([
+        {"ns": {"coll": "fs.files"}, "fullDocument": {"filename": "a"}},
+        {"ns": {"coll": "things"}},
+    ]))
+    assert cache.get(("test", "fs", "a", -1)) is None
+    assert len(cache) == 2
+
+    await cache.watch("test", stream([{"ns": {"coll": "images.files"}}]))
+    assert cache.get(("test", "images", "c", -1)) is None
+    assert cache.get(("test", "fs", "b", -1)) == {"_id": 2}
+
+
+@pytest.mark.asyncio
+async def test_watch_files_invalidates_file_cache() -> None:
+    """
+    Test that changes to a files collection also invalidate the cached
+    files, so revisions saved by other workers are served.
+    """
+    async def stream(
+            changes: List[Dict[str, Any]]
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        for change in changes:
+            yield change
+
+    documents = FileDocumentCache(60)
+    documents.put(("test", "fs", "a", -1), {"_id": 1})
+    files = GridFSCache(100, 100)
+    for name in ("a", "b"):
+        files.put(("test", "fs", name, -1), b"data", 1, name, None, "x",
+                  UPLOAD_DATE)
+    files.put(("test", "images", "c", -1), b"data", 3, "c", None, "x",
+              UPLOAD_DATE)
+
+    await watch_files("test", stream([
+        {"ns": {"coll": "fs.files"}, "fullDocument": {"filename": "a"}},
+        {"ns": {"coll": "images.files"}}
+    ]), [documents, files])
+    assert documents.get(("test", "fs", "a", -1)) is None
+    assert files.get(("test", "fs", "a", -1)) is None
+    assert files.get(("test", "images", "c", -1)) is None
+    assert files.get(("test", "fs", "b", -1)) is not None
+    assert files.size == 4
+
+
+def test_wrapper_cache_is_bounded() -> None:
+    """
+    Test that the wrapper cache returns the cached wrappers and evicts
+    the least recently used ones.
+    """
+    cache: WrapperCache[object] = WrapperCache(2)
+    users = cache.put("users", object())
+    posts = cache.put("posts", object())
+
+    assert cache.get("users") is users
+    cache.put("tags", object())
+
+    assert len(cache) == 2
+    assert cache.get("posts") is None
+    assert cache.get("users") is users
+    assert posts is not None
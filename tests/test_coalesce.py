@@ -0,0 +1,219 @@
+"""
+tests.test_coalesce
+"""
+import asyncio
+from types import SimpleNamespace
+from typing import Any, AsyncGenerator, List
+
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+import pytest
+
+from quart_mongo.coalesce import (
+    Broadcast,
+    CoalescingMixin,
+    SingleFlight,
+    read_key
+)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_call() -> None:
+    """
+    Test that concurrent calls for a key share one call.
+    """
+    flight = SingleFlight()
+    calls = 0
+
+    async def lookup() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(
+        *[flight.do("key", lookup) for _ in range(10)]
+    )
+    assert results == [42] * 10
+    assert calls == 1
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exception() -> None:
+    """
+    Test that every caller gets the exception of the shared call.
+    """
+    flight = SingleFlight()
+
+    async def lookup() -> int:
+        await asyncio.sleep(0.01)
+        raise KeyError("key")
+
+    results = await asyncio.gather(
+        *[flight.do("key", lookup) for _ in range(3)],
+        return_exceptions=True
+    )
+    assert all(isinstance(result, KeyError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_fans_out() -> None:
+    """
+    Test that every reader gets every piece and the source is read
+    once and closed with the last reader.
+    """
+    read: List[int] = []
+    closed = False
+
+    async def source() -> AsyncGenerator[bytes, None]:
+        for i in range(10):
+            read.append(i)
+            yield bytes([i])
+
+    async def close() -> None:
+        nonlocal closed
+        closed = True
+
+    broadcast = Broadcast(source(), 2, close)
+
+    async def reader() -> bytes:
+        reader_id = broadcast.join()
+        pieces = []
+        while (piece := await broadcast.get(reader_id)) is not None:
+            pieces.append(piece)
+        await broadcast.leave(reader_id)
+        return b"".join(pieces)
+
+    results = await asyncio.gather(*[reader() for _ in range(5)])
+    assert results == [bytes(range(10))] * 5
+    assert read == list(range(10))
+    assert closed
+    assert not broadcast.joinable
+
+
+@pytest.mark.asyncio
+async def test_broadcast_is_bounded() -> None:
+    """
+    Test that the source is not read further ahead of the slowest
+    reader than the window.
+    """
+    read: List[int] = []
+
+    async def source() -> AsyncGenerator[bytes, None]:
+        for i in range(10):
+            read.append(i)
+            yield bytes([i])
+
+    broadcast = Broadcast(source(), 3)
+    slow = broadcast.join()
+    fast = broadcast.join()
+
+    assert await broadcast.get(slow) == b"\x00"
+
+    async def read_all() -> None:
+        while await broadcast.get(fast) is not None:
+            pass
+
+    fast_task = asyncio.ensure_future(read_all())
+    await asyncio.sleep(0.01)
+    assert len(read) == 4
+    assert not fast_task.done()
+
+    await broadcast.leave(slow)
+    await asyncio.wait_for(fast_task, 1)
+    await broadcast.leave(fast)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_late_reader() -> None:
+    """
+    Test that a reader can join after the first pieces were dropped
+    and learns which bytes it has to read on its own.
+    """
+    async def source() -> AsyncGenerator[bytes, None]:
+        for i in range(10):
+            yield bytes([i]) * 2
+
+    broadcast = Broadcast(source(), 2)
+    early = broadcast.join()
+    assert broadcast.start(early) == 0
+    assert await broadcast.get(early) == b"\x00\x00"
+    assert await broadcast.get(early) == b"\x01\x01"
+
+    assert broadcast.joinable
+    late = broadcast.join()
+    assert broadcast.start(late) == 4
+    assert await broadcast.get(late) == b"\x02\x02"
+
+    await broadcast.leave(late)
+    assert await broadcast.get(early) == b"\x02\x02"
+    assert not broadcast.joinable
+    await broadcast.leave(early)
+
+
+class FakeCollection:
+    """
+    A driver collection that counts its lookups.
+    """
+    codec_options = DEFAULT_CODEC_OPTIONS
+
+    def __init__(self, flight: SingleFlight | None) -> None:
+        self.database = SimpleNamespace(
+            client=SimpleNamespace(_read_flight=flight)
+        )
+        self.calls = 0
+
+    async def find_one(self, *args: Any, **kwargs: Any) -> Any:
+        """
+        Returns a document after a round trip.
+        """
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"_id": 1, "tags": ["a"]}
+
+
+class Collection(CoalescingMixin, FakeCollection):
+    """
+    A wrapper collection.
+    """
+
+
+def test_read_key() -> None:
+    """
+    Test that equivalent calls share a key and calls in a session or
+    with other options get none.
+    """
+    things = FakeCollection(None)
+    key = read_key(things, {"a": 1, "b": 2}, (["x", "y"],), {})
+    assert key == read_key(
+        things, {"b": 2, "a": 1}, (), {"projection": {"y": 1, "x": 1}}
+    )
+    assert key != read_key(things, {"a": 1, "b": 2}, (), {"sort": "x"})
+    assert read_key(things, 1, (), {}) == read_key(things, {"_id": 1}, (), {})
+    assert read_key(things, {}, (), {"session": object()}) is None
+    assert read_key(things, {}, (), {"max_time_ms": 10}) is None
+    assert read_key(things, {"a": object()}, (), {}) is None
+
+
+@pytest.mark.asyncio
+async def test_coalescing_mixin() -> None:
+    """
+    Test that identical reads in flight share a query and every caller
+    gets its own copy.
+    """
+    things = Collection(SingleFlight())
+    found = await asyncio.gather(*[things.find_one(1) for _ in range(5)])
+    assert things.calls == 1
+    assert all(document == {"_id": 1, "tags": ["a"]} for document in found)
+    found[0]["tags"].append("b")
+    assert found[1]["tags"] == ["a"]
+
+    await things.find_one(1)
+    assert things.calls == 2
+
+    await asyncio.gather(things.find_one(1), things.find_one(1, session=1))
+    assert things.calls == 4
+
+    alone = Collection(None)
+    await asyncio.gather(alone.find_one(1), alone.find_one(1))
+    assert alone.calls == 2
@@ -0,0 +1,54 @@
+"""
+tests.test_compression
+"""
+import gzip
+from typing import AsyncGenerator
+
+import pytest
+
+from quart_mongo.compression import (
+    available_encodings,
+    compress_stream,
+    decompressor
+)
+
+
+async def _pieces(data: bytes) -> AsyncGenerator[bytes, None]:
+    for i in range(0, len(data), 1000):
+        yield data[i:i + 1000]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("encoding", available_encodings())
+async def test_round_trips(encoding: str) -> None:
+    """
+    Test that streamed compression can be decompressed.
+    """
+    data = b"these are the bytes\n" * 1000
+    compressed = b"".join(
+        [piece async for piece in compress_stream(_pieces(data), encoding)]
+    )
+    assert len(compressed) < len(data)
+
+    stream = decompressor(encoding)
+    assert stream.decompress(compressed) + stream.flush() == data
+
+
+@pytest.mark.asyncio
+async def test_gzip_is_standard() -> None:
+    """
+    Test that gzip output can be read by :mod:`gzip`.
+    """
+    data = b"these are the bytes\n" * 1000
+    compressed = b"".join(
+        [piece async for piece in compress_stream(_pieces(data), "gzip")]
+    )
+    assert gzip.decompress(compressed) == data
+
+
+def test_rejects_unknown_encoding() -> None:
+    """
+    Test that an unknown encoding raises a ``ValueError``.
+    """
+    with pytest.raises(ValueError):
+        decompressor("br")
@@ -0,0 +1,205 @@
+"""
+tests.test_helpers
+"""
+import hashlib
+import mmap
+import threading
+from io import BytesIO, RawIOBase
+from typing import Any, AsyncIterator, List
+
+import pytest
+
+from quart import Quart
+from quart.wrappers.response import ResponseBody
+from quart_mongo.helpers import (
+    HASH_THREAD_THRESHOLD,
+    GridFsFileWrapper,
+    MappedBody,
+    send_gridfs,
+    spool_body,
+    update_hash,
+    with_stored_etag
+)
+
+
+class RecordingHash:
+    """
+    Wraps a sha1 and records the thread of every update.
+    """
+    def __init__(self) -> None:
+        self.digest = hashlib.sha1()
+        self.threads: List[int] = []
+
+    def update(self, data: Any) -> None:
+        self.threads.append(threading.get_ident())
+        self.digest.update(data)
+
+
+@pytest.mark.asyncio
+async def test_hashes_large_buffers_in_thread() -> None:
+    """
+    Test that large buffers are hashed off the event loop and small
+    buffers inline.
+    """
+    digest = RecordingHash()
+    small = b"a" * 10
+    large = b"b" * HASH_THREAD_THRESHOLD
+
+    await update_hash(digest, small)
+    await update_hash(digest, large)
+
+    loop_thread = threading.get_ident()
+    assert digest.threads[0] == loop_thread
+    assert digest.threads[1] != loop_thread
+    assert digest.digest.hexdigest() == \
+        hashlib.sha1(small + large).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_wrapper_hashes_every_chunk() -> None:
+    """
+    Test that the wrapper hashes the whole file while the chunks
+    are read.
+    """
+    data = b"".join(bytes([i]) * 255 * 1024 for i in range(3)) + b"tail"
+    wrapper = GridFsFileWrapper(BytesIO(data))
+
+    chunks = [chunk async for chunk in wrapper.chunks(255 * 1024)]
+
+    assert b"".join(chunks) == data
+    assert len(chunks) == 4
+    assert wrapper.hash.hexdigest() == hashlib.sha1(data).hexdigest()
+
+
+class ShortReader:
+    """
+    An async reader that returns at most 1000 bytes per read.
+    """
+    def __init__(self, data: bytes) -> None:
+        self.data = BytesIO(data)
+
+    async def read(self, n: int) -> bytes:
+        """
+        Reads up to 1000 bytes.
+        """
+        return self.data.read(min(n, 1000))
+
+
+class ShortRawStream(RawIOBase):
+    """
+    A raw stream that returns at most 4096 bytes per read.
+    """
+    def __init__(self, data: bytes) -> None:
+        self.data = BytesIO(data)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        data = self.data.read(min(len(buffer), 4096))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reader", [ShortReader, ShortRawStream])
+async def test_wrapper_realigns_short_reads(reader: Any) -> None:
+    """
+    Test that sources returning fewer bytes than asked are re-aligned
+    to whole chunks.
+    """
+    data = bytes(range(256)) * 3000
+    wrapper = GridFsFileWrapper(reader(data))
+
+    chunks = [chunk async for chunk in wrapper.chunks(261120)]
+
+    assert b"".join(chunks) == data
+    assert [len(chunk) for chunk in chunks] == [261120, 261120, 245760]
+    assert wrapper.hash.hexdigest() == hashlib.sha1(data).hexdigest()
+
+
+class PiecesBody(ResponseBody):
+    """
+    A response body of fixed pieces.
+    """
+    def __init__(self, pieces: List[bytes]) -> None:
+        self.pieces = pieces
+
+    async def __aenter__(self) -> "PiecesBody":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    async def _iter(self) -> AsyncIterator[bytes]:
+        for piece in self.pieces:
+            yield piece
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iter()
+
+    async def make_conditional(self, begin: int, end: int | None) -> int:
+        raise NotImplementedError()
+
+
+@pytest.mark.asyncio
+async def test_spools_body_to_memory_map() -> None:
+    """
+    Test that a spooled body is mapped from a temporary file and served
+    in ranges.
+    """
+    data = b"".join(bytes([i]) * 100 * 1024 for i in range(3))
+    spooled = await spool_body(
+        PiecesBody([data[i:i + 1000] for i in range(0, len(data), 1000)])
+    )
+    assert isinstance(spooled, mmap.mmap)
+    assert spooled[:] == data
+
+    body = MappedBody(spooled)
+    assert await body.make_conditional(1000, 200000) == len(data)
+    async with body:
+        pieces = [piece async for piece in body]
+
+    assert b"".join(pieces) == data[1000:200000]
+    assert max(len(piece) for piece in pieces) == MappedBody.buffer_size
+
+
+@pytest.mark.asyncio
+async def test_sends_multiple_ranges_of_bytes() -> None:
+    """
+    Test that a request for several ranges of an in-memory file is
+    answered with a multipart/byteranges body.
+    """
+    app = Quart(__name__)
+    headers = {"Range": "bytes=0-1,5-6"}
+    async with app.test_request_context("/", headers=headers):
+        resp = await send_gridfs(
+            BytesIO(b"0123456789"), 10, mimetype="text/plain"
+        )
+        assert resp.status_code == 206
+        assert resp.mimetype == "multipart/byteranges"
+        body = await resp.get_data()
+
+    assert len(body) == resp.content_length
+    boundary = resp.mimetype_params["boundary"].encode()
+    parts = body.split(b"--" + boundary)
+    assert parts[1].endswith(b"\r\n\r\n01\r\n")
+    assert parts[2].endswith(b"\r\n\r\n56\r\n")
+
+
+def test_with_stored_etag() -> None:
+    """
+    Test that the sha1 is added to a copy of the file document where
+    PyMongo and Motor store it.
+    """
+    document = {"_id": 1, "metadata": {"content_type": "text/plain"}}
+    assert with_stored_etag(document, "abc", False) == {
+        "_id": 1, "metadata": {"content_type": "text/plain"}, "sha1": "abc"
+    }
+    assert with_stored_etag(document, "abc", True) == {
+        "_id": 1, "metadata": {"content_type": "text/plain", "sha1": "abc"}
+    }
+    assert with_stored_etag({"_id": 1}, "abc", True) == {
+        "_id": 1, "metadata": {"sha1": "abc"}
+    }
+    assert "sha1" not in document
@@ -0,0 +1,100 @@
+"""
+tests.test_identity
+"""
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+from quart import Quart, g
+
+from quart_mongo.identity import (
+    IDENTITY_MAP_KEY,
+    IdentityMapMixin,
+    begin_identity_map,
+    end_identity_map
+)
+
+
+class FakeCollection:
+    """
+    A driver collection that counts its lookups.
+    """
+    full_name = "db.things"
+
+    def __init__(self) -> None:
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+        self.lookups: List[Any] = []
+
+    async def find_one(self, filter: Any = None,  # pylint: disable=W0622
+                       *args: Any, **kwargs: Any) -> Any:
+        """
+        Returns a document by ``_id`` as it was when the lookup started.
+        """
+        self.lookups.append(filter)
+        if isinstance(filter, dict):
+            filter = filter.get("_id")
+        document = self.documents.get(filter)
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return document
+
+    async def insert_one(self, document: Dict[str, Any]) -> None:
+        """
+        Inserts a document.
+        """
+        await asyncio.sleep(0)
+        self.documents[document["_id"]] = document
+
+
+class Collection(IdentityMapMixin, FakeCollection):
+    """
+    A wrapper collection.
+    """
+
+
+@pytest.mark.asyncio
+async def test_identity_map_memoizes_by_id() -> None:
+    """
+    Test that lookups by ``_id`` are memoized for the request and
+    dropped by writes and on teardown.
+    """
+    app = Quart(__name__)
+    things = Collection()
+
+    async with app.test_request_context("/"):
+        assert await things.find_one({"_id": 1}) is None
+        await begin_identity_map()
+        assert await things.find_one({"_id": 1}) is None
+        assert await things.find_one(1) is None
+        assert len(things.lookups) == 2
+
+        await things.insert_one({"_id": 1, "name": "one"})
+        user = await things.find_one({"_id": 1})
+        assert user is await things.find_one(1)
+        assert len(things.lookups) == 3
+
+        await things.find_one({"_id": 1}, projection=["name"])
+        await things.find_one({"_id": 1, "name": "one"})
+        assert len(things.lookups) == 5
+
+        await end_identity_map()
+        assert IDENTITY_MAP_KEY not in g
+        await things.find_one(1)
+        assert len(things.lookups) == 6
+
+
+@pytest.mark.asyncio
+async def test_identity_map_skips_lookup_racing_write() -> None:
+    """
+    Test that a document found while a write was made is not kept.
+    """
+    app = Quart(__name__)
+    things = Collection()
+
+    async with app.test_request_context("/"):
+        await begin_identity_map()
+        found, _ = await asyncio.gather(
+            things.find_one(1), things.insert_one({"_id": 1})
+        )
+        assert found is None
+        assert await things.find_one(1) == {"_id": 1}
@@ -0,0 +1,113 @@
+"""
+tests.test_loader
+"""
+import asyncio
+from typing import Any, AsyncGenerator, Dict, List, Mapping
+
+import pytest
+from quart import Quart
+
+from quart_mongo.identity import begin_identity_map
+from quart_mongo.loader import DocumentLoader, get_loader
+
+
+class FakeCollection:
+    """
+    A driver collection that records its queries.
+    """
+    full_name = "db.users"
+
+    def __init__(self, *ids: Any) -> None:
+        self.documents = {key: {"_id": key} for key in ids}
+        self.queries: List[List[Any]] = []
+        self.error: Exception | None = None
+
+    async def find(
+            self, filter: Mapping[str, Any]  # pylint: disable=W0622
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Yields the documents of an ``$in`` filter on ``_id``.
+        """
+        keys = filter["_id"]["$in"]
+        self.queries.append(keys)
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        for key in keys:
+            if key in self.documents:
+                yield self.documents[key]
+
+
+@pytest.mark.asyncio
+async def test_loader_batches_lookups() -> None:
+    """
+    Test that lookups in the same turn of the event loop share a query
+    and missing documents are ``None``.
+    """
+    users = FakeCollection(1, 2, 3)
+    loader = DocumentLoader(users, max_batch_size=2)  # type: ignore[arg-type]
+
+    results = await asyncio.gather(
+        loader.load(1), loader.load(4), loader.load(1), loader.load(3)
+    )
+    assert results == [{"_id": 1}, None, {"_id": 1}, {"_id": 3}]
+    assert users.queries == [[1, 4], [3]]
+
+    assert await loader.load_many([2, 5]) == [{"_id": 2}, None]
+    assert users.queries[2:] == [[2, 5]]
+
+
+@pytest.mark.asyncio
+async def test_loader_shares_errors() -> None:
+    """
+    Test that every lookup of a failed query raises its error.
+    """
+    users = FakeCollection(1)
+    users.error = RuntimeError("down")
+    loader = DocumentLoader(users)  # type: ignore[arg-type]
+
+    results = await asyncio.gather(
+        loader.load(1), loader.load(2), return_exceptions=True
+    )
+    assert results == [users.error, users.error]
+
+
+@pytest.mark.asyncio
+async def test_loader_cancels_one_caller() -> None:
+    """
+    Test that a cancelled lookup does not cancel the other lookups of
+    the same ``_id``.
+    """
+    users = FakeCollection(1)
+    loader = DocumentLoader(users)  # type: ignore[arg-type]
+
+    async def lookup() -> Any:
+        return await loader.load(1)
+
+    waiting = asyncio.create_task(lookup())
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(loader.load(1), 0)
+    assert await waiting == {"_id": 1}
+    assert users.queries == [[1]]
+
+
+@pytest.mark.asyncio
+async def test_loader_per_request() -> None:
+    """
+    Test that a request shares one loader per collection and fills the
+    identity map.
+    """
+    app = Quart(__name__)
+    users = FakeCollection(1)
+
+    async with app.test_request_context("/"):
+        await begin_identity_map()
+        loader = get_loader(users)  # type: ignore[arg-type]
+        assert get_loader(users) is loader  # type: ignore[arg-type]
+
+        first = await loader.load(1)
+        assert await loader.load(1) is first
+        assert users.queries == [[1]]
+
+    async with app.test_request_context("/"):
+        assert get_loader(users) is not loader  # type: ignore[arg-type]
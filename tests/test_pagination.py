@@ -0,0 +1,89 @@
+"""
+tests.test_pagination
+"""
+from bson import ObjectId
+import pytest
+
+from quart_mongo import ASCENDING, DESCENDING
+from quart_mongo.pagination import (
+    InvalidPageToken,
+    decode_token,
+    encode_token,
+    keyset_filter,
+    normalize_sort,
+    paginate
+)
+
+
+def test_normalize_sort() -> None:
+    """
+    Test that ``_id`` ends the sort in the direction of the last key.
+    """
+    assert normalize_sort(None) == [("_id", ASCENDING)]
+    assert normalize_sort("rank") == [("rank", ASCENDING), ("_id", ASCENDING)]
+    assert normalize_sort([("rank", DESCENDING)]) == [
+        ("rank", DESCENDING), ("_id", DESCENDING)
+    ]
+    with pytest.raises(ValueError):
+        normalize_sort([("rank", "text")])  # type: ignore[list-item]
+
+
+def test_keyset_filter() -> None:
+    """
+    Test the range query after the last document of a page.
+    """
+    sort = [("rank", DESCENDING), ("_id", DESCENDING)]
+    assert keyset_filter({"draft": False}, sort, [2, 7]) == {"$and": [
+        {"draft": False},
+        {"$or": [
+            {"$or": [{"rank": {"$lt": 2}}, {"rank": None}]},
+            {"rank": 2, "_id": {"$lt": 7}}
+        ]}
+    ]}
+    assert keyset_filter(None, [("_id", ASCENDING)], [7]) == {
+        "_id": {"$gt": 7}
+    }
+
+
+def test_keyset_filter_null_values() -> None:
+    """
+    Test the range query after a document with a null or missing sort
+    value.
+    """
+    sort = [("rank", ASCENDING), ("_id", ASCENDING)]
+    assert keyset_filter(None, sort, [None, 7]) == {"$or": [
+        {"rank": {"$ne": None}}, {"rank": None, "_id": {"$gt": 7}}
+    ]}
+
+    sort = [("rank", DESCENDING), ("_id", DESCENDING)]
+    assert keyset_filter(None, sort, [None, 7]) == {
+        "rank": None, "_id": {"$lt": 7}
+    }
+
+
+def test_token_roundtrip() -> None:
+    """
+    Test that tokens keep BSON values and reject tampering and other
+    sorts.
+    """
+    sort = normalize_sort("user.rank")
+    document = {"_id": ObjectId(), "user": {"rank": 3}}
+    token = encode_token(sort, document, "secret")
+    assert decode_token(token, sort, "secret") == [3, document["_id"]]
+
+    with pytest.raises(InvalidPageToken):
+        decode_token(token, sort, "other")
+    with pytest.raises(InvalidPageToken):
+        decode_token(token, normalize_sort("rank"), "secret")
+    with pytest.raises(InvalidPageToken):
+        decode_token(token[:-2], sort, "secret")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("name", ["limit", "skip"])
+async def test_paginate_rejects_limit_and_skip(name: str) -> None:
+    """
+    Test that ``find`` arguments that break the paging are rejected.
+    """
+    with pytest.raises(ValueError, match=name):
+        await paginate(None, **{name: 5})  # type: ignore[arg-type]